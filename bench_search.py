@@ -0,0 +1,68 @@
+"""
+Latency benchmark for build_search_index.search() over a built search/ dir.
+
+  python3 bench_search.py [products_dir] [--k 10] [--queries N]
+
+Queries are sampled from the indexed titles (1-3 words each). Cold = first query against a
+fresh SearchIndex (loads _meta/_docs/_lengths + the shards it needs); warm = shards cached.
+"""
+import os, random, sys, time
+
+import build_search_index as bsi
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+def sample_queries(docs, n, seed=7):
+    r = random.Random(seed)
+    out = []
+    for _ in range(n):
+        words = bsi.token_list(r.choice(docs)[1])
+        if not words:
+            continue
+        start = r.randrange(len(words))
+        out.append(" ".join(words[start:start + r.randint(1, 3)]))
+    return out
+
+def main(argv):
+    args = list(argv[1:])
+    k, n = 10, 500
+    if "--k" in args:
+        i = args.index("--k"); k = int(args[i + 1]); del args[i:i + 2]
+    if "--queries" in args:
+        i = args.index("--queries"); n = int(args[i + 1]); del args[i:i + 2]
+    inv_dir = os.path.join(args[0] if args else bsi.PRODUCTS_DIR, "search")
+
+    t0 = time.perf_counter()
+    ix = bsi.SearchIndex(inv_dir)
+    t_open = time.perf_counter() - t0
+
+    queries = sample_queries(ix.docs, n)
+    if not queries:
+        print("No queries (empty index?)")
+        return 1
+
+    t0 = time.perf_counter()
+    ix.search(queries[0], k)
+    t_cold = time.perf_counter() - t0
+
+    for q in queries:          # warm every shard the queries touch
+        ix.search(q, k)
+    lat = []
+    for q in queries:
+        t0 = time.perf_counter()
+        ix.search(q, k)
+        lat.append((time.perf_counter() - t0) * 1000)
+    lat.sort()
+
+    print(f"Index: {ix.meta['docs']} docs, {len(ix.meta['shards'])} shards ({len(ix.shards)} loaded)")
+    print(f"open {t_open*1000:.1f} ms   first query (cold shard) {t_cold*1000:.2f} ms")
+    print(f"{len(lat)} warm queries, k={k}: p50 {percentile(lat, .5):.3f} ms  "
+          f"p95 {percentile(lat, .95):.3f} ms  max {lat[-1]:.3f} ms")
+    print(f"e.g. {queries[0]!r} -> {[r['slug'] for r in ix.search(queries[0], 3)]}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
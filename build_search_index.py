@@ -1,50 +1,83 @@
-import os, json, re
+import os, json, re, shutil, sys, math
+from collections import Counter
+
+from catalog_store import CatalogStore, pop_store
+from product_corpus import load_corpus
 
 PRODUCTS_DIR = "/Applications/product/public/products"
 OUT_PATH = os.path.join(PRODUCTS_DIR, "search_index.json")
 
+# Inverted index for the client: search/_meta.json, search/_docs.json and one shard per
+# token prefix (search/<prefix>.json), so typing "ca" only downloads search/ca.json.
+INV_DIR = os.path.join(PRODUCTS_DIR, "search")
+SHARD_PREFIX_LEN = 2      # shard key = first N chars of the token
+COMPLETE_MAX_LEN = 4      # typeahead buckets for prefixes up to this length
+COMPLETE_TOP = 8          # tokens per typeahead bucket (highest doc frequency first)
+MIN_TOKEN_LEN = 2
+
+# BM25F: per-field term frequencies are length-normalised, weighted by the boost and
+# summed before saturation. Title/brand hits outrank the same word in a bullet point.
+FIELDS = ["title", "brand", "category", "bullets"]
+BOOSTS = {"title": 3.0, "brand": 2.0, "category": 1.5, "bullets": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
 def norm(s: str) -> str:
     return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9\s]+", " ", (s or "").lower())).strip()
 
-index = []
-
-for fn in os.listdir(PRODUCTS_DIR):
-    if not fn.endswith(".json"):
-        continue
-    if fn == "search_index.json":
-        continue
-
-    path = os.path.join(PRODUCTS_DIR, fn)
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
-        continue
-
-    # normalize into list of dicts
-    if isinstance(data, dict):
-        products = [data]
-    elif isinstance(data, list):
-        products = [x for x in data if isinstance(x, dict)]
+def token_list(text: str):
+    return [t for t in norm(text).split() if len(t) >= MIN_TOKEN_LEN]
+
+def delta_encode(ids):
+    """Sorted doc ids -> gaps ([3, 7, 8] -> [3, 4, 1]); the client takes a running sum."""
+    out, prev = [], 0
+    for i in ids:
+        out.append(i - prev)
+        prev = i
+    return out
+
+def delta_decode(gaps):
+    out, cur = [], 0
+    for g in gaps:
+        cur += g
+        out.append(cur)
+    return out
+
+def collect(products_dir, store=None):
+    """(flat search_index records, per-doc field texts) in doc-id order; store: catalog_store DB to read instead."""
+    if store:
+        with CatalogStore(store) as catalog:
+            corpus = catalog.corpus(products_dir)
     else:
-        continue
+        corpus = load_corpus(products_dir)
+    corpus.report()
+    return records(corpus.products)
 
-    for p in products:
+def records(products):
+    """Same as collect() over already-loaded [(path, product)] pairs (see catalog_build)."""
+    index = []
+    field_texts = []
+
+    for path, p in products:
         title = p.get("title")
         if not title or not isinstance(title, str):
             continue
 
-        slug = p.get("slug") or p.get("handle") or p.get("asin") or fn.replace(".json", "")
+        slug = p.get("slug") or p.get("handle") or p.get("asin") or os.path.basename(path)[:-5]
 
-        bullets = p.get("bullet_points")
+        # v15 writes "bullets"; "bullet_points" is the older name
+        bullets = p.get("bullets")
+        if not isinstance(bullets, list):
+            bullets = p.get("bullet_points")
         if not isinstance(bullets, list):
             bullets = []
+        bullet_text = " ".join([b for b in bullets if isinstance(b, str)])
 
         searchable = norm(" ".join([
             title,
             p.get("brand", "") or "",
             p.get("category", "") or "",
-            " ".join([b for b in bullets if isinstance(b, str)])
+            bullet_text
         ]))
 
         index.append({
@@ -54,9 +87,166 @@ for fn in os.listdir(PRODUCTS_DIR):
             "category": p.get("category"),
             "searchable": searchable,
         })
+        field_texts.append({
+            "title": title,
+            "brand": p.get("brand") or "",
+            "category": p.get("category") or "",
+            "bullets": bullet_text,
+        })
+
+    return index, field_texts
+
+def build_inverted(field_texts):
+    """
+    token -> {"ids": delta-encoded doc ids, "tf": [[tf per FIELDS entry], ...]}, grouped into
+    prefix shards, plus per-doc field lengths for BM25 length normalisation.
+    """
+    postings = {}
+    lengths = []
+    for doc_id, doc in enumerate(field_texts):
+        per_field = [Counter(token_list(doc[f])) for f in FIELDS]
+        lengths.append([sum(c.values()) for c in per_field])
+        for t in set().union(*per_field):
+            postings.setdefault(t, []).append((doc_id, [c.get(t, 0) for c in per_field]))
+
+    shards = {}
+    for t, plist in postings.items():
+        shards.setdefault(t[:SHARD_PREFIX_LEN], {})[t] = plist
+
+    out = {}
+    for key, toks in shards.items():
+        complete = {}
+        for t in toks:
+            for n in range(SHARD_PREFIX_LEN, min(len(t), COMPLETE_MAX_LEN) + 1):
+                complete.setdefault(t[:n], []).append(t)
+        for pre, ts in complete.items():
+            ts.sort(key=lambda t: (-len(toks[t]), t))
+            complete[pre] = ts[:COMPLETE_TOP]
+        out[key] = {
+            "postings": {
+                t: {"ids": delta_encode([d for d, _ in toks[t]]), "tf": [tf for _, tf in toks[t]]}
+                for t in sorted(toks)
+            },
+            "complete": complete,
+        }
+    return out, lengths
+
+def write_inverted(index, field_texts, inv_dir):
+    """Build into a sibling temp dir and swap it in, so readers never see a half-written index."""
+    shards, lengths = build_inverted(field_texts)
+    n = len(index)
+    avg_len = [sum(l[i] for l in lengths) / n if n else 0.0 for i in range(len(FIELDS))]
+
+    tmp_dir = inv_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    def dump(name, obj):
+        with open(os.path.join(tmp_dir, name), "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+
+    dump("_docs.json", [[r["slug"], r["title"], r["brand"], r["category"]] for r in index])
+    dump("_lengths.json", lengths)
+    for key, shard in shards.items():
+        dump(f"{key}.json", shard)
+    dump("_meta.json", {
+        "version": 2,
+        "docs": n,
+        "doc_fields": ["slug", "title", "brand", "category"],
+        "postings": "delta",
+        "shard_prefix_len": SHARD_PREFIX_LEN,
+        "min_token_len": MIN_TOKEN_LEN,
+        "fields": FIELDS,
+        "boosts": [BOOSTS[f] for f in FIELDS],
+        "avg_len": avg_len,
+        "k1": BM25_K1,
+        "b": BM25_B,
+        "shards": sorted(shards),
+    })
+
+    old_dir = inv_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.isdir(inv_dir):
+        os.rename(inv_dir, old_dir)
+    os.rename(tmp_dir, inv_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return len(shards)
+
+# -----------------------------
+# Query side (same maths the frontend can run over the shards)
+# -----------------------------
+class SearchIndex:
+    """Reads a built search/ dir; shards are loaded on first use, like the client does."""
+
+    def __init__(self, inv_dir=INV_DIR):
+        self.inv_dir = inv_dir
+        self.meta = self._load("_meta.json")
+        self.docs = self._load("_docs.json")
+        self.lengths = self._load("_lengths.json")
+        self.shards = {}
+        self.known = set(self.meta["shards"])
+
+    def _load(self, name):
+        with open(os.path.join(self.inv_dir, name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def shard(self, key):
+        if key not in self.shards:
+            self.shards[key] = self._load(f"{key}.json") if key in self.known else {"postings": {}, "complete": {}}
+        return self.shards[key]
+
+    def posting(self, token):
+        return self.shard(token[:self.meta["shard_prefix_len"]])["postings"].get(token)
+
+    def search(self, query, k=10):
+        """BM25F top-k: [{"slug", "title", "brand", "category", "score"}], best first."""
+        meta = self.meta
+        n_docs = meta["docs"]
+        boosts, avg_len = meta["boosts"], meta["avg_len"]
+        k1, b = meta["k1"], meta["b"]
+
+        scores = {}
+        for t in dict.fromkeys(token_list(query)):
+            p = self.posting(t)
+            if not p:
+                continue
+            ids = delta_decode(p["ids"])
+            idf = math.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            for doc_id, tfs in zip(ids, p["tf"]):
+                lens = self.lengths[doc_id]
+                w = 0.0
+                for i, tf in enumerate(tfs):
+                    if tf:
+                        w += boosts[i] * tf / (1 - b + b * lens[i] / (avg_len[i] or 1))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * w / (k1 + w)
+
+        top = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+        out = []
+        for doc_id, score in top:
+            slug, title, brand, category = self.docs[doc_id]
+            out.append({"slug": slug, "title": title, "brand": brand, "category": category, "score": round(score, 4)})
+        return out
+
+_default_index = None
+
+def search(query, k=10, inv_dir=INV_DIR):
+    """Module-level convenience over a lazily opened SearchIndex."""
+    global _default_index
+    if _default_index is None or _default_index.inv_dir != inv_dir:
+        _default_index = SearchIndex(inv_dir)
+    return _default_index.search(query, k)
 
-with open(OUT_PATH, "w", encoding="utf-8") as f:
-    json.dump(index, f, ensure_ascii=False)
+def write_all(index, field_texts, out_dir):
+    with open(os.path.join(out_dir, "search_index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    return write_inverted(index, field_texts, os.path.join(out_dir, "search"))
 
-print(f"✅ search_index.json written with {len(index)} products")
+def main(products_dir=PRODUCTS_DIR, store=None):
+    index, field_texts = collect(products_dir, store)
+    n_shards = write_all(index, field_texts, products_dir)
+    print(f"✅ search_index.json written with {len(index)} products")
+    print(f"✅ search/ inverted index written: {n_shards} shards")
 
+if __name__ == "__main__":
+    args, store = pop_store(sys.argv[1:])
+    main(args[0] if args else PRODUCTS_DIR, store)
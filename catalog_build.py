@@ -0,0 +1,357 @@
+"""
+One-pass catalog index build.
+
+Reads the products dir once (product_corpus.load_corpus) and hands the same product list
+to every index emitter, instead of each rebuild script globbing and re-decoding the
+whole directory on its own:
+
+  cards           _index.json               (handle/asin/title/price/rating/image cards)
+  asin_map        _asin_map.json
+  category_index  _category_index.json      (category_slug -> cards)
+  normalized      _category_index_normalized.json + c/<slug>/<sort>/<page>.json listings
+  search          search_index.json + search/ inverted index
+
+  python3 catalog_build.py [products_dir] [--only cards,search] [--workers N] [--store DB]
+                           [--compact] [--precompress]
+
+With --store the products come from the SQLite catalog store (catalog_store.py) instead of
+the products dir; the indexes are still written into products_dir. --compact writes the
+indexes without indentation and with sorted keys; --precompress then refreshes the .gz/.br
+siblings and the _assets.json content hashes (static_assets.py) for the whole dir.
+
+Emitters run concurrently and write into a staging dir; outputs are moved into place
+only after every emitter succeeded, so the directory never mixes index generations.
+scripts/rebuild_indexes.py and scripts/rebuild_category_index_normalized.py are thin
+wrappers around run().
+"""
+import json
+import os
+import shutil
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import build_search_index as search_index
+import image_variants
+import static_assets
+from catalog_store import CatalogStore, pop_store
+from product_corpus import load_corpus
+from taxonomy import load_taxonomy
+
+PRODUCTS_DIR = Path("/Applications/product/static/products")
+STAGE_NAME = ".catalog_build.tmp"
+
+EMITTERS = {}
+
+def emitter(name):
+    def deco(fn):
+        EMITTERS[name] = fn
+        return fn
+    return deco
+
+# set by run(compact=True): every emitter's dump_json() output becomes static_assets.compact_json()
+COMPACT = False
+
+def dump_json(path: Path, data, **kw):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = static_assets.compact_json(data) if COMPACT else json.dumps(data, **kw)
+    path.write_text(text, encoding="utf-8")
+
+# ----------------------------
+# Cards / ASIN map / category index (was scripts/rebuild_indexes.py)
+# ----------------------------
+
+def extract_image(data):
+    imgs = data.get("images")
+
+    if isinstance(imgs, list) and imgs:
+        first = imgs[0]
+        if isinstance(first, dict):
+            return first.get("url")
+        if isinstance(first, str):
+            return first
+
+    if isinstance(imgs, dict):
+        return imgs.get("url")
+
+    if isinstance(imgs, str):
+        return imgs
+
+    return None
+
+def card_image(url):
+    """A card's image: the CARD_WIDTH variant plus a srcset of every width (image_variants.py)."""
+    if not url:
+        return {"image": url, "image_srcset": ""}
+    return {"image": image_variants.variant(url, image_variants.CARD_WIDTH), "image_srcset": image_variants.srcset(url)}
+
+def index_cards(products):
+    """[(card, category_slug)] for products with a handle and an asin."""
+    out = []
+    for _, data in products:
+        handle = data.get("handle")
+        asin = data.get("asin")
+        if not handle or not asin:
+            continue
+        card = {
+            "handle": handle,
+            "asin": asin,
+            "title": data.get("title"),
+            "price": data.get("price"),
+            "rating": data.get("rating"),
+            **card_image(extract_image(data)),
+            "category_path": data.get("category_path"),
+        }
+        out.append((card, data.get("category_slug")))
+    return out
+
+@emitter("cards")
+def emit_cards(products, stage: Path):
+    index = [card for card, _ in index_cards(products)]
+    dump_json(stage / "_index.json", index, indent=2, ensure_ascii=False)
+    return f"{len(index)} cards"
+
+@emitter("asin_map")
+def emit_asin_map(products, stage: Path):
+    asin_map = {card["asin"]: card["handle"] for card, _ in index_cards(products)}
+    dump_json(stage / "_asin_map.json", asin_map, indent=2, ensure_ascii=False)
+    return f"{len(asin_map)} asins"
+
+@emitter("category_index")
+def emit_category_index(products, stage: Path):
+    category_index = {}
+    for card, slug in index_cards(products):
+        if slug:
+            category_index.setdefault(slug, []).append(card)
+    dump_json(stage / "_category_index.json", category_index, indent=2, ensure_ascii=False)
+    return f"{len(category_index)} categories"
+
+# ----------------------------
+# Normalized category index + listing pages (was scripts/rebuild_category_index_normalized.py)
+# ----------------------------
+
+# Ready-to-render listing pages: c/<slug>/<sort>/<page>.json (page size matches CategoryPage.tsx)
+PAGE_SIZE = 48
+
+def title_from_slug(slug: str) -> str:
+    return slug.replace("-", " ").title()
+
+def categorize(handle: str, data: dict) -> list[str]:
+    """
+    Determine category slugs for a single product ("normalized" set in taxonomy_rules.json).
+    data is guaranteed to be a dict when this is called.
+    """
+    text = handle + "\n" + str(data.get("title", ""))
+    return sorted(set(load_taxonomy("normalized").match_all(text)))
+
+def to_number(v):
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return v
+    if isinstance(v, str):
+        try:
+            return float("".join(ch for ch in v if ch.isdigit() or ch == "."))
+        except ValueError:
+            return None
+    return None
+
+def first_image(data: dict):
+    for key in ("images", "gallery_images"):
+        imgs = data.get(key)
+        if isinstance(imgs, str):
+            return imgs
+        if isinstance(imgs, list) and imgs:
+            first = imgs[0]
+            if isinstance(first, dict):
+                return first.get("url")
+            if isinstance(first, str):
+                return first
+    return None
+
+def listing_card(handle: str, data: dict) -> dict:
+    reviews = data.get("reviews") if isinstance(data.get("reviews"), dict) else {}
+    return {
+        "handle": data.get("id") or data.get("handle") or handle,
+        "asin": data.get("asin"),
+        "title": data.get("title"),
+        "price": to_number(data.get("price")),
+        "rating": to_number(data.get("rating") or reviews.get("average_rating")),
+        "review_count": reviews.get("count"),
+        **card_image(first_image(data)),
+    }
+
+# Same orderings as the CategoryPage sort dropdown (missing price/rating sorts as 0, stable).
+LISTING_SORTS = {
+    "featured": None,
+    "price-asc": lambda c: c["price"] or 0,
+    "price-desc": lambda c: -(c["price"] or 0),
+    "rating": lambda c: -(c["rating"] or 0),
+}
+
+def write_listings(final_index: dict, cards: dict, out_dir: Path) -> int:
+    """One file per category x sort x page."""
+    written = 0
+    for slug, entry in final_index.items():
+        listed = [cards[h] for h in entry["items"]]
+        pages = max(1, -(-len(listed) // PAGE_SIZE))
+        for sort_name, key in LISTING_SORTS.items():
+            ordered = listed if key is None else sorted(listed, key=key)
+            for page in range(1, pages + 1):
+                payload = {
+                    "slug": slug,
+                    "title": entry["title"],
+                    "sort": sort_name,
+                    "page": page,
+                    "pages": pages,
+                    "count": len(listed),
+                    "page_size": PAGE_SIZE,
+                    "items": ordered[(page - 1) * PAGE_SIZE:page * PAGE_SIZE],
+                }
+                dump_json(out_dir / slug / sort_name / f"{page}.json", payload,
+                          ensure_ascii=False, separators=(",", ":"))
+                written += 1
+    return written
+
+@emitter("normalized")
+def emit_normalized(products, stage: Path):
+    index = defaultdict(lambda: {
+        "slug": "",
+        "title": "",
+        "count": 0,
+        "items": []
+    })
+    cards = {}
+
+    for path, raw in products:
+        # the record's handle, not the file name: a product may have been read from its ASIN alias
+        handle = str(raw.get("handle") or raw.get("id") or Path(path).stem)
+
+        categories = categorize(handle, raw)
+        if not categories:
+            continue
+
+        cards[handle] = listing_card(handle, raw)
+
+        for cat in categories:
+            index[cat]["slug"] = cat
+            index[cat]["title"] = title_from_slug(cat)
+            index[cat]["items"].append(handle)
+
+    # Finalize counts + dedupe
+    final_index = {}
+    for slug, data in index.items():
+        items = sorted(set(data["items"]))
+        if not items:
+            continue
+
+        final_index[slug] = {
+            "slug": slug,
+            "title": data["title"],
+            "count": len(items),
+            "items": items
+        }
+
+    dump_json(stage / "_category_index_normalized.json", final_index, indent=2)
+    n_pages = write_listings(final_index, cards, stage / "c")
+    return f"{len(final_index)} categories, {n_pages} listing pages"
+
+# ----------------------------
+# Search (build_search_index.py)
+# ----------------------------
+
+@emitter("search")
+def emit_search(products, stage: Path):
+    index, field_texts = search_index.records(products)
+    n_shards = search_index.write_all(index, field_texts, str(stage))
+    return f"{len(index)} docs, {n_shards} shards"
+
+# ----------------------------
+# Pipeline
+# ----------------------------
+
+def commit_stage(stage: Path, out_dir: Path):
+    """Move staged outputs into place: files via os.replace, directories swapped whole."""
+    for entry in sorted(stage.iterdir()):
+        target = out_dir / entry.name
+        if entry.is_dir():
+            old = out_dir / (entry.name + ".old")
+            shutil.rmtree(old, ignore_errors=True)
+            if target.exists():
+                target.rename(old)
+            entry.rename(target)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(entry, target)
+
+def run(products_dir=PRODUCTS_DIR, only=None, workers=None, store=None, compact=False, precompress=False):
+    global COMPACT
+    COMPACT = compact
+    products_dir = Path(products_dir)
+    names = list(only or EMITTERS)
+    unknown = [n for n in names if n not in EMITTERS]
+    if unknown:
+        raise SystemExit(f"❌ Unknown emitter(s): {', '.join(unknown)} (choose from {', '.join(EMITTERS)})")
+
+    t0 = time.perf_counter()
+    if store:
+        with CatalogStore(store) as catalog:
+            corpus = catalog.corpus(products_dir)
+    else:
+        corpus = load_corpus(str(products_dir), workers=workers)
+    corpus.report()
+    t_load = time.perf_counter() - t0
+
+    stage = products_dir / STAGE_NAME
+    shutil.rmtree(stage, ignore_errors=True)
+    stage.mkdir()
+
+    def timed(name):
+        t = time.perf_counter()
+        summary = EMITTERS[name](corpus.products, stage)
+        return summary, time.perf_counter() - t
+
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=len(names)) as ex:
+            futures = {name: ex.submit(timed, name) for name in names}
+            for name, fut in futures.items():
+                try:
+                    summary, dt = fut.result()
+                    print(f"✅ {name:15s} {summary}  ({dt:.2f}s)")
+                except Exception as e:
+                    failed.append(name)
+                    print(f"❌ {name:15s} {type(e).__name__}: {e}")
+
+        if failed:
+            print(f"❌ Nothing written: {len(failed)} emitter(s) failed")
+            return 1
+        commit_stage(stage, products_dir)
+    finally:
+        shutil.rmtree(stage, ignore_errors=True)
+
+    print(f"✅ Catalog indexes rebuilt for {len(corpus.products)} products "
+          f"(load {t_load:.2f}s, total {time.perf_counter() - t0:.2f}s)")
+    if precompress:
+        static_assets.report(static_assets.precompress(products_dir), products_dir)
+    return 0
+
+def main(argv):
+    args = list(argv[1:])
+    args, store = pop_store(args)
+    flags = {f: f in args for f in ("--compact", "--precompress")}
+    args = [a for a in args if a not in flags]
+    only, workers = None, None
+    if "--only" in args:
+        i = args.index("--only")
+        only = [x.strip() for x in args[i + 1].split(",") if x.strip()]
+        del args[i:i + 2]
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    return run(args[0] if args else PRODUCTS_DIR, only=only, workers=workers, store=store,
+               compact=flags["--compact"], precompress=flags["--precompress"])
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,394 @@
+"""
+SQLite catalog store: the products in one WAL-mode database instead of a directory of
+<handle>.json files that every tool has to glob and decode to answer any question.
+
+    python3 catalog_store.py import [products_dir] [--store DB]     # seed from a products dir
+    python3 catalog_store.py export [products_dir] [--store DB] [--alias copy|symlink|hardlink|redirect] [--prune]
+                                    [--split]           # critical <handle>.json + deferred/<ASIN>.json (pdp_split.py)
+                                    [--lean]            # lean records + shared assets/ (pdp_lean.py)
+                                    [--precompress]     # then .gz/.br siblings + _assets.json (static_assets.py)
+    python3 catalog_store.py stats [--store DB]
+
+Schema:
+  products(asin PK, handle, data, category_slug, updated_at)
+    data is the product JSON text exactly as its last writer rendered it, so export
+    reproduces the files byte for byte: v15 stores what it would have written (indent=2,
+    or compact with --compact); put_many() / rename_many() (the scripts) store indent=2.
+    handle and the generated category_slug are indexed: lookups never decode the catalog,
+    and a category move or a handle fix is a row UPDATE. Products sharing a handle keep their own rows (like their <ASIN>.json
+    copies do); the most recently inserted one owns <handle>.json, as v15's last write wins.
+  redirects(old PK, new)
+    retired handle -> current handle; export writes it as _handle_redirects.json.
+
+Writers: amazon_html_to_pdp_json_v15.py --store (batched transactions),
+scripts/categorize_products.py --store, scripts/fix_product_handles.py --store.
+Readers: catalog_build.py / build_search_index.py / the rebuild scripts with --store;
+store.corpus() stands in for product_corpus.load_corpus(). The frontend still fetches
+static JSON, so run `export` after writing to the store.
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pdp_lean
+import pdp_split
+import static_assets
+from product_corpus import SKIP_NAMES, Corpus, load_corpus, loads
+from product_files import ALIAS_MODES, read_text, write_alias, write_file
+
+CATALOG_DB = Path("/Applications/product/catalog.sqlite")
+PRODUCTS_DIR = Path("/Applications/product/static/products")
+REDIRECTS_NAME = "_handle_redirects.json"
+BATCH_SIZE = 500
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    asin          TEXT PRIMARY KEY,
+    handle        TEXT NOT NULL,
+    data          TEXT NOT NULL CHECK (json_valid(data)),
+    category_slug TEXT GENERATED ALWAYS AS (json_extract(data, '$.category_slug')) VIRTUAL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_handle ON products(handle);
+CREATE INDEX IF NOT EXISTS products_category_slug ON products(category_slug);
+CREATE TABLE IF NOT EXISTS redirects (
+    old TEXT PRIMARY KEY,
+    new TEXT NOT NULL
+);
+"""
+
+# unchanged rows are left alone (and keep their updated_at)
+UPSERT = """
+INSERT INTO products(asin, handle, data, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(asin) DO UPDATE SET handle = excluded.handle, data = excluded.data, updated_at = excluded.updated_at
+WHERE products.handle <> excluded.handle OR products.data <> excluded.data
+"""
+
+# the row that owns <handle>.json
+OWNER = "rowid = (SELECT max(q.rowid) FROM products q WHERE q.handle = products.handle)"
+
+def dumps(p):
+    return json.dumps(p, indent=2, ensure_ascii=False)
+
+class CatalogStore:
+    def __init__(self, path=CATALOG_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # autocommit; writes go through transaction() so a batch lands whole or not at all
+        self.db = sqlite3.connect(str(self.path), isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"{self.path} has schema version {version}, this code knows {SCHEMA_VERSION}")
+        self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def transaction(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    # ---------- writes ----------
+
+    def put_texts(self, rows):
+        """[(asin, handle, rendered JSON text)] in one transaction; returns how many rows changed."""
+        now = time.time()
+        before = self.db.total_changes
+        with self.transaction() as db:
+            db.executemany(UPSERT, ((asin, handle, text, now) for asin, handle, text in rows))
+        return self.db.total_changes - before
+
+    def put_many(self, rows, batch=BATCH_SIZE):
+        """[(handle, product)] in transactions of `batch` rows; returns how many rows changed."""
+        changed, buf = 0, []
+        for handle, p in rows:
+            buf.append((str(p["asin"]), handle, dumps(p)))
+            if len(buf) >= batch:
+                changed += self.put_texts(buf)
+                buf = []
+        if buf:
+            changed += self.put_texts(buf)
+        return changed
+
+    def rename_many(self, rows):
+        """
+        [(asin, new handle, product)] in one transaction. A handle no row uses any more is
+        redirected to where its product went; chains (a -> b, now b -> c) collapse to a -> c.
+        Returns how many products changed handle.
+        """
+        now = time.time()
+        renamed = 0
+        with self.transaction() as db:
+            for asin, new, p in rows:
+                row = db.execute("SELECT handle FROM products WHERE asin = ?", (asin,)).fetchone()
+                if row is None:
+                    continue
+                old = row[0]
+                db.execute("UPDATE products SET handle = ?, data = ?, updated_at = ? WHERE asin = ?",
+                           (new, dumps(p), now, asin))
+                if old == new:
+                    continue
+                renamed += 1
+                db.execute("UPDATE redirects SET new = ? WHERE new = ?", (new, old))
+                db.execute("INSERT OR REPLACE INTO redirects(old, new) VALUES (?, ?)", (old, new))
+            # live handles never redirect
+            db.execute("DELETE FROM redirects WHERE old = new OR old IN (SELECT handle FROM products)")
+        return renamed
+
+    def put_redirects(self, redirects):
+        with self.transaction() as db:
+            db.executemany("INSERT OR REPLACE INTO redirects(old, new) VALUES (?, ?)",
+                           ((old, new) for old, new in redirects.items() if old != new))
+
+    # ---------- reads ----------
+
+    def count(self):
+        return self.db.execute("SELECT count(*) FROM products").fetchone()[0]
+
+    def get_text(self, asin):
+        row = self.db.execute("SELECT data FROM products WHERE asin = ?", (asin,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, asin):
+        text = self.get_text(asin)
+        return loads(text) if text is not None else None
+
+    def by_handle(self, handle):
+        """The product served as <handle>.json, or None."""
+        row = self.db.execute(f"SELECT data FROM products WHERE handle = ? AND {OWNER}", (handle,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def in_category(self, slug):
+        return [loads(d) for (d,) in
+                self.db.execute("SELECT data FROM products WHERE category_slug = ? ORDER BY handle, asin", (slug,))]
+
+    def category_counts(self):
+        return dict(self.db.execute(
+            "SELECT coalesce(category_slug, ''), count(*) FROM products GROUP BY 1 ORDER BY 2 DESC"))
+
+    def products(self):
+        """[(asin, handle, product)] in insertion order."""
+        return [(a, h, loads(d)) for a, h, d in self.db.execute("SELECT asin, handle, data FROM products ORDER BY rowid")]
+
+    def redirects(self):
+        return dict(self.db.execute("SELECT old, new FROM redirects ORDER BY old"))
+
+    def corpus(self, products_dir=PRODUCTS_DIR):
+        """
+        The Corpus load_corpus(products_dir) returns for an exported copy-mode directory: one
+        record per asin, at <handle>.json when it owns that file and at <ASIN>.json otherwise,
+        ordered by the first of its file names.
+        """
+        corpus = Corpus(str(products_dir))
+        rows = []
+        for asin, handle, owner, data in self.db.execute(f"SELECT asin, handle, {OWNER}, data FROM products"):
+            name = f"{handle if owner else asin}.json"
+            rows.append((min(name, f"{asin}.json"), name, loads(data)))
+        rows.sort(key=lambda r: r[0])
+        corpus.files = len(rows)
+        corpus.products = [(os.path.join(str(products_dir), name), p) for _, name, p in rows]
+        return corpus
+
+    # ---------- directory <-> store ----------
+
+    def import_dir(self, products_dir):
+        """
+        Load a products dir (load_corpus rules: --split parts merged, --lean records expanded)
+        plus its _handle_redirects.json. Records without an asin, and --split records whose
+        deferred part is missing, are not stored but reported in corpus.skipped.
+        Returns (corpus, rows changed).
+        """
+        corpus = load_corpus(str(products_dir))
+        partial = {path for path, _ in corpus.partial}
+        rows = []
+        for path, p in corpus.products:
+            stem = os.path.basename(path)[:-5]
+            if not p.get("asin"):
+                corpus.skipped.append((path, "no asin"))
+                continue
+            if path in partial:
+                corpus.skipped.append((path, "deferred part missing"))
+                continue
+            handle = str(p.get("handle") or p.get("id") or stem)
+            rows.append((stem == handle, handle, p))
+        # the product read from <handle>.json goes in last, so it keeps owning that file
+        rows.sort(key=lambda r: r[0])
+        changed = self.put_many((handle, p) for _, handle, p in rows)
+        try:
+            redirects = json.loads((Path(products_dir) / REDIRECTS_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            redirects = {}
+        if isinstance(redirects, dict) and redirects:
+            self.put_redirects(redirects)
+        return corpus, changed
+
+    def export(self, products_dir, alias="copy", prune=False, split=False, lean=False):
+        """
+        Materialise <handle>.json + <ASIN>.json (product_files.write_alias, as v15 --alias) and
+        _handle_redirects.json; with lean, the records lose their derivable copies and share
+        size charts under assets/ (pdp_lean.py, as v15 --lean); with split, the critical part
+        goes there and deferred/<ASIN>.json gets the rest (pdp_split.py, as v15 --split). Files
+        whose text already matches are left alone, mtime included. With prune, product files the store no
+        longer has (renamed handles, deleted products) and unused deferred parts and assets are
+        removed. Returns (written, unchanged, removed).
+        """
+        out = Path(products_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        written = unchanged = 0
+        keep = set()
+
+        def shape(text):
+            """
+            (product file text, deferred part text or None, {asset path: text}) as v15 renders
+            them, compact when the stored text is (v15 --compact --store), indent=2 otherwise.
+            """
+            if not split and not lean:
+                return text, None, {}
+            compact = not text.startswith("{\n")
+
+            def render(data, sort_keys=False):
+                if compact:
+                    return static_assets.compact_json(data)
+                return json.dumps(data, indent=2, ensure_ascii=False, sort_keys=sort_keys)
+
+            p, assets = pdp_lean.lean(loads(text)) if lean else (loads(text), {})
+            assets = {rel: render(a, sort_keys=True) for rel, a in assets.items()}
+            if not split:
+                return render(p), None, assets
+            part, rest = pdp_split.split(p)
+            return render(part), render(rest, sort_keys=True), assets
+
+        for handle, text in self.db.execute(f"SELECT handle, data FROM products WHERE {OWNER} ORDER BY rowid"):
+            text = shape(text)[0]
+            path = out / f"{handle}.json"
+            keep.add(path.name)
+            if read_text(path) == text and not path.is_symlink():
+                unchanged += 1
+            else:
+                write_file(path, text)
+                written += 1
+        # after every <handle>.json is in place: symlink/hardlink aliases point at the final files
+        deferred, assets = set(), set()
+        handle_counts = dict(self.db.execute("SELECT handle, count(*) FROM products GROUP BY handle"))
+        for asin, handle, text in self.db.execute("SELECT asin, handle, data FROM products ORDER BY rowid"):
+            keep.add(f"{asin}.json")
+            text, rest, shared = shape(text)
+            write_alias(out, handle, asin, text, alias, unchanged=read_text(out / f"{asin}.json") == text,
+                        shared=handle_counts[handle] > 1)
+            if rest is not None:
+                path = out / pdp_split.deferred_path({"asin": asin})
+                deferred.add(path.name)
+                if read_text(path) != rest:
+                    path.parent.mkdir(exist_ok=True)
+                    write_file(path, rest)
+            for rel, asset in shared.items():
+                if rel in assets:
+                    continue
+                assets.add(rel)
+                path = out / rel
+                if read_text(path) != asset:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    write_file(path, asset)
+
+        redirects = self.redirects()
+        if redirects:
+            text = dumps(redirects)
+            if read_text(out / REDIRECTS_NAME) != text:
+                write_file(out / REDIRECTS_NAME, text)
+
+        removed = 0
+        if prune:
+            for fn in sorted(os.listdir(out)):
+                if fn.endswith(".json") and not fn.startswith("_") and fn not in SKIP_NAMES and fn not in keep:
+                    os.unlink(out / fn)
+                    removed += 1
+            deferred_dir = out / pdp_split.DEFERRED_DIR
+            if split and deferred_dir.is_dir():
+                for fn in sorted(os.listdir(deferred_dir)):
+                    if fn.endswith(".json") and fn not in deferred:
+                        os.unlink(deferred_dir / fn)
+                        removed += 1
+            assets_dir = out / pdp_lean.ASSETS_DIR
+            if lean and assets_dir.is_dir():
+                for dirpath, _, filenames in os.walk(assets_dir):
+                    for fn in sorted(filenames):
+                        rel = Path(dirpath, fn).relative_to(out).as_posix()
+                        if fn.endswith(".json") and rel not in assets:
+                            os.unlink(out / rel)
+                            removed += 1
+        return written, unchanged, removed
+
+def pop_store(args, default=None):
+    """Removes `--store PATH` from args; returns (args, path or default). Exits 2 when PATH is missing."""
+    if "--store" not in args:
+        return args, default
+    i = args.index("--store")
+    if i + 1 == len(args) or args[i + 1].startswith("--"):
+        print("❌ --store needs a database path: --store DB")
+        raise SystemExit(2)
+    path = args[i + 1]
+    del args[i:i + 2]
+    return args, path
+
+def main(argv):
+    args = list(argv[1:])
+    args, db = pop_store(args, CATALOG_DB)
+    alias = "copy"
+    if "--alias" in args:
+        i = args.index("--alias")
+        alias = args[i + 1] if i + 1 < len(args) else ""
+        del args[i:i + 2]
+    prune = "--prune" in args
+    precompress = "--precompress" in args
+    split = "--split" in args
+    lean = "--lean" in args
+    args = [a for a in args if a not in ("--prune", "--precompress", "--split", "--lean")]
+
+    cmd = args[0] if args else ""
+    products_dir = Path(args[1]) if len(args) > 1 else PRODUCTS_DIR
+    if cmd not in ("import", "export", "stats") or alias not in ALIAS_MODES:
+        print("Usage: catalog_store.py import|export|stats [products_dir] [--store DB]")
+        print("         [--alias copy|symlink|hardlink|redirect] [--prune] [--split] [--lean] [--precompress]")
+        return 2
+
+    with CatalogStore(db) as store:
+        t0 = time.perf_counter()
+        if cmd == "import":
+            corpus, changed = store.import_dir(products_dir)
+            corpus.report()
+            print(f"✅ Imported into {db}: {changed} rows written, {store.count()} products "
+                  f"({time.perf_counter() - t0:.2f}s)")
+        elif cmd == "export":
+            written, unchanged, removed = store.export(products_dir, alias=alias, prune=prune, split=split, lean=lean)
+            print(f"✅ Exported {store.count()} products to {products_dir}: {written + unchanged} handle files "
+                  f"({written} written, {unchanged} unchanged), {removed} pruned ({time.perf_counter() - t0:.2f}s)")
+            if precompress:
+                static_assets.report(static_assets.precompress(products_dir), products_dir)
+        else:
+            print(f"📦 {store.count()} products, {len(store.redirects())} redirects in {db}")
+            for slug, n in store.category_counts().items():
+                print(f"  {n:6d}  {slug or '(none)'}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,50 @@
+"""
+Responsive size variants of Amazon product images.
+
+Amazon serves every size of an /images/I/<key>.<ext> image from the same path: a modifier
+before the extension picks it (._SL<n>_ = longest side n px). v15 stores the gallery at
+._SL1500_ (force_hd_amazon_image_url); a grid card or a colour chip needs a fraction of that.
+
+    record(url)   {"url": url, "key": <amazon_image_key>,
+                   "variants": {"160": ..., "320": ..., "640": ..., "1500": ...}}
+    variant(url, width)   the ._SL<width>_ URL (url itself when it is not an Amazon image)
+    srcset(url)   the variants as an <img srcset> value ("" when there are none)
+
+v15 writes record() for each gallery image as image_records (pdp_lean.py rebuilds them from
+images), swatches at SWATCH_WIDTH, and the cards (_category_index.json, related /
+customer_also_viewed, catalog_build.py cards and listing pages) at CARD_WIDTH plus srcset.
+"""
+import re
+
+WIDTHS = (160, 320, 640, 1500)
+CARD_WIDTH = 320
+SWATCH_WIDTH = 160
+
+_EXT = re.compile(r"\.(jpg|jpeg|png|webp)$", re.I)
+_MODIFIER = re.compile(r"\._[^.]+_\.(jpg|jpeg|png|webp)$", re.I)
+_KEY = re.compile(r"/images/I/([^._/?]+)", re.I)
+
+def has_variants(url):
+    u = str(url or "")
+    return "/images/I/" in u and "?" not in u and bool(_EXT.search(u))
+
+def key(url):
+    """v15's amazon_image_key(): the image id, shared by every size of the image."""
+    u = str(url or "")
+    m = _KEY.search(u)
+    return m.group(1) if m else u
+
+def variant(url, width):
+    if not has_variants(url):
+        return url
+    base = _MODIFIER.sub(r".\1", url)
+    return _EXT.sub(rf"._SL{width}_.\1", base)
+
+def record(url):
+    variants = {str(w): variant(url, w) for w in WIDTHS} if has_variants(url) else {}
+    return {"url": url, "key": key(url), "variants": variants}
+
+def srcset(url, widths=WIDTHS):
+    if not has_variants(url):
+        return ""
+    return ", ".join(f"{variant(url, w)} {w}w" for w in widths)
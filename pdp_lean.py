@@ -0,0 +1,117 @@
+"""
+Lean product schema (amazon_html_to_pdp_json_v15.py --lean, catalog_store.py export --lean).
+
+A full v15 record carries several fields twice. The lean shape drops every copy that can be
+rebuilt exactly and names it in "derived" (field -> source), in rebuild order:
+
+  gallery_images      = images                        (always, today)
+  image_records       = image_variants.record() of each of images
+  aplus_images        = images                        (no A+ media: the gallery stands in)
+  description_images  = aplus_images
+  short_description   = about_this_item
+  long_description    = the "p" blocks of long_description_blocks, joined by blank lines
+
+A field is only dropped when it equals its source, so expand() gives back an equal record.
+A size chart with HTML (the Option B fallback table is the same in every apparel product)
+moves to a content-addressed asset, assets/size_chart/<id>.json, and the record keeps
+variations.size_chart_id; the id is a hash of the chart, so equal charts share one file.
+
+expand(p, load_asset) is the compatibility reader: it returns the old shape and leaves
+records without "derived" untouched. product_corpus.load_corpus() applies it, so index
+builders and scripts keep seeing full records; SingleProduct.tsx does the same client side.
+"""
+import hashlib
+import json
+
+import image_variants
+
+ASSETS_DIR = "assets"
+FROM_BLOCKS = "long_description_blocks"
+
+# field -> source, in rebuild order
+DERIVABLE = [
+    ("gallery_images", "images"),
+    ("image_records", "images"),
+    ("aplus_images", "images"),
+    ("description_images", "aplus_images"),
+    ("short_description", "about_this_item"),
+    ("long_description", FROM_BLOCKS),
+]
+
+def long_description_from_blocks(blocks):
+    """What v15 stores as long_description for these long_description_blocks."""
+    if not isinstance(blocks, list):
+        return ""
+    return "\n\n".join(b.get("text", "") for b in blocks if isinstance(b, dict) and b.get("type") == "p").strip()
+
+def _rebuild(p, field, source):
+    if source == FROM_BLOCKS:
+        return long_description_from_blocks(p.get(FROM_BLOCKS))
+    if field == "image_records":
+        urls = p.get(source)
+        return [image_variants.record(u) for u in urls] if isinstance(urls, list) else None
+    value = p.get(source)
+    return list(value) if isinstance(value, list) else value
+
+def asset_path(kind, asset_id):
+    return f"{ASSETS_DIR}/{kind}/{asset_id}.json"
+
+def asset_id(data):
+    canonical = json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+def lean(p):
+    """(lean record, {asset path: asset data}) for one full product record."""
+    derived = {}
+    for field, source in DERIVABLE:
+        if field in p and source in p and p[field] == _rebuild(p, field, source):
+            derived[field] = source
+    out = {k: v for k, v in p.items() if k not in derived}
+    out["derived"] = derived
+
+    assets = {}
+    var = out.get("variations")
+    chart = var.get("size_chart") if isinstance(var, dict) else None
+    if isinstance(chart, dict) and chart.get("html"):
+        cid = asset_id(chart)
+        assets[asset_path("size_chart", cid)] = chart
+        out["variations"] = {("size_chart_id" if k == "size_chart" else k): (cid if k == "size_chart" else v)
+                             for k, v in var.items()}
+    return out, assets
+
+def is_lean(p):
+    return isinstance(p, dict) and isinstance(p.get("derived"), dict)
+
+def expand(p, load_asset):
+    """
+    The full record for a lean one (other records are returned as is). load_asset(path)
+    returns the asset stored at `path` (relative to the products dir), or None.
+    """
+    if not is_lean(p):
+        return p
+    p = dict(p)
+    derived = p.pop("derived")
+    for field, source in DERIVABLE:
+        if derived.get(field) == source and field not in p:
+            p[field] = _rebuild(p, field, source)
+
+    var = p.get("variations")
+    if isinstance(var, dict) and "size_chart_id" in var:
+        chart = load_asset(asset_path("size_chart", var["size_chart_id"]))
+        p["variations"] = {("size_chart" if k == "size_chart_id" else k): (chart if k == "size_chart_id" else v)
+                           for k, v in var.items()}
+    return p
+
+def asset_loader(products_dir):
+    """load_asset for expand(): reads <products_dir>/<path>, each asset once."""
+    cache = {}
+
+    def load(path):
+        if path not in cache:
+            try:
+                with open(f"{products_dir}/{path}", "r", encoding="utf-8") as f:
+                    cache[path] = json.load(f)
+            except (OSError, ValueError):
+                cache[path] = None
+        return cache[path]
+    return load
@@ -0,0 +1,84 @@
+"""
+Critical / deferred split of a PDP record (amazon_html_to_pdp_json_v15.py --split,
+catalog_store.py export --split).
+
+<handle>.json (and its <ASIN>.json alias) becomes the critical part, what the product hero
+paints from; the rest moves to deferred/<ASIN>.json, which SingleProduct.tsx fetches after
+first render and merges back in:
+
+  critical  id handle sku asin title title_original brand price social_proof bullets specs
+            category category_path category_slug category_leaf about_this_item
+            color_swatches color_image_key
+            images / gallery_images /
+            image_records                  first CRITICAL_IMAGES entries
+            variations                     sizes, colors
+            reviews                        average_rating, count
+            + "deferred": "deferred/<ASIN>.json", "schema": SCHEMA
+  deferred  everything else: the full image lists, aplus_images, description_images,
+            variations.size_chart, reviews.customers_say / items, short_description,
+            long_description(_blocks), videos, color_images, related, customer_also_viewed
+            + "id", "asin", "schema"
+
+merge(critical, deferred) gives back the full record: top-level values from deferred win,
+dicts present in both are merged one level deep. A field not listed above lands in deferred,
+so the critical file only grows on purpose. The deferred file is written with sorted keys;
+its content, not its key order, is the schema.
+"""
+SCHEMA = "pdp-split/1"
+DEFERRED_DIR = "deferred"
+CRITICAL_IMAGES = 4
+
+CRITICAL_FIELDS = {
+    "id", "handle", "sku", "asin", "title", "title_original", "brand", "price", "social_proof",
+    "bullets", "specs", "category", "category_path", "category_slug", "category_leaf",
+    "about_this_item", "color_swatches", "color_image_key",
+}
+# list fields: the first N entries are critical, the full list is deferred
+CRITICAL_PREFIX = {"images": CRITICAL_IMAGES, "gallery_images": CRITICAL_IMAGES, "image_records": CRITICAL_IMAGES}
+# dict fields split key by key
+CRITICAL_SUBFIELDS = {"variations": ("sizes", "colors"), "reviews": ("average_rating", "count")}
+# bookkeeping keys that are not part of the product record
+SPLIT_KEYS = ("deferred", "schema")
+
+def deferred_path(p):
+    """Where p's deferred part lives, relative to the products dir."""
+    return f"{DEFERRED_DIR}/{p['asin']}.json"
+
+def split(p):
+    """(critical, deferred) dicts for one full product record (which needs an asin)."""
+    critical = {}
+    deferred = {"id": p.get("id"), "asin": p["asin"], "schema": SCHEMA}
+    for k, v in p.items():
+        if k in CRITICAL_PREFIX and isinstance(v, list):
+            n = CRITICAL_PREFIX[k]
+            critical[k] = v[:n]
+            if len(v) > n:
+                deferred[k] = v
+        elif k in CRITICAL_SUBFIELDS and isinstance(v, dict):
+            keep = CRITICAL_SUBFIELDS[k]
+            critical[k] = {s: x for s, x in v.items() if s in keep}
+            rest = {s: x for s, x in v.items() if s not in keep}
+            if rest:
+                deferred[k] = rest
+        elif k in CRITICAL_FIELDS:
+            critical[k] = v
+        else:
+            deferred[k] = v
+    critical["deferred"] = deferred_path(p)
+    critical["schema"] = SCHEMA
+    return critical, deferred
+
+def is_split(p):
+    return isinstance(p, dict) and p.get("schema") == SCHEMA and isinstance(p.get("deferred"), str)
+
+def merge(critical, deferred):
+    """The full record back from its two parts."""
+    p = {k: v for k, v in critical.items() if k not in SPLIT_KEYS}
+    for k, v in deferred.items():
+        if k in SPLIT_KEYS:
+            continue
+        if isinstance(v, dict) and isinstance(p.get(k), dict):
+            p[k] = {**p[k], **v}
+        else:
+            p[k] = v
+    return p
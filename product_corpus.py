@@ -0,0 +1,154 @@
+"""
+Shared loader for the generated product JSON directory (static/products, public/products).
+
+amazon_html_to_pdp_json_v15 writes every product twice: <handle>.json plus an ASIN alias
+(a copy, symlink, hardlink or {"redirect": ...} record, see its --alias flag). Scripts that
+walk the directory should see each product once, so load_corpus():
+
+  - skips _underscore index files and search_index.json
+  - reads each physical file once (symlinks/hardlinks resolved before reading), under its
+    <handle>.json name when one of its names is that
+  - reads in a thread pool, parsing with orjson when it is installed
+  - drops redirect records and keeps one record per asin (or id), preferring <handle>.json
+  - merges --split records with their deferred/<ASIN>.json part (pdp_split.merge); a record
+    whose part cannot be read keeps its critical fields and is listed in corpus.partial
+  - re-expands --lean records to the full shape (pdp_lean.expand, shared assets read once)
+  - records every unreadable/broken file in corpus.skipped instead of dropping it silently
+
+    corpus = load_corpus("/Applications/product/public/products")
+    for path, p in corpus.products: ...
+    corpus.report()
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pdp_lean
+import pdp_split
+
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+    import json as _json
+
+SKIP_NAMES = {"search_index.json"}
+
+def loads(raw: bytes):
+    if _orjson is not None:
+        return _orjson.loads(raw)
+    return _json.loads(raw)
+
+class Corpus:
+    def __init__(self, products_dir):
+        self.products_dir = products_dir
+        self.products = []     # [(path, product dict)] in file-name order, one per asin/id
+        self.skipped = []      # [(path, reason)]
+        self.partial = []      # [(path, reason)] --split records missing their deferred part
+        self.aliases = 0       # duplicate copies / links / redirect records dropped
+        self.files = 0         # *.json files considered
+
+    def report(self, label="products", limit=10):
+        print(f"📦 {len(self.products)} {label} from {self.files} files "
+              f"({self.aliases} aliases skipped, {len(self.skipped)} broken)")
+        for path, reason in self.skipped[:limit]:
+            print(f"⚠️  skipped {os.path.basename(path)}: {reason}")
+        if len(self.skipped) > limit:
+            print(f"⚠️  ... and {len(self.skipped) - limit} more")
+        for path, reason in self.partial[:limit]:
+            print(f"⚠️  critical part only {os.path.basename(path)}: {reason}")
+        if len(self.partial) > limit:
+            print(f"⚠️  ... and {len(self.partial) - limit} more")
+
+def _read(path):
+    try:
+        with open(path, "rb") as f:
+            return loads(f.read()), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def _physical_key(path):
+    st = os.stat(path)          # follows symlinks
+    return (st.st_dev, st.st_ino)
+
+def _identity(p):
+    return str(p.get("asin") or p.get("id") or "") or None
+
+def load_corpus(products_dir, workers=None, dedupe=True):
+    corpus = Corpus(products_dir)
+    names = sorted(fn for fn in os.listdir(products_dir)
+                   if fn.endswith(".json") and not fn.startswith("_") and fn not in SKIP_NAMES)
+    corpus.files = len(names)
+
+    groups = {}          # physical file -> its names, in name order
+    for fn in names:
+        path = os.path.join(products_dir, fn)
+        try:
+            key = _physical_key(path)
+        except OSError as e:
+            corpus.skipped.append((path, f"{type(e).__name__}: {e}"))
+            continue
+        groups.setdefault(key if dedupe else path, []).append(path)
+    corpus.aliases += sum(len(g) - 1 for g in groups.values())
+
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        results = list(ex.map(_read, [g[0] for g in groups.values()]))
+
+    paths = []
+    for group, (data, _) in zip(groups.values(), results):
+        path = group[0]
+        if len(group) > 1 and isinstance(data, dict):
+            # a symlink / hardlink alias and its target: keep the name the record is served
+            # under (<handle>.json), not whichever sorts first (uppercase ASINs do)
+            handle = str(data.get("id") or data.get("handle") or "")
+            path = next((q for q in group if os.path.basename(q)[:-5] == handle), path)
+        paths.append(path)
+
+    by_identity = {}     # asin/id -> position in corpus.products
+    for path, (data, err) in zip(paths, results):
+        if err:
+            corpus.skipped.append((path, err))
+            continue
+        if isinstance(data, dict):
+            items = [data]
+        elif isinstance(data, list):
+            items = [x for x in data if isinstance(x, dict)]
+        else:
+            corpus.skipped.append((path, f"unexpected JSON {type(data).__name__}"))
+            continue
+
+        stem = os.path.basename(path)[:-5]
+        for p in items:
+            if dedupe and p.get("redirect"):
+                corpus.aliases += 1
+                continue
+            ident = _identity(p) if dedupe else None
+            if ident is None:
+                corpus.products.append((path, p))
+                continue
+            pos = by_identity.get(ident)
+            if pos is None:
+                by_identity[ident] = len(corpus.products)
+                corpus.products.append((path, p))
+            else:
+                corpus.aliases += 1
+                # the handle file wins over the ASIN alias copy
+                if stem == str(p.get("id") or p.get("handle") or ""):
+                    corpus.products[pos] = (path, p)
+
+    # --split: the rest of each kept record is in deferred/<ASIN>.json
+    split_at = [i for i, (_, p) in enumerate(corpus.products) if pdp_split.is_split(p)]
+    if split_at:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_read, [os.path.join(products_dir, corpus.products[i][1]["deferred"])
+                                        for i in split_at]))
+        for i, (rest, err) in zip(split_at, parts):
+            path, p = corpus.products[i]
+            if err or not isinstance(rest, dict) or rest.get("asin") != p.get("asin"):
+                corpus.partial.append((path, err or "deferred part does not match"))
+                continue
+            corpus.products[i] = (path, pdp_split.merge(p, rest))
+
+    load_asset = pdp_lean.asset_loader(products_dir)
+    corpus.products = [(path, pdp_lean.expand(p, load_asset)) for path, p in corpus.products]
+    return corpus
@@ -0,0 +1,73 @@
+"""
+Writers for the static products dir, shared by amazon_html_to_pdp_json_v15.py and
+catalog_store.py export so both lay out <handle>.json and its <ASIN>.json alias the same way.
+
+    write_file(path, text)      temp file + rename
+    write_alias(out_dir, handle, asin, text, mode, unchanged=False, shared=False)
+        <ASIN>.json in one of ALIAS_MODES:
+          copy     - full duplicate (default; works on any static host)
+          symlink  - relative symlink to <handle>.json
+          hardlink - second name for the same inode (no extra disk)
+          redirect - tiny {"redirect": handle} record the frontend follows
+
+symlink and redirect resolve to whatever <handle>.json holds later, so they are only used
+when that file is this product's: when the handle is `shared` with another product, or the
+handle file holds other text, the alias is a copy instead. A hardlink keeps the inode it
+was made from, so it is always this product's record.
+"""
+import json
+import os
+from pathlib import Path
+
+ALIAS_MODES = ["copy", "symlink", "hardlink", "redirect"]
+
+def write_file(path: Path, text: str):
+    """Temp file + rename: readers never see a torn file, and a hardlinked alias is never written through."""
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+def read_text(path: Path):
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+def redirect_record(handle, asin):
+    return {"redirect": handle, "id": handle, "asin": asin}
+
+def write_alias(out_dir: Path, handle, asin, text, mode, unchanged=False, shared=False):
+    """
+    <ASIN>.json for the product whose text is `text` and whose canonical file is
+    <handle>.json. `unchanged` says the existing alias file already holds `text`.
+    """
+    alias = out_dir / f"{asin}.json"
+    target = out_dir / f"{handle}.json"
+    if alias == target:
+        return
+    if mode in ("symlink", "redirect") and (shared or read_text(target) != text):
+        mode = "copy"
+    if mode == "symlink":
+        if alias.is_symlink() and os.readlink(alias) == target.name:
+            return
+        if alias.exists() or alias.is_symlink():
+            alias.unlink()
+        os.symlink(target.name, alias)
+    elif mode == "hardlink":
+        if alias.exists() and not alias.is_symlink() and os.path.samefile(alias, target):
+            return
+        if alias.exists() or alias.is_symlink():
+            alias.unlink()
+        os.link(target, alias)
+    elif mode == "redirect":
+        rec = json.dumps(redirect_record(handle, asin), indent=2, ensure_ascii=False)
+        if alias.is_symlink() or read_text(alias) != rec:
+            if alias.is_symlink():
+                alias.unlink()
+            write_file(alias, rec)
+    else:
+        if unchanged and alias.exists() and not alias.is_symlink():
+            return
+        if alias.is_symlink():
+            alias.unlink()
+        write_file(alias, text)
@@ -1,6 +1,11 @@
 import json
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from taxonomy import load_taxonomy
+
 PRODUCTS_DIR = Path("/Applications/product/public/products")
 INDEX_PATH = PRODUCTS_DIR / "_category_index_normalized.json"
 
@@ -11,72 +16,8 @@ for k in index:
     index[k] = []
 
 def categories_for_product(slug: str):
-    s = slug.lower()
-    cats = set()
-
-    # ---------- DRESSES ----------
-    if "dress" in s:
-        cats.add("women-clothing-dresses")
-
-        if "maxi" in s:
-            cats.add("clothing-dresses-casual")
-        if "cocktail" in s:
-            cats.add("clothing-dresses-cocktail")
-        if "formal" in s or "evening" in s:
-            cats.add("clothing-dresses-formal")
-        if "work" in s or "office" in s:
-            cats.add("clothing-dresses-work")
-        if "wedding" in s or "bridal" in s:
-            cats.add("clothing-dresses-wedding-dresses")
-
-    # ---------- SWEATERS ----------
-    if "sweater" in s or "pullover" in s or "cardigan" in s:
-        cats.add("women-clothing-sweaters")
-        if "cardigan" in s:
-            cats.add("clothing-sweaters-cardigans")
-        if "pullover" in s:
-            cats.add("clothing-sweaters-pullovers")
-        if "vest" in s:
-            cats.add("clothing-sweaters-vests")
-
-    # ---------- LINGERIE / SLEEP ----------
-    if any(x in s for x in ["lingerie", "sleep", "nightgown", "robe", "pajama"]):
-        cats.add("lingerie-sleep-lounge-lingerie-lingerie-sets")
-
-        if "nightgown" in s or "sleepdress" in s:
-            cats.add("lingerie-sleep-lounge-sleep-lounge-nightgowns-sleepshirts")
-        if "robe" in s:
-            cats.add("lingerie-sleep-lounge-sleep-lounge-robes")
-        if "set" in s:
-            cats.add("lingerie-sleep-lounge-sleep-lounge-sets")
-
-    # ---------- BRAS ----------
-    if "bra" in s:
-        cats.add("lingerie-bras-everyday-bras")
-        if "sports" in s:
-            cats.add("lingerie-bras-sports-bras")
-
-    # ---------- PANTIES ----------
-    if any(x in s for x in ["panty", "brief", "thong", "bikini"]):
-        cats.add("lingerie-panties-briefs")
-        if "thong" in s:
-            cats.add("lingerie-panties-g-strings-thongs")
-        if "bikini" in s:
-            cats.add("lingerie-panties-bikinis")
-        if "boyshort" in s:
-            cats.add("lingerie-panties-boy-shorts")
-
-    # ---------- OUTERWEAR ----------
-    if "jacket" in s or "coat" in s:
-        cats.add("clothing-coats-jackets-vests-casual-jackets")
-        if "fleece" in s:
-            cats.add("women-jackets-fleece-jackets")
-        if "fur" in s:
-            cats.add("clothing-coats-jackets-vests-fur-faux-fur")
-        if "pea" in s or "wool" in s:
-            cats.add("clothing-coats-jackets-vests-wool-pea-coats")
-
-    return cats
+    # "slug" set in taxonomy_rules.json
+    return set(load_taxonomy("slug").match_all(slug))
 
 # populate
 for p in PRODUCTS_DIR.glob("*.json"):
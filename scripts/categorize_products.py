@@ -1,8 +1,16 @@
 import json
+import os
 import re
+import sys
 from pathlib import Path
 from collections import Counter
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_store import CatalogStore, pop_store
+from product_files import write_file
+from taxonomy import load_taxonomy
+
 PRODUCTS_DIR = Path("/Applications/product/static/products")
 
 # ---------- helpers ----------
@@ -14,47 +22,35 @@ def read_json(p: Path):
     return json.loads(p.read_text(encoding="utf-8", errors="ignore"))
 
 def write_json(p: Path, data):
-    p.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
-
-def has_keywords(text: str, keywords):
-    t = text.lower()
-    return any(k in t for k in keywords)
-
-# ---------- taxonomy rules ----------
-# IMPORTANT:
-# - Rules are evaluated TOP → BOTTOM
-# - Most specific MUST come first
-# - Catch-all MUST be last
-
-TAXONOMY = [
-    {
-        "path": ["Women", "Dresses", "Maxi Dresses"],
-        "keywords": ["maxi dress"]
-    },
-    {
-        "path": ["Women", "Dresses", "Bodycon Dresses"],
-        "keywords": ["bodycon"]
-    },
-    {
-        "path": ["Women", "Dresses", "Evening Dresses"],
-        "keywords": ["evening", "formal", "gown"]
-    },
-    {
-        "path": ["Women", "Dresses", "Sweater Dresses"],
-        "keywords": ["sweater dress", "knit dress"]
-    },
-    {
-        "path": ["Women", "Dresses", "Mini Dresses"],
-        "keywords": ["mini dress"]
-    },
-    {
-        # catch-all (KEEP LAST)
-        "path": ["Women", "Dresses"],
-        "keywords": ["dress"]
-    },
-]
+    """product_files.write_file (temp file + rename): readers never see a half-written product."""
+    write_file(p, json.dumps(data, indent=2, ensure_ascii=False))
+
+def is_alias_copy(path: Path, data: dict) -> bool:
+    """A copy / hardlink <ASIN>.json alias (v15 --alias): named after the asin, handle elsewhere."""
+    return path.stem == data.get("asin") and (data.get("handle") or path.stem) != path.stem
+
+def write_product(path: Path, data):
+    """
+    write_json(), then bring the product's <ASIN>.json copy / hardlink alias along: a
+    hardlink is relinked to the new file (it would keep the old inode), a copy rewritten.
+    """
+    alias = PRODUCTS_DIR / f"{data.get('asin')}.json"
+    if not data.get("asin") or alias == path or alias.is_symlink() or not alias.exists():
+        write_json(path, data)
+        return
+    linked = os.path.samefile(alias, path)
+    copy = not linked and is_alias_copy(alias, read_json(alias))
+    write_json(path, data)
+    if linked:
+        tmp = alias.with_name(f".{alias.name}.tmp")
+        os.link(path, tmp)
+        os.replace(tmp, alias)
+    elif copy:
+        write_json(alias, data)
 
 # ---------- categorization ----------
+# Rules: "product_path" set in taxonomy_rules.json (evaluated top -> bottom, first match wins,
+# catch-all last; falls back to Women > Uncategorized).
 
 def categorize(product: dict):
     title = product.get("title", "")
@@ -64,48 +60,90 @@ def categorize(product: dict):
     # We deliberately DO NOT trust Amazon breadcrumbs
     text = " ".join([title, slug])
 
-    for rule in TAXONOMY:
-        if has_keywords(text, rule["keywords"]):
-            path = rule["path"]
-            return {
-                "category": " > ".join(path),
-                "category_slug": slugify("-".join(path)),
-                "category_path": path,
-            }
-
-    # fallback
+    path = load_taxonomy("product_path").match_first(text)
     return {
-        "category": "Women > Uncategorized",
-        "category_slug": "women-uncategorized",
-        "category_path": ["Women", "Uncategorized"],
+        "category": " > ".join(path),
+        "category_slug": slugify("-".join(path)),
+        "category_path": path,
     }
 
 # ---------- main ----------
 
-def main():
-    updated = 0
-    counts = Counter()
-
+def dir_products():
+    """
+    (path, product) once per product. <ASIN>.json aliases (v15 --alias) are left out in every
+    mode; write_product() updates copies and hardlinks with their product. An alias is only
+    read as the product when <handle>.json holds another one (a shared handle).
+    """
+    seen, copies = set(), []
     for path in PRODUCTS_DIR.glob("*.json"):
         if path.name.startswith("_"):
             continue
+        # symlinked ASIN aliases follow their target
+        if path.is_symlink():
+            continue
 
         data = read_json(path)
+        # {"redirect": handle} alias records carry no product fields
+        if not isinstance(data, dict) or data.get("redirect"):
+            continue
+        if is_alias_copy(path, data):
+            copies.append(path)
+            continue
+        seen.add(data.get("asin"))
+        yield path, data
 
-        cat = categorize(data)
-        data.update(cat)
+    for path in copies:
+        data = read_json(path)
+        if data.get("asin") not in seen:
+            yield path, data
 
-        write_json(path, data)
+def main(dry_run=False, store=None):
+    """store: catalog_store DB; moved products become row updates in one transaction (then run its export)."""
+    updated = 0
+    unchanged = 0
+    counts = Counter()
+    moves = Counter()
+
+    catalog = CatalogStore(store) if store else None
+    source = ((h, p) for _, h, p in catalog.products()) if catalog else dir_products()
+    changed = []
 
+    for path, data in source:
+        cat = categorize(data)
         counts[cat["category"]] += 1
+
+        if all(data.get(k) == v for k, v in cat.items()):
+            unchanged += 1
+            continue
+
+        moves[(data.get("category") or "(none)", cat["category"])] += 1
         updated += 1
+        if not dry_run:
+            data.update(cat)
+            if catalog:
+                changed.append((path, data))
+            else:
+                write_product(path, data)
 
-    print(f"✅ Categorized {updated} products\n")
+    if catalog:
+        if changed:
+            catalog.put_many(changed, batch=len(changed))
+        catalog.close()
+
+    verb = "Would update" if dry_run else "Categorized"
+    print(f"✅ {verb} {updated} products ({unchanged} unchanged)\n")
 
     print("Category breakdown:")
     for k, v in counts.most_common():
         print(f"  {k}: {v}")
 
+    if moves:
+        print("\nCategory moves:")
+        for (old, new), v in moves.most_common():
+            print(f"  {v:6d}  {old}  ->  {new}")
+
 if __name__ == "__main__":
-    main()
+    args, store = pop_store(sys.argv[1:])
+    main(dry_run="--dry-run" in args, store=store)
 
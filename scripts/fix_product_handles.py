@@ -1,9 +1,29 @@
 import json
+import os
 import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_store import CatalogStore, pop_store
+from product_files import write_file
+
 PRODUCTS_DIR = Path("/Applications/product/static/products")
 
+# Two phases, so a crash never leaves duplicates/orphans behind:
+#   plan   - scan title/asin one file at a time, stream the rename plan to PLAN_FILE
+#   apply  - replay the plan entry by entry; each finished entry is appended to
+#            JOURNAL_FILE, so a rerun resumes where the last one stopped
+# Running without arguments does both. apply also writes REDIRECTS_FILE (old -> new handle)
+# for the frontend.
+# With --store DB the products live in the catalog store (catalog_store.py): the renames are
+# row updates plus redirects rows in one transaction, so there is no plan/journal to resume;
+# its export step writes the renamed files and REDIRECTS_FILE.
+PLAN_FILE = PRODUCTS_DIR / "_handle_plan.jsonl"
+JOURNAL_FILE = PRODUCTS_DIR / "_handle_journal.jsonl"
+REDIRECTS_FILE = PRODUCTS_DIR / "_handle_redirects.json"
+
 def slugify(text: str) -> str:
     text = text.lower()
     text = re.sub(r"[^a-z0-9]+", "-", text)
@@ -13,26 +33,36 @@ def read_json(p: Path):
     return json.loads(p.read_text(encoding="utf-8", errors="ignore"))
 
 def write_json(p: Path, data):
-    p.write_text(
-        json.dumps(data, indent=2, ensure_ascii=False),
-        encoding="utf-8"
-    )
-
-def main():
-    seen_slugs = set()
-    rename_map = {}
-
-    products = []
-    for path in PRODUCTS_DIR.glob("*.json"):
-        if path.name.startswith("_"):
-            continue
+    """product_files.write_file (temp file + rename), so a crash never leaves a truncated product."""
+    write_file(p, json.dumps(data, indent=2, ensure_ascii=False))
+
+def is_alias(path: Path, data: dict) -> bool:
+    """
+    An <ASIN>.json alias written by v15 --alias: a {"redirect": handle} record, or a copy /
+    hardlink whose handle is not its filename. Symlinked aliases are skipped before reading.
+    """
+    if data.get("redirect"):
+        return True
+    return path.stem == data.get("asin") and (data.get("handle") or path.stem) != path.stem
+
+def scan_title_asin(path: Path):
+    """(title, asin) of one product, ("", "") for an alias; the decoded document is dropped right away."""
+    try:
         data = read_json(path)
-        products.append((path, data))
-
-    for path, data in products:
-        title = (data.get("title") or "").strip()
-        asin = (data.get("asin") or "").strip()
-
+    except Exception as e:
+        print(f"⚠️  skipped {path.name}: {type(e).__name__}: {e}")
+        return "", ""
+    if not isinstance(data, dict) or is_alias(path, data):
+        return "", ""
+    return (data.get("title") or "").strip(), (data.get("asin") or "").strip()
+
+def assign_handles(items, taken):
+    """
+    (name, title, asin) in name order -> (name, asin, new handle). `taken` holds the names that
+    exist, or will exist once the earlier renames are applied.
+    """
+    seen_slugs = set()
+    for name, title, asin in items:
         if not title or not asin:
             continue
 
@@ -43,34 +73,178 @@ def main():
         if slug in seen_slugs:
             slug = f"{base_slug}-{asin.lower()}"
 
-        seen_slugs.add(slug)
-
-        # Update internal fields
-        data["handle"] = slug
-        data["slug"] = slug
-
-        new_path = PRODUCTS_DIR / f"{slug}.json"
-
         # Extra safety: never overwrite another product
-        if new_path.exists() and new_path != path:
+        if slug in taken and slug != name:
             slug = f"{base_slug}-{asin.lower()}"
-            data["handle"] = slug
-            data["slug"] = slug
-            new_path = PRODUCTS_DIR / f"{slug}.json"
-
-        write_json(new_path, data)
-
-        if new_path != path:
-            rename_map[path] = new_path
 
-    # Remove old filenames after successful writes
-    for old_path, new_path in rename_map.items():
-        if old_path.exists():
-            old_path.unlink()
-            print(f"✅ {old_path.name} → {new_path.name}")
+        # the slug actually given out, so a product already at its base slug keeps it on a rerun
+        seen_slugs.add(slug)
+        taken.add(slug)
+        yield name, asin, slug
 
-    print(f"\n✅ Processed {len(products)} products")
-    print(f"✅ Renamed {len(rename_map)} files (collision-safe)")
+def scan_dir():
+    for path in sorted(PRODUCTS_DIR.glob("*.json")):
+        if path.name.startswith("_"):
+            continue
+        # symlinked ASIN aliases follow their target
+        if path.is_symlink():
+            continue
+        yield (path.stem, *scan_title_asin(path))
+
+def plan():
+    taken = {p.stem for p in PRODUCTS_DIR.glob("*.json")}
+
+    planned = renames = 0
+    with open(PLAN_FILE, "w", encoding="utf-8") as out:
+        for stem, asin, slug in assign_handles(scan_dir(), taken):
+            out.write(json.dumps({"i": planned, "src": f"{stem}.json", "dst": f"{slug}.json", "handle": slug,
+                                  "asin": asin}) + "\n")
+            planned += 1
+            renames += slug != stem
+
+    print(f"✅ Planned {planned} products, {renames} renames → {PLAN_FILE.name}")
+
+def read_jsonl(p: Path):
+    if not p.exists():
+        return
+    with open(p, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # torn last line from a crash mid-append: that entry simply reruns
+                    continue
+
+def refresh_alias(asin: str, src: Path, dst: Path, data: dict):
+    """
+    Move the product's <ASIN>.json alias (v15 --alias) from src to its new file dst, in the
+    alias's own mode, so /products/<ASIN>.json keeps resolving. Call before src is removed.
+    """
+    alias = PRODUCTS_DIR / f"{asin}.json"
+    if not asin or alias in (src, dst):
+        return
+    tmp = alias.with_name(f".{alias.name}.tmp")
+    if alias.is_symlink():
+        if os.readlink(alias) != src.name:
+            return
+        os.symlink(dst.name, tmp)
+        os.replace(tmp, alias)
+    elif alias.exists():
+        if os.path.samefile(alias, src):
+            os.link(dst, tmp)
+            os.replace(tmp, alias)
+            return
+        rec = read_json(alias)
+        if not isinstance(rec, dict) or rec.get("asin") != asin:
+            return
+        if rec.get("redirect"):
+            if rec["redirect"] == src.stem:
+                write_json(alias, {**rec, "redirect": data["handle"], "id": data["handle"]})
+        elif rec.get("handle") == src.stem:
+            write_json(alias, data)
+
+def apply():
+    if not PLAN_FILE.exists():
+        print(f"❌ No plan at {PLAN_FILE}; run: fix_product_handles.py plan")
+        return 1
+
+    done = {e["i"] for e in read_jsonl(JOURNAL_FILE)}
+    if done:
+        print(f"↩️  Resuming: {len(done)} entries already applied")
+
+    processed = renamed = 0
+    with open(JOURNAL_FILE, "a", encoding="utf-8") as journal:
+        for entry in read_jsonl(PLAN_FILE):
+            if entry["i"] in done:
+                continue
+            src = PRODUCTS_DIR / entry["src"]
+            dst = PRODUCTS_DIR / entry["dst"]
+
+            if src.exists():
+                data = read_json(src)
+                # Update internal fields
+                data["id"] = entry["handle"]
+                data["handle"] = entry["handle"]
+                data["slug"] = entry["handle"]
+                write_json(dst, data)
+                if dst != src:
+                    refresh_alias(entry.get("asin", ""), src, dst, data)
+                    # Remove the old filename only once the new file is in place
+                    src.unlink()
+                    print(f"✅ {src.name} → {dst.name}")
+                    renamed += 1
+            elif not dst.exists():
+                print(f"⚠️  {entry['src']} is gone and {entry['dst']} was never written; skipped")
+
+            journal.write(json.dumps({"i": entry["i"]}) + "\n")
+            journal.flush()
+            processed += 1
+
+    # merge with earlier migrations; chains (a -> b, now b -> c) collapse to a -> c
+    redirects = read_json(REDIRECTS_FILE) if REDIRECTS_FILE.exists() else {}
+    moved = {}
+    for entry in read_jsonl(PLAN_FILE):
+        if entry["src"] != entry["dst"]:
+            moved[entry["src"][:-5]] = entry["dst"][:-5]
+    redirects = {old: moved.get(new, new) for old, new in redirects.items()}
+    redirects.update(moved)
+    redirects = {old: new for old, new in redirects.items() if old != new}
+    write_json(REDIRECTS_FILE, redirects)
+
+    # the whole plan is applied: retire it so a later run starts from a fresh scan
+    PLAN_FILE.unlink()
+    JOURNAL_FILE.unlink()
+
+    print(f"\n✅ Processed {processed} products")
+    print(f"✅ Renamed {renamed} files (collision-safe)")
+    print(f"✅ {len(redirects)} redirects → {REDIRECTS_FILE.name}")
+    return 0
+
+def fix_store(db):
+    """Plan + apply against the catalog store: one row per product, all renames in one transaction."""
+    with CatalogStore(db) as store:
+        rows = store.db.execute(
+            "SELECT handle, json_extract(data, '$.title'), asin FROM products ORDER BY handle || '.json', asin").fetchall()
+        items = [(handle, title.strip() if isinstance(title, str) else "", asin) for handle, title, asin in rows]
+
+        updates = []
+        for handle, asin, slug in assign_handles(items, {handle for handle, _, _ in rows}):
+            data = store.get(asin)
+            if handle == slug and all(data.get(k) == slug for k in ("id", "handle", "slug")):
+                continue
+            data["id"] = slug
+            data["handle"] = slug
+            data["slug"] = slug
+            updates.append((asin, slug, data))
+        renamed = store.rename_many(updates)
+        redirects = store.redirects()
+
+    print(f"✅ Updated {len(updates)} products, {renamed} renamed (collision-safe)")
+    print(f"✅ {len(redirects)} redirects in {db}; publish with: catalog_store.py export --prune")
+    return 0
+
+def main(argv):
+    argv, store = pop_store(list(argv))
+    cmd = argv[1] if len(argv) > 1 else ""
+    if store:
+        if cmd:
+            print("Usage: fix_product_handles.py [plan|apply] | --store DB")
+            return 2
+        return fix_store(store)
+    if cmd == "plan":
+        plan()
+        return 0
+    if cmd == "apply":
+        return apply()
+    if cmd:
+        print("Usage: fix_product_handles.py [plan|apply] | --store DB")
+        return 2
+    # no argument: resume an interrupted apply, otherwise plan + apply
+    if not PLAN_FILE.exists():
+        plan()
+    return apply()
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main(sys.argv))
@@ -3,6 +3,7 @@ import {
   RouterProvider,
   createBrowserRouter,
   useParams,
+  useNavigate,
   Navigate,
 } from "react-router-dom";
 
@@ -29,8 +30,31 @@ import * as PdpContext from "./pdp/ProductPdpContext";
    PDP ROUTE WRAPPER (UNCHANGED BEHAVIOR)
    ================================================= */
 
+// Handles renamed by scripts/fix_product_handles.py: _handle_redirects.json maps
+// old handle -> new handle (chains already collapsed). null when `id` was not renamed.
+async function fetchHandleRedirect(id: string): Promise<string | null> {
+  try {
+    const res = await fetch(`/products/_handle_redirects.json`, {
+      cache: "no-cache",
+    });
+    const ct = res.headers.get("content-type") || "";
+    if (!res.ok || !ct.includes("application/json")) return null;
+    const moved = (await res.json())?.[id];
+    return typeof moved === "string" && moved && moved !== id ? moved : null;
+  } catch {
+    return null;
+  }
+}
+
+// Same route, last path segment swapped for `id`
+function productPath(id: string): string {
+  const { pathname, search, hash } = window.location;
+  return pathname.replace(/[^/]*$/, encodeURIComponent(id)) + search + hash;
+}
+
 function ProductRoute({ children }: { children: React.ReactNode }) {
   const { id } = useParams();
+  const navigate = useNavigate();
 
   const ProductPdpProvider =
     (PdpContext as any).ProductPdpProvider ??
@@ -53,11 +77,20 @@ function ProductRoute({ children }: { children: React.ReactNode }) {
         }
 
         const res = await fetch(`/products/${id}.json`, {
-          cache: "no-store",
+          cache: "no-cache",
         });
 
         const ct = res.headers.get("content-type") || "";
 
+        // missing file (404, or Vite's HTML fallback): the handle may have been renamed
+        if (res.status === 404 || (res.ok && !ct.includes("application/json"))) {
+          const moved = await fetchHandleRedirect(id);
+          if (moved) {
+            if (!cancelled) navigate(productPath(moved), { replace: true });
+            return;
+          }
+        }
+
         if (!res.ok) {
           throw new Error(
             `HTTP ${res.status} when fetching /products/${id}.json`
@@ -86,7 +119,7 @@ function ProductRoute({ children }: { children: React.ReactNode }) {
     return () => {
       cancelled = true;
     };
-  }, [id]);
+  }, [id, navigate]);
 
   if (!ProductPdpProvider) {
     return (
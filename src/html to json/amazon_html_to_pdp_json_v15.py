@@ -1,17 +1,49 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import bisect
+import contextlib
+import functools
+import gzip
+import hashlib
 import html as _html
+import importlib
 import json
 import math
+import multiprocessing
+import os
 import random
 import re
+import signal
 import sys
-from dataclasses import dataclass
+import tarfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
+from bs4.element import Script, Stylesheet
+
+try:
+  import zstandard as _zstd   # only needed for .zst / .tar.zst inputs
+except ImportError:
+  _zstd = None
+
+# Helper modules shared with the repo-root scripts, imported on first use; later calls are a
+# sys.modules lookup. Their source is part of parser_version() (image_variants, pdp_lean and
+# pdp_split build parts of the records), so editing one invalidates --incremental entries.
+REPO_ROOT = Path(__file__).resolve().parents[2]
+ROOT_MODULES = ("image_variants", "pdp_lean", "pdp_split", "catalog_store", "static_assets", "product_files")
+
+def root_module(name: str):
+  mod = sys.modules.get(name)
+  if mod is None:
+    if str(REPO_ROOT) not in sys.path:
+      sys.path.insert(0, str(REPO_ROOT))
+    mod = importlib.import_module(name)
+  return mod
 
 
 # -----------------------------
@@ -182,51 +214,403 @@ def is_relevant_product_image(url: str) -> bool:
   return True
 
 
+# -----------------------------
+# Extraction budgets (--budget)
+# -----------------------------
+# One malformed or giant page must not hold a worker for minutes. With --budget the optional
+# extractors run under a wall-clock budget per stage (SIGALRM, so wherever setitimer exists
+# and the call is on the main thread -- pool workers are); a stage over budget is abandoned
+# and its field gets the value a page without that block gets. Once a page has used page_s, the
+# remaining budgeted stages are skipped outright. Size budgets cap the DOM parser input
+# and the text the customers-say regexes see. Every skip is recorded per file in
+# OUT_DIR/_extract_metrics.json. Without --budget every page is parsed in full and no
+# metrics file is written.
+@dataclass
+class Budget:
+  stage_s: float = 10.0     # wall time per budgeted stage
+  page_s: float = 60.0      # wall time per page, after which budgeted stages are skipped
+  dom_mb: float = 8.0       # slimmed html past this is cut before the DOM parse
+  text_kb: int = 64         # customers-say text past this is cut before the regexes
+
+class BudgetExceeded(BaseException):
+  """Raised by the stage timer. BaseException, so extractors' `except Exception` can't swallow it."""
+
+@dataclass
+class PageRun:
+  """Budget state of the page being parsed."""
+  budget: Budget
+  t0: float
+  skipped: Dict[str,str] = field(default_factory=dict)   # stage -> reason
+
+  def skip(self, label: str, reason: str) -> None:
+    self.skipped[label] = reason
+
+_CAN_INTERRUPT = hasattr(signal, "setitimer")
+_alarm_armed = False
+
+def _on_alarm(signum, frame):
+  if _alarm_armed:
+    raise BudgetExceeded()
+
+def budgeted(run: Optional[PageRun], label: str, default: Any, fn, *args):
+  """fn(*args) within the page's budget, `default` if it was skipped or abandoned."""
+  global _alarm_armed
+  if run is None:
+    return fn(*args)
+  left = run.budget.page_s - (time.perf_counter() - run.t0)
+  if left <= 0:
+    run.skip(label, "page budget spent")
+    return default
+  limit = min(run.budget.stage_s, left)
+  if not (_CAN_INTERRUPT and threading.current_thread() is threading.main_thread()):
+    # can't interrupt here: run to completion and record the overrun
+    t0 = time.perf_counter()
+    out = fn(*args)
+    if time.perf_counter() - t0 > limit:
+      run.skip(label, f"overran {limit:g}s (not interruptible)")
+    return out
+  prev = signal.signal(signal.SIGALRM, _on_alarm)
+  try:
+    _alarm_armed = True
+    signal.setitimer(signal.ITIMER_REAL, limit)
+    out = fn(*args)
+    _alarm_armed = False
+    return out
+  except BudgetExceeded:
+    run.skip(label, f"over {limit:g}s")
+    return default
+  finally:
+    _alarm_armed = False
+    signal.setitimer(signal.ITIMER_REAL, 0)
+    signal.signal(signal.SIGALRM, prev)
+
+def parse_budget(args: List[str]) -> Tuple[List[str], Optional[Budget]]:
+  """
+  --budget on (the Budget defaults) or --budget stage_s=5,page_s=30,dom_mb=4,text_kb=32
+  (unset keys keep the defaults). None, no budget, without the flag or with --budget off.
+  """
+  args, val = pop_opt(args, "--budget")
+  if val is None or val.strip() == "off":
+    return args, None
+  budget = Budget()
+  if val.strip() == "on":
+    return args, budget
+  for part in val.split(","):
+    key, _, num = part.partition("=")
+    key = key.strip()
+    if key not in Budget.__dataclass_fields__:
+      raise ValueError(f"unknown budget {key!r} (choose from {', '.join(Budget.__dataclass_fields__)})")
+    setattr(budget, key, type(getattr(budget, key))(num))
+  return args, budget
+
+# -----------------------------
+# Pre-parse slimming
+# -----------------------------
+# Saved pages are mostly inline <script>/<style> plus nav/footer chrome, none of which a
+# DOM extractor reads (the raw-text blobs come from scan_page_scripts() over the full
+# text). Before the DOM parse, script/style bodies are emptied -- the tags and their
+# attributes stay, so the tree keeps the same elements in the same order -- and the
+# SLIM_REGION_IDS elements are cut whole. The only extractor that serializes markup is
+# extract_size_chart(); it goes through PageContext.restored(), which puts the cut bodies
+# back, so the output is identical to parsing the full page.
+SLIM_REGION_IDS = ["navbar", "nav-main", "navFooter"]
+
+_SLIM_CDATA_OPEN = re.compile(r"<(?:!--.*?-->|(script|style)(?=[\s/>])(?:[^>\"']|\"[^\"]*\"|'[^']*')*>)", re.I | re.S)
+# same end-of-CDATA rule as html.parser
+_SLIM_CDATA_CLOSE = {"script": re.compile(r"</\s*script\s*>", re.I), "style": re.compile(r"</\s*style\s*>", re.I)}
+_SLIM_TAG = re.compile(r"<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9-]*)(?:[^>\"']|\"[^\"]*\"|'[^']*')*>", re.S)
+
+@dataclass
+class SlimPage:
+  html: str            # what the DOM parser sees
+  bodies: List[str]    # cut script/style bodies, one per script/style tag left in html, in order
+
+def _element_end(text: str, start: int, name: str) -> int:
+  """End offset of the element whose start tag is at `start` (-1 if it never closes)."""
+  depth = 0
+  for m in _SLIM_TAG.finditer(text, start):
+    tag = m.group(2)
+    if tag is None or tag.lower() != name:
+      continue
+    if m.group(1):
+      depth -= 1
+      if depth == 0:
+        return m.end()
+    elif not m.group(0).endswith("/>"):
+      depth += 1
+  return -1
+
+def slim_html(html: str) -> SlimPage:
+  # 1) empty script/style bodies; comments are matched (and kept) so a "<script" inside
+  #    one is not mistaken for a tag
+  parts: List[str] = []
+  bodies: List[str] = []
+  tag_at: List[int] = []   # offset of each kept script/style start tag in the joined text
+  size = last = i = 0
+  while True:
+    m = _SLIM_CDATA_OPEN.search(html, i)
+    if not m:
+      break
+    i = m.end()
+    if m.group(1) is None or m.group(0).endswith("/>"):
+      continue
+    close = _SLIM_CDATA_CLOSE[m.group(1).lower()].search(html, i)
+    if not close:
+      break   # unterminated: the parser treats the rest as script text, leave it alone
+    chunk = html[last:i]
+    tag_at.append(size + m.start() - last)
+    parts.append(chunk); size += len(chunk)
+    bodies.append(html[i:close.start()])
+    last = i = close.start()
+  parts.append(html[last:])
+  text = "".join(parts)
+
+  # 2) cut known chrome regions (not inside comments; unbalanced ones are kept)
+  spans: List[Tuple[int,int]] = []
+  for needle in [f'id={q}{rid}{q}' for rid in SLIM_REGION_IDS for q in "\"'"]:
+    j = text.find(needle)
+    while j != -1:
+      a = text.rfind("<", 0, j)
+      m = _SLIM_TAG.match(text, a) if a != -1 and text[j - 1].isspace() else None
+      if m and m.group(2) and not m.group(1) and m.end() > j and text.rfind("<!--", 0, a) <= text.rfind("-->", 0, a):
+        end = _element_end(text, a, m.group(2).lower())
+        if end != -1:
+          spans.append((a, end))
+      j = text.find(needle, j + 1)
+  if not spans:
+    return SlimPage(html=text, bodies=bodies)
+
+  cuts: List[Tuple[int,int]] = []
+  for a, b in sorted(spans):
+    if not cuts or a >= cuts[-1][1]:   # nested regions go with their parent
+      cuts.append((a, b))
+  starts = [a for a, _ in cuts]
+  out: List[str] = []
+  pos = 0
+  for a, b in cuts:
+    out.append(text[pos:a])
+    pos = b
+  out.append(text[pos:])
+  kept_bodies: List[str] = []
+  for at, body in zip(tag_at, bodies):
+    k = bisect.bisect_right(starts, at) - 1
+    if k < 0 or at >= cuts[k][1]:
+      kept_bodies.append(body)
+  return SlimPage(html="".join(out), bodies=kept_bodies)
+
+# -----------------------------
+# Page context (parse once, index once)
+# -----------------------------
+@dataclass
+class PageContext:
+  """
+  One saved page: raw text, parsed soup, and lookup tables built in a single tree walk.
+  Every extract_* function reads from this instead of re-serializing or re-walking the soup.
+  """
+  html: str
+  soup: BeautifulSoup
+  ids: Dict[str, List[Tag]]         # id attr -> elements (document order)
+  hooks: Dict[str, List[Tag]]       # data-hook attr -> elements (document order)
+  imgs: List[Tag]                   # every <img>, document order
+  pos: Dict[int, int]               # id(element) -> document position
+  scan: ScriptScan                  # raw-text blobs found in one pass over html
+  cut: Dict[int, str]               # id(script/style element) -> body removed by slim_html()
+
+  def by_id(self, el_id: str) -> Optional[Tag]:
+    els = self.ids.get(el_id)
+    return els[0] if els else None
+
+  def ordered(self, els: List[Tag]) -> List[Tag]:
+    """Dedupe and sort to document order (what soup.select() returns for a selector union)."""
+    seen=set(); out=[]
+    for el in els:
+      k=id(el)
+      if k in seen: continue
+      seen.add(k); out.append(el)
+    out.sort(key=lambda el: self.pos.get(id(el), 0))
+    return out
+
+  def first(self, els: List[Tag]) -> Optional[Tag]:
+    """Earliest element in document order (what soup.select_one() returns for a selector union)."""
+    els = self.ordered(els)
+    return els[0] if els else None
+
+  def within(self, el_ids: List[str], sel: str, name: Optional[str] = None) -> List[Tag]:
+    """Equivalent of soup.select("#a <sel>, #b <sel>") answered from the id index."""
+    return self._within([el for k in el_ids for el in self.ids.get(k, [])], sel, name)
+
+  def within_matching(self, pred, sel: str, name: Optional[str] = None) -> List[Tag]:
+    """Same as within() for every id where pred(id) holds (e.g. [id*='variation_color'])."""
+    return self._within([el for k, els in self.ids.items() if pred(k) for el in els], sel, name)
+
+  def restored(self, el: Tag) -> Tag:
+    """el with the script/style bodies slim_html() removed put back (before str(el))."""
+    for t in [el] + el.find_all(["script", "style"]):
+      body = self.cut.get(id(t))
+      if body:
+        t.string = Script(body) if t.name == "script" else Stylesheet(body)
+    return el
+
+  def _within(self, roots: List[Tag], sel: str, name: Optional[str]) -> List[Tag]:
+    out: List[Tag] = []
+    for el in roots:
+      if name and el.name != name:
+        continue
+      out.extend(el.select(":scope " + sel))
+    return self.ordered(out)
+
+# bs4 tree builders the extractors are known to run on unchanged (check with --compare-parsers).
+# "html.parser" is pure Python (always available); "lxml" is the fast C parser (pip install lxml).
+# html5lib is deliberately absent: it inserts <tbody> and changes size_chart html.
+PARSER_BACKENDS = ["html.parser", "lxml"]
+DEFAULT_PARSER = "html.parser"
+
+def make_soup(html: str, parser: str = DEFAULT_PARSER) -> BeautifulSoup:
+  if parser not in PARSER_BACKENDS:
+    raise ValueError(f"unknown parser backend {parser!r} (choose from {', '.join(PARSER_BACKENDS)})")
+  return BeautifulSoup(html, parser)
+
+def parser_available(parser: str) -> bool:
+  try:
+    make_soup("<p></p>", parser)
+    return True
+  except Exception:
+    return False
+
+def build_page_context(html: str, soup: BeautifulSoup, scan: ScriptScan, bodies: Optional[List[str]] = None) -> Optional[PageContext]:
+  """
+  Index `soup` (parsed from html, or from slim_html(html) with its `bodies`).
+  Returns None when the slimmed tree's script/style tags don't line up with the cut
+  bodies (e.g. a "<script" inside an attribute value); the caller then parses the full page.
+  """
+  ids: Dict[str, List[Tag]] = {}
+  hooks: Dict[str, List[Tag]] = {}
+  imgs: List[Tag] = []
+  pos: Dict[int, int] = {}
+  cdata: List[Tag] = []
+  for i, el in enumerate(soup.find_all(True)):
+    pos[id(el)] = i
+    el_id = el.get("id")
+    if el_id:
+      ids.setdefault(str(el_id), []).append(el)
+    hook = el.get("data-hook")
+    if hook:
+      hooks.setdefault(str(hook), []).append(el)
+    if el.name == "img":
+      imgs.append(el)
+    elif el.name == "script" or el.name == "style":
+      cdata.append(el)
+  cut: Dict[int, str] = {}
+  if bodies is not None:
+    if len(cdata) != len(bodies) or any(el.contents for el in cdata):
+      return None
+    cut = {id(el): body for el, body in zip(cdata, bodies) if body}
+  return PageContext(html=html, soup=soup, ids=ids, hooks=hooks, imgs=imgs, pos=pos, scan=scan, cut=cut)
+
+def page_context(html: str, parser: str = DEFAULT_PARSER, slim: bool = True, run: Optional[PageRun] = None) -> PageContext:
+  """Raw-text scan of the full page first, then the DOM parse (of the slimmed page unless slim=False)."""
+  scan = budgeted(run, "scan_page_scripts", None, scan_page_scripts, html)
+  if scan is None:
+    scan = empty_scan()
+  if slim:
+    page = slim_html(html)
+    ctx = _parse_page(html, page.html, page.bodies, scan, parser, run)
+    if ctx is not None:
+      return ctx
+  return _parse_page(html, html, None, scan, parser, run)
+
+def _parse_page(html: str, dom: str, bodies: Optional[List[str]], scan: ScriptScan, parser: str, run: Optional[PageRun]) -> Optional[PageContext]:
+  limit = int(run.budget.dom_mb * 1024 * 1024) if run is not None else 0
+  if limit and len(dom) > limit:
+    # cut at a tag boundary; the parser closes whatever is left open
+    run.skip("dom_input", f"cut to {run.budget.dom_mb:g} of {len(dom) / (1024 * 1024):.1f} MB")
+    dom, bodies = dom[:max(dom.rfind("<", 0, limit), 0)], None
+  soup = budgeted(run, "make_soup", None, make_soup, dom, parser)
+  if soup is None:
+    soup, bodies = make_soup("", parser), None
+  return build_page_context(html, soup, scan, bodies)
+
+
 # -----------------------------
 # JSON blob helpers for ImageBlockATF/BTF
 # -----------------------------
-def extract_json_array_after_marker(html_text: str, marker: str, max_scan: int = 400_000) -> Optional[Any]:
-  idx = html_text.find(marker)
-  if idx == -1:
-    return None
-  lb = html_text.find("[", idx)
-  if lb == -1:
-    return None
+_JSON_DECODER = json.JSONDecoder()
+_BLOB_TOKENS = {"[": re.compile(r'[\[\]"\\]'), "{": re.compile(r'[{}"\\]')}
 
+def _balanced_blob(html_text: str, start: int, open_ch: str, close_ch: str, max_scan: int) -> Optional[str]:
+  """Bracket-balanced text from html_text[start] (which is open_ch); only '"' strings are honoured."""
   depth = 0
   in_str = False
-  esc = False
-  for i in range(lb, min(len(html_text), lb + max_scan)):
+  skip = -1
+  # jump between the only characters that can change state instead of stepping every char
+  for m in _BLOB_TOKENS[open_ch].finditer(html_text, start, min(len(html_text), start + max_scan)):
+    i = m.start()
+    if i == skip:
+      continue
     ch = html_text[i]
     if in_str:
-      if esc:
-        esc = False
-      elif ch == "\\":
-        esc = True
+      if ch == "\\":
+        skip = i + 1
       elif ch == '"':
         in_str = False
       continue
-    else:
-      if ch == '"':
-        in_str = True
-        continue
-      if ch == "[":
-        depth += 1
-      elif ch == "]":
-        depth -= 1
-        if depth == 0:
-          blob = html_text[lb : i + 1]
-          try:
-            return json.loads(blob)
-          except Exception:
-            try:
-              return json.loads(_html.unescape(blob))
-            except Exception:
-              return None
+    if ch == '"':
+      in_str = True
+    elif ch == open_ch:
+      depth += 1
+    elif ch == close_ch:
+      depth -= 1
+      if depth == 0:
+        return html_text[start : i + 1]
   return None
 
+def _json_blob_at(html_text: str, start: int, open_ch: str, close_ch: str, max_scan: int = 400_000) -> Optional[Any]:
+  # Fast path: the blob is usually strict JSON, so the C decoder finds the same end the
+  # bracket scan would. Escaped/JS-ish blobs fall back to the scan + unescape below.
+  try:
+    val, end = _JSON_DECODER.raw_decode(html_text, start)
+    if end - start <= max_scan:
+      return val
+  except ValueError:
+    pass
+  blob = _balanced_blob(html_text, start, open_ch, close_ch, max_scan)
+  if blob is None:
+    return None
+  try:
+    return json.loads(blob)
+  except Exception:
+    try:
+      return json.loads(_html.unescape(blob))
+    except Exception:
+      return None
+
+def extract_json_array_after_marker(html_text: str, marker: str, max_scan: int = 400_000) -> Optional[Any]:
+  idx = html_text.find(marker)
+  if idx == -1:
+    return None
+  lb = html_text.find("[", idx)
+  if lb == -1:
+    return None
+  return _json_blob_at(html_text, lb, "[", "]", max_scan)
+
+DVDD_MARKER = '"dimensionValuesDisplayData"'
+
+def extract_json_object_after_marker(html_text: str, marker: str) -> Optional[Any]:
+  idx = html_text.find(marker)
+  if idx == -1:
+    return None
+  brace = html_text.find("{", idx)
+  if brace == -1:
+    return None
+  return _json_blob_at(html_text, brace, "{", "}")
+
+ATF_MARKER = "'colorImages': { 'initial':"
+
 def extract_imageblock_atf_items(html_text: str) -> List[Dict[str,Any]]:
-  arr = extract_json_array_after_marker(html_text, "'colorImages': { 'initial':")
+  arr = extract_json_array_after_marker(html_text, ATF_MARKER)
+  return _atf_items(arr)
+
+def _atf_items(arr: Any) -> List[Dict[str,Any]]:
   if isinstance(arr, list):
     return [x for x in arr if isinstance(x, dict)]
   return []
@@ -256,30 +640,27 @@ def pick_best_amazon_image(item: Dict[str,Any]) -> str:
       return best
   return ""
 
+PARSEJSON_MARKER = "jQuery.parseJSON('"
+_PARSEJSON_BODY = re.compile(r"[^'\\]*(?:\\.[^'\\]*)*'", re.S)
+_BACKSLASH_ESC = re.compile(r"\\(.)", re.S)
+
 def extract_parsejson_payload(html_text: str, start_from: int = 0) -> Optional[str]:
-  i = html_text.find("jQuery.parseJSON('", start_from)
+  i = html_text.find(PARSEJSON_MARKER, start_from)
   if i == -1:
     return None
-  j = i + len("jQuery.parseJSON('")
-  out = []
-  esc = False
-  while j < len(html_text):
-    ch = html_text[j]
-    if esc:
-      out.append(ch)
-      esc = False
-    else:
-      if ch == "\\":
-        esc = True
-      elif ch == "'":
-        return "".join(out)
-      else:
-        out.append(ch)
-    j += 1
-  return None
+  return _parsejson_payload_at(html_text, i + len(PARSEJSON_MARKER))
+
+def _parsejson_payload_at(html_text: str, j: int) -> Optional[str]:
+  # body runs to the first unescaped quote; "\x" -> "x" like the JS string literal
+  m = _PARSEJSON_BODY.match(html_text, j)
+  if not m:
+    return None
+  return _BACKSLASH_ESC.sub(r"\1", m.group(0)[:-1])
 
 def extract_imageblock_btf_data(html_text: str) -> Optional[Dict[str,Any]]:
-  payload = extract_parsejson_payload(html_text)
+  return _btf_from_payload(extract_parsejson_payload(html_text))
+
+def _btf_from_payload(payload: Optional[str]) -> Optional[Dict[str,Any]]:
   if not payload:
     return None
   try:
@@ -326,7 +707,7 @@ def extract_color_media_from_btf(btf: Dict[str,Any]) -> Tuple[Dict[str,str], Dic
 # -----------------------------
 # A+ / description images (STRICT)
 # -----------------------------
-def extract_aplus_images(soup: BeautifulSoup) -> List[str]:
+def extract_aplus_images(ctx: PageContext) -> List[str]:
   """
   A+ content comes in multiple wrappers depending on Amazon template.
   We deliberately DO NOT scan all <img> globally to avoid gallery bleed.
@@ -335,16 +716,17 @@ def extract_aplus_images(soup: BeautifulSoup) -> List[str]:
   """
   urls=[]
 
+  # id-rooted selectors are answered from the id index; class selectors still walk the tree
   selectors = [
-    "#aplus_feature_div img",
-    "#aplus3p_feature_div img",
-    "#aplusBrandStory_feature_div img",
-    "#aplus img",
-    "div[id^='aplus'] img",
-    ".aplus-v2 img",
-    ".aplus-module img",
-    ".aplus-module-wrapper img",
-    "#productDescription img",
+    lambda: ctx.within(["aplus_feature_div"], "img"),
+    lambda: ctx.within(["aplus3p_feature_div"], "img"),
+    lambda: ctx.within(["aplusBrandStory_feature_div"], "img"),
+    lambda: ctx.within(["aplus"], "img"),
+    lambda: ctx.within_matching(lambda k: k.startswith("aplus"), "img", name="div"),
+    lambda: ctx.soup.select(".aplus-v2 img"),
+    lambda: ctx.soup.select(".aplus-module img"),
+    lambda: ctx.soup.select(".aplus-module-wrapper img"),
+    lambda: ctx.within(["productDescription"], "img"),
   ]
 
   def is_good_aplus_url(src: str) -> bool:
@@ -363,7 +745,7 @@ def extract_aplus_images(soup: BeautifulSoup) -> List[str]:
     return False
 
   for sel in selectors:
-    for img in soup.select(sel):
+    for img in sel():
       src = img.get("data-src") or img.get("data-lazy-src") or img.get("src") or ""
       src = normalize_image_url(str(src))
       src = upscale_amazon_sr_url(src)
@@ -383,17 +765,17 @@ def extract_aplus_images(soup: BeautifulSoup) -> List[str]:
 # -----------------------------
 # Review summary + customers say
 # -----------------------------
-def extract_review_summary(soup: BeautifulSoup) -> Tuple[float,int]:
+def extract_review_summary(ctx: PageContext) -> Tuple[float,int]:
   avg = 0.0
   count = 0
-  el = soup.select_one("#acrPopover span.a-icon-alt, i.a-icon-star span.a-icon-alt")
+  el = ctx.soup.select_one("#acrPopover span.a-icon-alt, i.a-icon-star span.a-icon-alt")
   if el:
     t = clean_ws(el.get_text(" ", strip=True))
     m = re.search(r"([0-9](?:\.[0-9])?)", t)
     if m:
       try: avg = float(m.group(1))
       except: pass
-  el2 = soup.select_one("#acrCustomerReviewText, [data-hook='total-review-count']")
+  el2 = ctx.first(ctx.ids.get("acrCustomerReviewText", []) + ctx.hooks.get("total-review-count", []))
   if el2:
     t = clean_ws(el2.get_text(" ", strip=True)).replace(",", "")
     m2 = re.search(r"(\d+)", t)
@@ -402,15 +784,15 @@ def extract_review_summary(soup: BeautifulSoup) -> Tuple[float,int]:
       except: pass
   return avg, count
 
-def extract_customers_say(soup: BeautifulSoup) -> Optional[str]:
-  """Return ONE short paragraph (no counts/tags/blobs)."""
+def extract_customers_say(ctx: PageContext, max_text: Optional[int] = None) -> Optional[str]:
+  """Return ONE short paragraph (no counts/tags/blobs). Texts are cut to max_text chars before the regexes."""
   # 1) Known summary widgets (older layouts)
-  candidates = soup.select(
-    "#cr-lighthouse-terms, #cr-summarization-attributes, #cr-summarization-attributes-v2, "
-    "[data-hook='cr-insights-widget'], [data-hook='cr-summarization-widget'], [data-hook='cr-insights-widget-summary']"
+  candidates = ctx.ordered(
+    [el for k in ["cr-lighthouse-terms", "cr-summarization-attributes", "cr-summarization-attributes-v2"] for el in ctx.ids.get(k, [])]
+    + [el for k in ["cr-insights-widget", "cr-summarization-widget", "cr-insights-widget-summary"] for el in ctx.hooks.get(k, [])]
   )
   for el in candidates:
-    t = clean_ws(el.get_text(" ", strip=True))
+    t = clean_ws(el.get_text(" ", strip=True))[:max_text]
     if not t:
       continue
     if re.search(r"customers\s+say", t, flags=re.I):
@@ -421,7 +803,7 @@ def extract_customers_say(soup: BeautifulSoup) -> Optional[str]:
         return t[:420].rstrip()
 
   # 2) Newer "Customers say" insight card (common in saved HTML)
-  needle = soup.find(string=re.compile(r"^\s*Customers\s+say\s*$", re.I))
+  needle = ctx.soup.find(string=re.compile(r"^\s*Customers\s+say\s*$", re.I))
   if needle:
     heading = needle.parent
 
@@ -433,7 +815,7 @@ def extract_customers_say(soup: BeautifulSoup) -> Optional[str]:
 
     scope = overall or heading.parent
     if scope:
-      raw = clean_ws(scope.get_text(" ", strip=True))
+      raw = clean_ws(scope.get_text(" ", strip=True))[:max_text]
       raw = strip_amazon_words(raw)
 
       # Drop junk/count lines
@@ -464,13 +846,14 @@ def extract_customers_say(soup: BeautifulSoup) -> Optional[str]:
 
   return None
 
-def extract_size_chart(soup: BeautifulSoup) -> Optional[Dict[str,Any]]:
+def extract_size_chart(ctx: PageContext) -> Optional[Dict[str,Any]]:
+  soup = ctx.soup
   # common case: Amazon preloads the popover HTML in the page (not necessarily linked by href)
-  pop = soup.select_one("#a-popover-sizeGuide") or soup.select_one("div#a-popover-sizeGuide")
+  pop = ctx.by_id("a-popover-sizeGuide")
   if pop:
     tbl = pop.select_one("table") or pop.select_one("div.sizing-chart")
     if tbl:
-      html = str(tbl)
+      html = str(ctx.restored(tbl))
       if html:
         return {"label": "Size chart", "href": "javascript:void(0)", "html": html}
     img = pop.select_one("img")
@@ -508,12 +891,12 @@ def extract_size_chart(soup: BeautifulSoup) -> Optional[Dict[str,Any]]:
 
   candidates=[]
   if content_id:
-    candidates += [f"#{content_id}", f"#a-popover-content-{content_id}"]
-  candidates += ["#size-chart", "#sizeChart", "#sizechart", "#size_chart", "#sizeChartModal"]
-  for sel in candidates:
-    el = soup.select_one(sel)
+    candidates += [str(content_id), f"a-popover-content-{content_id}"]
+  candidates += ["size-chart", "sizeChart", "sizechart", "size_chart", "sizeChartModal"]
+  for el_id in candidates:
+    el = ctx.by_id(el_id)
     if el:
-      html = str(el)
+      html = str(ctx.restored(el))
       break
 
   if not href and not html:
@@ -526,7 +909,9 @@ def extract_size_chart(soup: BeautifulSoup) -> Optional[Dict[str,Any]]:
 # Videos (VSE + mp4 fallback)
 # -----------------------------
 def extract_videos_vse(html_text: str) -> List[Dict[str,Any]]:
-  unesc = _html.unescape(html_text)
+  return _videos_vse_from_unescaped(_html.unescape(html_text))
+
+def _videos_vse_from_unescaped(unesc: str) -> List[Dict[str,Any]]:
   by_id: Dict[str,Dict[str,Any]] = {}
 
   def _vid_id(u: str) -> str:
@@ -580,12 +965,18 @@ def extract_videos_vse(html_text: str) -> List[Dict[str,Any]]:
 
   return out[:12]
 
+_MP4_FALLBACK = re.compile(r"https?://[^\"'\s]+\.mp4", re.I)
+
 def extract_videos(html: str) -> List[Dict[str,Any]]:
   vids = extract_videos_vse(html)
+  if vids:
+    return _dedupe_videos(vids, [])
+  return _dedupe_videos(vids, [m.group(0) for m in _MP4_FALLBACK.finditer(html)])
+
+def _dedupe_videos(vids: List[Dict[str,Any]], fallback_mp4: List[str]) -> List[Dict[str,Any]]:
   if not vids:
     extra=[]
-    for m in re.finditer(r"https?://[^\"'\s]+\.mp4", html, flags=re.I):
-      url=m.group(0)
+    for url in fallback_mp4:
       if "media-amazon.com" not in url and "amazon" not in url:
         continue
       extra.append({"src": url, "sources": [{"type":"video/mp4","src": url}]})
@@ -608,6 +999,113 @@ def extract_videos(html: str) -> List[Dict[str,Any]]:
   return out[:12]
 
 
+# -----------------------------
+# Single-pass script scanner
+# -----------------------------
+# Every raw-text lookup parse_one() needs, resolved once per page: the ImageBlockATF
+# colorImages array, the BTF jQuery.parseJSON payload, dimensionValuesDisplayData, the
+# "asin" fallback, script image URLs and video URLs.
+# Fixed markers are located with str.find (memchr speed; a regex alternation is several
+# times slower in CPython). Everything URL-shaped comes out of ONE regex pass, and blobs are
+# decoded by the C JSON decoder instead of per-character Python loops.
+_SCAN_URL_TOKENS = re.compile(r"(?=[hH.v])(?:(?P<url>(?i:https?://))|(?P<video>videoURL|videoPreviewImageSrc|(?i:\.mp4)))")
+_ASIN_AT = re.compile(r'"asin"\s*:\s*"([A-Z0-9]{10})"')
+_SCRIPT_IMAGE_URL = re.compile(r"https?://m\.media-amazon\.com/images/I/[A-Za-z0-9%._-]+\.(?:jpg|jpeg|png|webp)", re.I)
+
+@dataclass
+class ScriptScan:
+  atf_items: List[Dict[str,Any]]       # == extract_imageblock_atf_items(html)
+  btf: Optional[Dict[str,Any]]         # == extract_imageblock_btf_data(html)
+  dimension_values: Optional[Any]      # == extract_json_object_after_marker(html, DVDD_MARKER)
+  image_urls: List[str]                # == extract_script_image_urls(html)
+  videos: List[Dict[str,Any]]          # == extract_videos(html)
+  asin: str                            # first "asin": "XXXXXXXXXX" in the page, or ""
+
+def empty_scan() -> ScriptScan:
+  """What scan_page_scripts() finds on a page without any of the blobs."""
+  return ScriptScan(atf_items=[], btf=None, dimension_values=None, image_urls=[], videos=[], asin="")
+
+def scan_page_scripts(html_text: str) -> ScriptScan:
+  image_urls: List[str] = []
+  mp4_urls: List[str] = []
+  video_hits: List[int] = []
+  img_end = mp4_end = 0   # finditer semantics: URL matches never overlap
+
+  for m in _SCAN_URL_TOKENS.finditer(html_text):
+    pos = m.start()
+    if m.lastgroup == "video":
+      video_hits.append(pos)
+      continue
+    if pos >= img_end:
+      mm = _SCRIPT_IMAGE_URL.match(html_text, pos)
+      if mm:
+        image_urls.append(mm.group(0)); img_end = mm.end()
+    if pos >= mp4_end:
+      mm = _MP4_FALLBACK.match(html_text, pos)
+      if mm:
+        mp4_urls.append(mm.group(0)); mp4_end = mm.end()
+
+  asin = ""
+  i = html_text.find('"asin"')
+  while i != -1:
+    mm = _ASIN_AT.match(html_text, i)
+    if mm:
+      asin = mm.group(1)
+      break
+    i = html_text.find('"asin"', i + 1)
+
+  atf_items: List[Dict[str,Any]] = []
+  i = html_text.find(ATF_MARKER)
+  if i != -1:
+    lb = html_text.find("[", i)
+    if lb != -1:
+      atf_items = _atf_items(_json_blob_at(html_text, lb, "[", "]"))
+
+  i = html_text.find(PARSEJSON_MARKER)
+  btf = _btf_from_payload(_parsejson_payload_at(html_text, i + len(PARSEJSON_MARKER))) if i != -1 else None
+
+  dvdd = None
+  i = html_text.find(DVDD_MARKER)
+  if i != -1:
+    brace = html_text.find("{", i)
+    if brace != -1:
+      dvdd = _json_blob_at(html_text, brace, "{", "}")
+
+  vids = _videos_vse_from_unescaped(_unescape_around(html_text, video_hits)) if video_hits else []
+  videos = _dedupe_videos(vids, [] if vids else mp4_urls)
+
+  return ScriptScan(
+    atf_items=atf_items,
+    btf=btf,
+    dimension_values=dvdd,
+    image_urls=image_urls,
+    videos=videos,
+    asin=asin,
+  )
+
+def _unescape_around(html_text: str, hits: List[int]) -> str:
+  """
+  html.unescape() of just the '<'-delimited segments containing a video token.
+  Entities never contain '<', so this equals slicing the fully unescaped page,
+  without paying to unescape the whole document. (One intended difference: a URL
+  match can no longer run on across a tag, e.g. "...x.mp4?a=1</a>".)
+  """
+  parts: List[str] = []
+  last_end = -1
+  for pos in hits:
+    if pos < last_end:
+      continue
+    a = html_text.rfind("<", 0, pos)
+    a = 0 if a == -1 else a
+    b = html_text.find("<", pos)
+    b = len(html_text) if b == -1 else b
+    if a < last_end:
+      a = last_end
+    parts.append(html_text[a:b])
+    last_end = b
+  return _html.unescape("".join(parts))
+
+
 # -----------------------------
 # Extractors: title, brand, price, etc.
 # -----------------------------
@@ -615,18 +1113,19 @@ def extract_asin_from_filename(path: Path) -> str:
   m=re.search(r"\b([A-Z0-9]{10})\b", path.name)
   return m.group(1) if m else ""
 
-def extract_title(soup: BeautifulSoup) -> str:
-  el=soup.select_one("#productTitle")
+def extract_title(ctx: PageContext) -> str:
+  el=ctx.by_id("productTitle")
   if el:
     t=clean_ws(el.get_text(" ", strip=True))
     return t
-  og=soup.find("meta", attrs={"property":"og:title"})
+  og=ctx.soup.find("meta", attrs={"property":"og:title"})
   if og and og.get("content"):
     return clean_ws(str(og["content"]))
   return ""
 
-def extract_brand(soup: BeautifulSoup) -> str:
-  el = soup.select_one("#bylineInfo, #brand, #bylineInfo_feature_div #bylineInfo")
+def extract_brand(ctx: PageContext) -> str:
+  # "#bylineInfo_feature_div #bylineInfo" is a subset of "#bylineInfo"
+  el = ctx.first(ctx.ids.get("bylineInfo", []) + ctx.ids.get("brand", []))
   if not el:
     return ""
   t = clean_ws(el.get_text(" ", strip=True))
@@ -640,9 +1139,15 @@ def extract_brand(soup: BeautifulSoup) -> str:
   return clean_ws(t)
 
 
-def extract_price(soup: BeautifulSoup) -> Optional[float]:
-  for sel in ["#priceToPay span.a-offscreen", "span.a-price span.a-offscreen", "#corePrice_feature_div span.a-offscreen"]:
-    el=soup.select_one(sel)
+def extract_price(ctx: PageContext) -> Optional[float]:
+  lookups = [
+    lambda: ctx.within(["priceToPay"], "span.a-offscreen"),
+    lambda: ctx.soup.select("span.a-price span.a-offscreen", limit=1),
+    lambda: ctx.within(["corePrice_feature_div"], "span.a-offscreen"),
+  ]
+  for look in lookups:
+    found=look()
+    el=found[0] if found else None
     if el:
       txt=clean_ws(el.get_text(" ", strip=True))
       m=re.search(r"([0-9]+(?:\.[0-9]{1,2})?)", txt.replace(",",""))
@@ -651,24 +1156,24 @@ def extract_price(soup: BeautifulSoup) -> Optional[float]:
         except: pass
   return None
 
-def extract_bullets(soup: BeautifulSoup) -> List[str]:
+def extract_bullets(ctx: PageContext) -> List[str]:
   out=[]
-  for li in soup.select("#feature-bullets ul li span"):
+  for li in ctx.within(["feature-bullets"], "ul li span"):
     t=text_or_none(li)
     if not t: continue
     if len(t) < 4: continue
     out.append(t)
   return uniq_keep_order(out)[:24]
 
-def extract_specs(soup: BeautifulSoup) -> Dict[str,str]:
+def extract_specs(ctx: PageContext) -> Dict[str,str]:
   out={}
-  for tr in soup.select("#productDetails_techSpec_section_1 tr, #productDetails_detailBullets_sections1 tr"):
+  for tr in ctx.within(["productDetails_techSpec_section_1", "productDetails_detailBullets_sections1"], "tr"):
     th=tr.find("th"); td=tr.find("td")
     k=text_or_none(th) or ""
     v=text_or_none(td) or ""
     if k and v:
       out[k]=v
-  for li in soup.select("#detailBullets_feature_div li"):
+  for li in ctx.within(["detailBullets_feature_div"], "li"):
     t=text_or_none(li)
     if not t or ":" not in t: continue
     k,v=t.split(":",1)
@@ -683,9 +1188,9 @@ def extract_specs(soup: BeautifulSoup) -> Dict[str,str]:
 # -----------------------------
 # Images extraction (GALLERY ONLY)
 # -----------------------------
-def extract_dynamic_image_urls(soup: BeautifulSoup) -> List[str]:
+def extract_dynamic_image_urls(ctx: PageContext) -> List[str]:
   urls=[]
-  for tag in soup.select("img"):
+  for tag in ctx.imgs:
     dyn=tag.get("data-a-dynamic-image")
     if dyn:
       try:
@@ -702,13 +1207,13 @@ def extract_dynamic_image_urls(soup: BeautifulSoup) -> List[str]:
 
 def extract_script_image_urls(html: str) -> List[str]:
   urls=[]
-  for m in re.finditer(r"https?://m\.media-amazon\.com/images/I/[A-Za-z0-9%._-]+\.(?:jpg|jpeg|png|webp)", html, flags=re.I):
+  for m in _SCRIPT_IMAGE_URL.finditer(html):
     urls.append(m.group(0))
   return urls
 
-def extract_images(soup: BeautifulSoup, html_text: Optional[str]=None) -> List[str]:
-  if html_text:
-    items = extract_imageblock_atf_items(html_text)
+def extract_images(ctx: PageContext) -> List[str]:
+  if ctx.html:
+    items = ctx.scan.atf_items
     if items:
       hd=[]
       for it in items:
@@ -720,8 +1225,7 @@ def extract_images(soup: BeautifulSoup, html_text: Optional[str]=None) -> List[s
       if hd:
         return hd
 
-  html=str(soup)
-  raw=extract_dynamic_image_urls(soup)+extract_script_image_urls(html)
+  raw=extract_dynamic_image_urls(ctx)+ctx.scan.image_urls
 
   norm=[]
   for u in raw:
@@ -732,7 +1236,7 @@ def extract_images(soup: BeautifulSoup, html_text: Optional[str]=None) -> List[s
 
   norm=uniq_keep_order(norm)
   if not norm:
-    og=soup.find("meta", attrs={"property":"og:image"})
+    og=ctx.soup.find("meta", attrs={"property":"og:image"})
     if og and og.get("content"):
       u=force_hd_amazon_image_url(str(og["content"]))
       if u and is_relevant_product_image(u): norm=[u]
@@ -742,50 +1246,11 @@ def extract_images(soup: BeautifulSoup, html_text: Optional[str]=None) -> List[s
 # -----------------------------
 # Variations extraction
 # -----------------------------
-def extract_json_object_after_marker(html_text: str, marker: str) -> Optional[Any]:
-  idx = html_text.find(marker)
-  if idx == -1:
-    return None
-  brace = html_text.find("{", idx)
-  if brace == -1:
-    return None
-
-  depth = 0
-  in_str = False
-  esc = False
-  for i in range(brace, min(len(html_text), brace + 400_000)):
-    ch = html_text[i]
-    if in_str:
-      if esc:
-        esc = False
-      elif ch == "\\":
-        esc = True
-      elif ch == '"':
-        in_str = False
-      continue
-    else:
-      if ch == '"':
-        in_str = True
-        continue
-      if ch == "{":
-        depth += 1
-      elif ch == "}":
-        depth -= 1
-        if depth == 0:
-          blob = html_text[brace : i + 1]
-          try:
-            return json.loads(blob)
-          except Exception:
-            try:
-              return json.loads(_html.unescape(blob))
-            except Exception:
-              return None
-  return None
-
-def extract_variations(soup: BeautifulSoup) -> Tuple[List[str], List[str]]:
+def extract_variations(ctx: PageContext) -> Tuple[List[str], List[str]]:
   sizes=[]; colors=[]
 
-  for li in soup.select("[id*='variation_color_name'] li, [id*='variation_color'] li"):
+  # [id*='variation_color'] also covers [id*='variation_color_name']
+  for li in ctx.within_matching(lambda k: "variation_color" in k, "li"):
     label = li.get("title") or li.get("aria-label") or ""
     label = clean_ws(str(label))
     label = re.sub(r"^click to select\s*", "", label, flags=re.I).strip()
@@ -795,23 +1260,22 @@ def extract_variations(soup: BeautifulSoup) -> Tuple[List[str], List[str]]:
     if label and len(label)<=40:
       colors.append(label)
 
-  for li in soup.select("[id*='variation_size_name'] li, [id*='variation_size'] li"):
+  for li in ctx.within_matching(lambda k: "variation_size" in k, "li"):
     t=text_or_none(li)
     if t and len(t)<=30:
       sizes.append(t)
 
-  for opt in soup.select("select#native_dropdown_selected_size_name option"):
+  for opt in ctx.within(["native_dropdown_selected_size_name"], "option", name="select"):
     t=clean_ws(opt.get_text(" ", strip=True))
     if t and "select" not in t.lower() and len(t)<=30:
       sizes.append(t)
 
-  for opt in soup.select("select#native_dropdown_selected_color_name option"):
+  for opt in ctx.within(["native_dropdown_selected_color_name"], "option", name="select"):
     t=clean_ws(opt.get_text(" ", strip=True))
     if t and "select" not in t.lower() and len(t)<=40:
       colors.append(t)
 
-  html = str(soup)
-  dvdd = extract_json_object_after_marker(html, '"dimensionValuesDisplayData"')
+  dvdd = ctx.scan.dimension_values
   if isinstance(dvdd, dict):
     for k, arr in dvdd.items():
       if not isinstance(arr, list): continue
@@ -827,9 +1291,9 @@ def extract_variations(soup: BeautifulSoup) -> Tuple[List[str], List[str]]:
 
   return uniq_keep_order(sizes)[:40], uniq_keep_order(colors)[:60]
 
-def extract_color_swatches(soup: BeautifulSoup) -> Dict[str, str]:
+def extract_color_swatches(ctx: PageContext) -> Dict[str, str]:
   out: Dict[str, str] = {}
-  for li in soup.select("[id*='variation_color_name'] li, [id*='variation_color'] li"):
+  for li in ctx.within_matching(lambda k: "variation_color" in k, "li"):
     label = li.get("title") or li.get("aria-label") or ""
     label = clean_ws(str(label))
     label = re.sub(r"^click to select\s*", "", label, flags=re.I).strip()
@@ -860,9 +1324,12 @@ def extract_color_swatches(soup: BeautifulSoup) -> Dict[str, str]:
 # -----------------------------
 # Reviews extraction
 # -----------------------------
-def extract_reviews(soup: BeautifulSoup) -> List[Dict[str,Any]]:
+def extract_reviews(ctx: PageContext) -> List[Dict[str,Any]]:
   out=[]
-  blocks = soup.select('div[data-hook="review"], div[id^="customer_review-"]')
+  blocks = ctx.ordered(
+    [el for el in ctx.hooks.get("review", []) if el.name == "div"]
+    + [el for k, els in ctx.ids.items() if k.startswith("customer_review-") for el in els if el.name == "div"]
+  )
   for r in blocks:
     title = (
       text_or_none(r.select_one('[data-hook="review-title"]'))
@@ -943,8 +1410,8 @@ def extract_reviews(soup: BeautifulSoup) -> List[Dict[str,Any]]:
 # -----------------------------
 # Category (very light heuristic)
 # -----------------------------
-def extract_category(soup: BeautifulSoup) -> str:
-  bc=soup.select_one("#wayfinding-breadcrumbs_feature_div, #wayfinding-breadcrumbs_container")
+def extract_category(ctx: PageContext) -> str:
+  bc=ctx.first(ctx.ids.get("wayfinding-breadcrumbs_feature_div", []) + ctx.ids.get("wayfinding-breadcrumbs_container", []))
   if bc:
     t=clean_ws(bc.get_text(" ", strip=True))
     t=re.sub(r"\s*›\s*", " > ", t)
@@ -1262,17 +1729,216 @@ def lite_card(p: Dict[str,Any]) -> Optional[Dict[str,Any]]:
   imgs=p.get("gallery_images") or p.get("images") or []
   imgs2=imgs if isinstance(imgs,list) else []
   if not imgs2: return None
-  return {"id":pid,"title":p.get("title"),"price":p.get("price"),"category":p.get("category"),"images":imgs2[:1]}
+  iv = root_module("image_variants")
+  return {"id":pid,"title":p.get("title"),"price":p.get("price"),"category":p.get("category"),"images":[iv.variant(imgs2[0], iv.CARD_WIDTH)]}
+
+CROSS_SELL_MODES = ["random", "ranked"]
+
+# ranked mode: how much each shared feature counts, and how many postings per feature
+# are looked at (keeps the work per product O(k) however large a category gets)
+CROSS_SELL_WEIGHTS = {"cat": 4, "price": 2, "color": 1}
+CROSS_SELL_PER_FEATURE = 16
 
-def attach_cross_sells(products: List[Dict[str,Any]]) -> None:
-  cards=[c for c in (lite_card(p) for p in products) if c]
+@dataclass
+class CrossSellIndex:
+  cards: List[Dict[str,Any]]
+  features: List[List[Tuple[str,str]]]          # per card: ("cat", slug), ("price", band), ("color", name)
+  by_id: Dict[str, List[int]]                   # product id -> card positions (handle collisions)
+  postings: Dict[Tuple[str,str], List[int]]     # feature -> card positions
+
+def price_band(price: Any) -> str:
+  """Half-octave price bands: $10-14, $14-20, $20-28, ..."""
+  try:
+    v = float(price)
+  except (TypeError, ValueError):
+    return ""
+  if v <= 0:
+    return ""
+  return str(int(math.floor(math.log2(v) * 2)))
+
+def cross_sell_features(p: Dict[str,Any]) -> List[Tuple[str,str]]:
+  feats: List[Tuple[str,str]] = []
+  slug = str(p.get("category_slug") or "").strip()
+  if slug:
+    feats.append(("cat", slug))
+  band = price_band(p.get("price"))
+  if band:
+    feats.append(("price", band))
+  colors = ((p.get("variations") or {}).get("colors") or [])[:12]
+  for c in uniq_keep_order([clean_ws(str(c)).lower() for c in colors]):
+    feats.append(("color", c))
+  return feats
+
+def build_cross_sell_index(products: List[Dict[str,Any]]) -> CrossSellIndex:
+  ix = CrossSellIndex(cards=[], features=[], by_id={}, postings={})
+  for p in products:
+    c = lite_card(p)
+    if not c:
+      continue
+    pos = len(ix.cards)
+    ix.cards.append(c)
+    ix.by_id.setdefault(str(c["id"]), []).append(pos)
+    feats = cross_sell_features(p)
+    ix.features.append(feats)
+    for f in feats:
+      ix.postings.setdefault(f, []).append(pos)
+  return ix
+
+def _sample_excluding(r: random.Random, n: int, k: int, excluded: set) -> List[int]:
+  """k distinct positions from range(n) minus `excluded`, in draw order; O(k) expected."""
+  avail = n - len(excluded)
+  if avail <= 0 or k <= 0:
+    return []
+  if avail <= 2 * k:
+    pool = [i for i in range(n) if i not in excluded]
+    return r.sample(pool, min(k, len(pool)))
+  out: List[int] = []
+  seen = set(excluded)
+  while len(out) < k:
+    i = r.randrange(n)
+    if i in seen:
+      continue
+    seen.add(i); out.append(i)
+  return out
+
+def _ranked_positions(ix: CrossSellIndex, r: random.Random, feats: List[Tuple[str,str]], k: int, excluded: set) -> List[int]:
+  scores: Dict[int,int] = {}
+  for f in feats:
+    post = ix.postings.get(f) or []
+    picks = post if len(post) <= CROSS_SELL_PER_FEATURE else r.sample(post, CROSS_SELL_PER_FEATURE)
+    w = CROSS_SELL_WEIGHTS[f[0]]
+    for c in picks:
+      if c not in excluded:
+        scores[c] = scores.get(c, 0) + w
+  # postings were sampled in random order, so a stable sort is already a seeded tie-break
+  out = sorted(scores, key=scores.__getitem__, reverse=True)[:k]
+  if len(out) < k:
+    out += _sample_excluding(r, len(ix.cards), k - len(out), excluded | set(out))
+  return out
+
+def pick_cross_sells(ix: CrossSellIndex, p: Dict[str,Any], seed: str, k: int, mode: str = "random") -> List[Dict[str,Any]]:
+  pid = str(p.get("id"))
+  r = random.Random(stable_int(f"{seed}:{pid}"))
+  excluded = set(ix.by_id.get(pid, []))
+  if mode == "ranked":
+    pos = _ranked_positions(ix, r, cross_sell_features(p), k, excluded)
+  else:
+    pos = _sample_excluding(r, len(ix.cards), k, excluded)
+  return [ix.cards[i] for i in pos]
+
+def attach_cross_sells(products: List[Dict[str,Any]], mode: str = "random") -> None:
+  """
+  related (5) + customer_also_viewed (8) per product, seeded per product id so reruns are stable.
+  Samples k cards instead of copying + shuffling the whole pool: O(n*k), not O(n^2).
+  mode="ranked" prefers cards sharing category_slug, price band and colours.
+  """
+  ix = build_cross_sell_index(products)
   for p in products:
-    pid=str(p.get("id"))
-    pool=[c for c in cards if c.get("id")!=pid]
-    r=random.Random(stable_int(f"related:{pid}")); rel=pool[:] ; r.shuffle(rel); p["related"]=rel[:5]
-    r2=random.Random(stable_int(f"viewed:{pid}")); cav=pool[:] ; r2.shuffle(cav); p["customer_also_viewed"]=cav[:8]
+    p["related"]=pick_cross_sells(ix, p, "related", 5, mode)
+    p["customer_also_viewed"]=pick_cross_sells(ix, p, "viewed", 8, mode)
 
 
+# -----------------------------
+# Input sources (loose files, .gz/.zst, tarballs)
+# -----------------------------
+# Besides loose .html files, main() takes gzip/zstd-compressed pages (x.html.gz) and
+# tarballs (.tar, .tar.gz/.tgz, .tar.zst/.tzst). Each .html/.htm member of a tarball
+# becomes its own input, named "<archive>::<member>" (so the ASIN still comes from the
+# member's file name). Members are streamed out of the archive into the workers; nothing
+# is extracted to disk.
+ARCHIVE_SEP = "::"
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.zst", ".tzst")
+
+def is_archive(fp: str) -> bool:
+  return fp.lower().endswith(TAR_SUFFIXES)
+
+def is_html_member(name: str) -> bool:
+  base = name.rsplit("/", 1)[-1]
+  return not base.startswith(".") and base.lower().endswith((".html", ".htm"))
+
+def needs_zstd(fp: str) -> bool:
+  return fp.lower().endswith((".zst", ".tzst"))
+
+def decode_html(data: bytes) -> str:
+  """Same text Path.read_text(encoding="utf-8", errors="ignore") gives for these bytes."""
+  text = data.decode("utf-8", errors="ignore")
+  return text.replace("\r\n", "\n").replace("\r", "\n") if "\r" in text else text
+
+@contextlib.contextmanager
+def open_tar(fp: str):
+  """Streaming (forward-only) tarfile over a plain, gzip or zstd tarball."""
+  with contextlib.ExitStack() as stack:
+    if needs_zstd(fp):
+      raw = stack.enter_context(open(fp, "rb"))
+      fileobj = stack.enter_context(_zstd.ZstdDecompressor().stream_reader(raw))
+      yield stack.enter_context(tarfile.open(fileobj=fileobj, mode="r|"))
+    else:
+      yield stack.enter_context(tarfile.open(fp, mode="r|*"))
+
+def iter_tar_html(fp: str) -> Iterator[Tuple[int, tarfile.TarInfo, bytes]]:
+  """(position in the archive, member, bytes) for every .html/.htm file, in archive order."""
+  with open_tar(fp) as tf:
+    for i, m in enumerate(tf):
+      if m.isfile() and is_html_member(m.name):
+        f = tf.extractfile(m)
+        yield i, m, f.read() if f else b""
+
+def expand_inputs(paths: List[str], fingerprints: bool = False) -> Tuple[List[str], Dict[str, Tuple[int, Dict[str,Any]]]]:
+  """
+  Replace every tarball in `paths` by its html members ("<archive>::<member>"), listed in
+  one streaming pass. Returns the inputs plus, per member, (position in the archive,
+  manifest fingerprint); the hash is only computed when `fingerprints` is set.
+  A name that occurs twice in one tarball resolves to the later copy, as extraction would.
+  """
+  out: List[str] = []
+  members: Dict[str, Tuple[int, Dict[str,Any]]] = {}
+  seen = set()
+  for fp in paths:
+    if not is_archive(fp):
+      out.append(fp)
+      continue
+    key = str(Path(fp).resolve())
+    if key in seen:
+      continue
+    seen.add(key)
+    listed: Dict[str, Tuple[int, Dict[str,Any]]] = {}
+    for i, m, data in iter_tar_html(fp):
+      entry = {"hash": hashlib.sha256(data).hexdigest() if fingerprints else None,
+               "size": m.size, "mtime_ns": int(m.mtime) * 1_000_000_000}
+      listed[m.name] = (i, entry)
+    for name, val in sorted(listed.items(), key=lambda kv: kv[1][0]):
+      ref = f"{fp}{ARCHIVE_SEP}{name}"
+      out.append(ref)
+      members[ref] = val
+  return out, members
+
+def iter_html(fps: List[str], members: Dict[str, Tuple[int, Dict[str,Any]]]) -> Iterator[Tuple[str, Optional[str]]]:
+  """
+  (fp, text) for every input, in order. Archive members are read here, one streaming pass
+  per run of consecutive members of the same archive; loose files come back as
+  (fp, None) and are read by whoever parses them.
+  """
+  i = 0
+  while i < len(fps):
+    if fps[i] not in members:
+      yield fps[i], None
+      i += 1
+      continue
+    arc = fps[i].split(ARCHIVE_SEP, 1)[0]
+    j = i
+    while j < len(fps) and fps[j] in members and fps[j].split(ARCHIVE_SEP, 1)[0] == arc:
+      j += 1
+    wanted = {members[ref][0]: ref for ref in fps[i:j]}
+    found = 0
+    for pos, _, data in iter_tar_html(arc):
+      ref = wanted.get(pos)
+      if ref is not None:
+        found += 1
+        yield ref, decode_html(data)
+    if found != j - i:
+      raise RuntimeError(f"{arc} changed while it was being read ({found} of {j - i} members found)")
+    i = j
+
 # -----------------------------
 # Main parse
 # -----------------------------
@@ -1303,38 +1969,50 @@ class Extracted:
   review_count: Optional[int] = None
   customers_say: Optional[str] = None
   size_chart: Optional[Dict[str,Any]] = None
+  skipped: Dict[str,str] = field(default_factory=dict)   # stages cut short by the Budget
 
 
-def extract_btf_swatches_and_media(html: str) -> Tuple[Dict[str,str], Dict[str,List[str]], Dict[str,str]]:
-  btf=extract_imageblock_btf_data(html) or {}
+def extract_btf_swatches_and_media(ctx: PageContext) -> Tuple[Dict[str,str], Dict[str,List[str]], Dict[str,str]]:
+  btf=ctx.scan.btf or {}
   if not btf:
     return {}, {}, {}
   return extract_color_media_from_btf(btf)
 
-def parse_one(path: Path) -> Extracted:
-  html = path.read_text(encoding="utf-8", errors="ignore")
-  soup = BeautifulSoup(html, "html.parser")
+def read_html(path: Path) -> str:
+  suffix = path.suffix.lower()
+  if suffix == ".gz":
+    return decode_html(gzip.decompress(path.read_bytes()))
+  if suffix == ".zst":
+    with open(path, "rb") as f, _zstd.ZstdDecompressor().stream_reader(f) as r:
+      return decode_html(r.read())
+  return path.read_text(encoding="utf-8", errors="ignore")
+
+def parse_one(path: Path, parser: str = DEFAULT_PARSER, slim: bool = True, budget: Optional[Budget] = None, html: Optional[str] = None) -> Extracted:
+  """`html` is the page text when it was already read (archive members); otherwise path is read."""
+  run = PageRun(budget=budget, t0=time.perf_counter()) if budget is not None else None
+  if html is None:
+    html = read_html(path)
+  ctx = page_context(html, parser, slim, run)
 
   asin = extract_asin_from_filename(path)
   if not asin:
-    m = re.search(r'"asin"\s*:\s*"([A-Z0-9]{10})"', html)
-    asin = m.group(1) if m else "UNKNOWNASIN"
+    asin = ctx.scan.asin or "UNKNOWNASIN"
 
-  raw_title = extract_title(soup)
-  brand = extract_brand(soup)
-  price = extract_price(soup)
+  raw_title = extract_title(ctx)
+  brand = extract_brand(ctx)
+  price = extract_price(ctx)
 
   # If title missing but ASIN exists, synthesize a stable fallback
   if not raw_title and asin != "UNKNOWNASIN":
     raw_title = f"Product {asin}"
 
-  images = extract_images(soup, html)
+  images = budgeted(run, "extract_images", [], extract_images, ctx)
 
-  bullets = extract_bullets(soup)
-  specs = extract_specs(soup)
+  bullets = budgeted(run, "extract_bullets", [], extract_bullets, ctx)
+  specs = budgeted(run, "extract_specs", {}, extract_specs, ctx)
 
-  sizes, colors = extract_variations(soup)
-  category = extract_category(soup)
+  sizes, colors = budgeted(run, "extract_variations", ([], []), extract_variations, ctx)
+  category = extract_category(ctx)
   # If variation sizes look like shoe sizes but the title/category look like dresses/apparel,
   # drop them so we fall back to apparel sizes via infer_sizes().
   if sizes and _looks_like_shoe_sizes(sizes):
@@ -1350,11 +2028,12 @@ def parse_one(path: Path) -> Extracted:
   if not sizes:
     sizes = infer_sizes(raw_title, category, specs)
 
-  reviews = extract_reviews(soup)
-  review_avg, review_count = extract_review_summary(soup)
-  customers_say = extract_customers_say(soup)
+  reviews = budgeted(run, "extract_reviews", [], extract_reviews, ctx)
+  review_avg, review_count = budgeted(run, "extract_review_summary", (0.0, 0), extract_review_summary, ctx)
+  max_text = budget.text_kb * 1024 if budget is not None else None
+  customers_say = budgeted(run, "extract_customers_say", None, extract_customers_say, ctx, max_text)
 
-  size_chart = extract_size_chart(soup)
+  size_chart = budgeted(run, "extract_size_chart", None, extract_size_chart, ctx)
 
   # --------------------------------------------------
   # FALLBACK SIZE CHART (OPTION B)
@@ -1386,7 +2065,7 @@ def parse_one(path: Path) -> Extracted:
       }
 
   # Color + media from ImageBlock (unchanged)
-  btf_swatches, color_images_by_color, btf_color_image_key = extract_btf_swatches_and_media(html)
+  btf_swatches, color_images_by_color, btf_color_image_key = extract_btf_swatches_and_media(ctx)
 
   if color_images_by_color:
     # Ensure the final gallery contains at least one image per color,
@@ -1418,7 +2097,7 @@ def parse_one(path: Path) -> Extracted:
 
     images = out[:80]
 
-  color_swatches = extract_color_swatches(soup)
+  color_swatches = budgeted(run, "extract_color_swatches", {}, extract_color_swatches, ctx)
   if btf_swatches:
     merged = dict(color_swatches)
     merged.update(btf_swatches)
@@ -1452,7 +2131,7 @@ def parse_one(path: Path) -> Extracted:
     if k in img_keys:
       color_image_key[c] = k
 
-  aplus_images = extract_aplus_images(soup)
+  aplus_images = budgeted(run, "extract_aplus_images", [], extract_aplus_images, ctx)
   aplus_images = uniq_keep_order([force_hd_amazon_image_url(u) for u in aplus_images if u])
 
   gallery_norm = set(normalize_image_url(u) for u in images)
@@ -1466,7 +2145,7 @@ def parse_one(path: Path) -> Extracted:
     aplus_images = images[:]
 
 
-  videos = extract_videos(html)
+  videos = ctx.scan.videos
 
   return Extracted(
     asin=asin,
@@ -1489,6 +2168,7 @@ def parse_one(path: Path) -> Extracted:
     review_count=review_count,
     customers_say=customers_say,
     size_chart=size_chart,
+    skipped=run.skipped if run is not None else {},
   )
 
 def slugify(s: str) -> str:
@@ -1497,150 +2177,799 @@ def slugify(s: str) -> str:
   s=re.sub(r"-+","-",s).strip("-")
   return s or "product"
 
+def pop_opt(args: List[str], flag: str) -> Tuple[List[str], Optional[str]]:
+  """Remove `flag VALUE` from args (if present) and return (remaining_args, VALUE)."""
+  if flag in args:
+    i = args.index(flag)
+    if i + 1 < len(args):
+      return args[:i] + args[i+2:], args[i+1]
+  return args, None
+
+def pop_flag(args: List[str], flag: str) -> Tuple[List[str], bool]:
+  """Remove a boolean `flag` from args (if present) and return (remaining_args, present)."""
+  if flag in args:
+    return [a for a in args if a != flag], True
+  return args, False
+
 def parse_out_dir(argv: List[str]) -> Tuple[List[str], Path]:
   out_dir = Path("/Applications/product/static/products")
-  args = argv[1:]
-  if "--out" in args:
-    i = args.index("--out")
-    if i + 1 < len(args):
-      out_dir = Path(args[i+1])
-      args = args[:i] + args[i+2:]
+  args, val = pop_opt(argv[1:], "--out")
+  if val:
+    out_dir = Path(val)
   return args, out_dir
 
+def parse_workers(args: List[str]) -> Tuple[List[str], int]:
+  """--workers N fans parsing out over N processes (0 = one per core, default 1 = serial)."""
+  args, val = pop_opt(args, "--workers")
+  if val is None:
+    return args, 1
+  try:
+    n = int(val)
+  except ValueError:
+    n = 1
+  if n <= 0:
+    n = os.cpu_count() or 1
+  return args, max(1, n)
+
+ALIAS_MODES = ["copy", "symlink", "hardlink", "redirect"]
+
+def parse_alias_mode(args: List[str]) -> Tuple[List[str], str]:
+  """--alias MODE: how <ASIN>.json points at <handle>.json (see write_alias)."""
+  args, val = pop_opt(args, "--alias")
+  return args, (val or "copy")
+
+def parse_cross_sell_mode(args: List[str]) -> Tuple[List[str], str]:
+  """--cross-sells random|ranked (see attach_cross_sells)."""
+  args, val = pop_opt(args, "--cross-sells")
+  return args, (val or "random")
+
+def parse_parser(args: List[str]) -> Tuple[List[str], str]:
+  """--parser BACKEND selects the bs4 tree builder (see PARSER_BACKENDS)."""
+  args, val = pop_opt(args, "--parser")
+  return args, (val or DEFAULT_PARSER)
+
 def sku_from_index(i: int) -> str:
   return f"JC{1000 + i}"
 
-def main(argv: List[str]) -> int:
-  html_files, out_dir = parse_out_dir(argv)
-  if not html_files:
-    print("Usage: amazon_html_to_pdp_json_v12.py [--out OUT_DIR] <html1> <html2> ...")
-    return 2
+def build_product(fp: str, parser: str = DEFAULT_PARSER, slim: bool = True, budget: Optional[Budget] = None, html: Optional[str] = None) -> Tuple[str, Optional[Dict[str,Any]], Dict[str,str]]:
+  """
+  Parse one HTML file into (fp, product record, stages skipped by the budget).
+  Runs in pool workers, so it must not depend on run order: `sku` is left as None
+  and assigned by main() in input order.
+  """
+  path=Path(fp)
+  ex=parse_one(path, parser, slim, budget, html)
 
-  out_dir.mkdir(parents=True, exist_ok=True)
+  if ex.asin == "UNKNOWNASIN":
+    return fp, None, ex.skipped
 
-  products=[]
-  asin_map={}
-  index=[]
+  rewritten_title = rewrite_title_v4(ex.asin, ex.title, ex.brand, ex.category)
+  rewritten_title = sanitize_title_regex(rewritten_title)
 
-  sku_i = 0  # increments only when we write a product
+  # stable handle: prefer rewritten title, but ensure not "product"
+  handle = slugify(rewritten_title)
+  if handle == "product":
+    handle = slugify(f"{rewritten_title} {ex.asin}")
+
+  bought = social_proof_bought_past_month(ex.asin)
+
+  about = about_this_item_200(ex.asin, rewritten_title, ex.bullets, ex.specs)
+
+  cat_parts = parse_category_path(ex.category)
+  cat_slug = category_slug_from_path(cat_parts)
+  cat_leaf = (cat_parts[-1] if cat_parts else "")
+
+  long_blocks = build_long_description_blocks(
+    seed=ex.asin,
+    title=rewritten_title,
+    bullets=ex.bullets,
+    specs=ex.specs,
+    sizes=ex.sizes,
+    colors=ex.colors,
+    aplus_images=ex.aplus_images,
+  )
+  long_description = "\n\n".join([b.get("text","") for b in long_blocks if b.get("type")=="p"]).strip()
+  iv = root_module("image_variants")
+
+  prod={
+    "id": handle,
+    "handle": handle,
+    "sku": None,
+    "asin": ex.asin,
+
+    "title": rewritten_title,
+    "title_original": ex.title,
+    "brand": ex.brand,
+
+    "price": ex.price,
+    "social_proof": {"bought_past_month": bought, "text": f"{bought}+ bought in the past month"},
+
+    # strict image buckets
+    "images": ex.images,                 # backward compat (gallery)
+    "gallery_images": ex.images,
+    "image_records": [iv.record(u) for u in ex.images],   # key + ._SL160/320/640/1500_ variants
+    "aplus_images": ex.aplus_images,
+    "description_images": ex.aplus_images,
+
+    "bullets": ex.bullets,
+    "specs": ex.specs,
+    "category": ex.category,
+    "category_path": cat_parts,
+    "category_slug": cat_slug,
+    "category_leaf": cat_leaf,
+
+    "variations": {
+      "sizes": ex.sizes,
+      "colors": ex.colors,
+      "size_chart": ex.size_chart,
+    },
+
+    "reviews": {
+      "average_rating": ex.review_avg,
+      "count": ex.review_count,
+      "customers_say": ex.customers_say,
+      "items": ex.reviews,
+    },
+
+    "short_description": about,
+    "about_this_item": about,
+
+    "long_description": long_description,
+    "long_description_blocks": long_blocks,
+
+    "videos": ex.videos,
+
+    "color_swatches": {c: iv.variant(u, iv.SWATCH_WIDTH) for c, u in ex.color_swatches.items()},
+    "color_image_key": ex.color_image_key,
+    "color_images": ex.color_images,
+  }
+  return fp, prod, ex.skipped
+
+# -----------------------------
+# Profiling (--profile)
+# -----------------------------
+# Stage functions are swapped for timing wrappers only when profiling is enabled, so a
+# normal run pays nothing. Stage times are inclusive: scan_page_scripts, slim_html,
+# make_soup and build_page_context run inside page_context, extract_videos_vse inside
+# scan_page_scripts.
+PROFILED_STAGES = [
+  ("read_html", "read_html"),
+  ("page_context", "page_context"),
+  ("slim_html", "slim_html"),
+  ("make_soup", "make_soup"),
+  ("build_page_context", "build_page_context"),
+  ("scan_page_scripts", "scan_page_scripts"),
+  ("extract_videos_vse", "_videos_vse_from_unescaped"),
+  ("extract_title", "extract_title"),
+  ("extract_brand", "extract_brand"),
+  ("extract_price", "extract_price"),
+  ("extract_images", "extract_images"),
+  ("extract_bullets", "extract_bullets"),
+  ("extract_specs", "extract_specs"),
+  ("extract_variations", "extract_variations"),
+  ("extract_category", "extract_category"),
+  ("infer_sizes", "infer_sizes"),
+  ("extract_reviews", "extract_reviews"),
+  ("extract_review_summary", "extract_review_summary"),
+  ("extract_customers_say", "extract_customers_say"),
+  ("extract_size_chart", "extract_size_chart"),
+  ("extract_btf_swatches_and_media", "extract_btf_swatches_and_media"),
+  ("extract_color_swatches", "extract_color_swatches"),
+  ("extract_aplus_images", "extract_aplus_images"),
+  ("parse_one", "parse_one"),
+  ("rewrite_title", "rewrite_title_v4"),
+  ("about_this_item", "about_this_item_200"),
+]
+
+_stage_times: Optional[Dict[str,float]] = None   # None = profiling off
+
+def _timed(label: str, fn):
+  @functools.wraps(fn)
+  def wrapper(*args, **kwargs):
+    t0 = time.perf_counter()
+    try:
+      return fn(*args, **kwargs)
+    finally:
+      if _stage_times is not None:
+        _stage_times[label] = _stage_times.get(label, 0.0) + time.perf_counter() - t0
+  return wrapper
+
+def enable_profiling() -> None:
+  """Idempotent; also called inside pool workers (a spawned worker starts unpatched)."""
+  global _stage_times
+  if _stage_times is not None:
+    return
+  _stage_times = {}
+  g = globals()
+  for label, name in PROFILED_STAGES:
+    g[name] = _timed(label, g[name])
+
+def take_stage_times() -> Dict[str,float]:
+  """Stage times accumulated since the last call (and reset)."""
+  global _stage_times
+  out = _stage_times or {}
+  if _stage_times is not None:
+    _stage_times = {}
+  return out
+
+def profiled_build_product(fp: str, parser: str = DEFAULT_PARSER, slim: bool = True, budget: Optional[Budget] = None, html: Optional[str] = None) -> Tuple[str, Optional[Dict[str,Any]], Dict[str,str], Dict[str,float]]:
+  enable_profiling()
+  take_stage_times()
+  t0 = time.perf_counter()
+  fp, prod, skipped = build_product(fp, parser, slim, budget, html)
+  times = take_stage_times()
+  times["build_product"] = time.perf_counter() - t0
+  return fp, prod, skipped, times
+
+def profiled_render_json(p: Any, compact: bool = False, split: bool = False, lean: bool = False) -> Tuple[Any, float]:
+  t0 = time.perf_counter()
+  txt = render_product(p, compact, split, lean)
+  return txt, time.perf_counter() - t0
+
+def percentile(sorted_vals: List[float], q: float) -> float:
+  """Nearest-rank percentile of an ascending list."""
+  if not sorted_vals:
+    return 0.0
+  return sorted_vals[min(len(sorted_vals) - 1, max(0, math.ceil(q * len(sorted_vals)) - 1))]
 
+@dataclass
+class ProfileReport:
+  files: Dict[str, Dict[str,float]]   # input file -> stage -> seconds
+  run: Dict[str,float]                # whole-run stages (cross-sells, index files, wall)
+  sizes: Dict[str,int] = field(default_factory=dict)   # archive member -> bytes, as read from the tarball
+
+  def add(self, fp: str, times: Dict[str,float], size: Optional[int] = None) -> None:
+    if size is not None:
+      self.sizes[fp] = size
+    stages = self.files.setdefault(fp, {})
+    for k, v in times.items():
+      stages[k] = stages.get(k, 0.0) + v
+
+  def to_json(self, top: int) -> Dict[str,Any]:
+    per_stage: Dict[str, List[float]] = {}
+    for stages in self.files.values():
+      for k, v in stages.items():
+        per_stage.setdefault(k, []).append(v)
+    summary = {}
+    for k, vals in per_stage.items():
+      vals.sort()
+      summary[k] = {
+        "count": len(vals),
+        "total_ms": round(sum(vals) * 1000, 3),
+        "p50_ms": round(percentile(vals, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(vals, 0.95) * 1000, 3),
+        "max_ms": round(vals[-1] * 1000, 3),
+      }
+    summary = dict(sorted(summary.items(), key=lambda kv: -kv[1]["total_ms"]))
+
+    def file_total(stages: Dict[str,float]) -> float:
+      return stages.get("build_product", 0.0) + stages.get("render_json", 0.0) + stages.get("write", 0.0)
+
+    def file_bytes(fp: str) -> Optional[int]:
+      if fp in self.sizes:
+        return self.sizes[fp]
+      return os.path.getsize(fp) if os.path.exists(fp) else None
+
+    slowest = sorted(self.files.items(), key=lambda kv: -file_total(kv[1]))[:top]
+    return {
+      "files": len(self.files),
+      "run_ms": {k: round(v * 1000, 3) for k, v in self.run.items()},
+      "stages": summary,
+      "slowest": [
+        {
+          "file": fp,
+          "bytes": file_bytes(fp),
+          "total_ms": round(file_total(stages) * 1000, 3),
+          "stages_ms": {k: round(v * 1000, 3) for k, v in sorted(stages.items(), key=lambda kv: -kv[1])},
+        }
+        for fp, stages in slowest
+      ],
+    }
+
+# -----------------------------
+# Incremental re-import (content-hash manifest)
+# -----------------------------
+MANIFEST_NAME = "_manifest.json"
+
+def parser_version(parser: str) -> str:
+  """
+  Changes whenever this file, a ROOT_MODULES helper or the backend changes, so an edited
+  extractor (or record builder) invalidates every entry.
+  """
+  h = hashlib.sha256(Path(__file__).read_bytes())
+  for name in ROOT_MODULES:
+    try:
+      h.update(name.encode() + b"\0" + (REPO_ROOT / f"{name}.py").read_bytes())
+    except OSError:
+      pass
+  return f"v15-{h.hexdigest()[:16]}-{parser}"
+
+def manifest_key(fp: str) -> str:
+  arc, sep, member = fp.partition(ARCHIVE_SEP)
+  if sep and is_archive(arc):
+    return str(Path(arc).resolve()) + sep + member
+  return str(Path(fp).resolve())
+
+def file_fingerprint(fp: str, prev: Optional[Dict[str,Any]]) -> Dict[str,Any]:
+  """size + mtime + sha256; the hash is reused when size and mtime are unchanged."""
+  st = os.stat(fp)
+  if prev and prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns and prev.get("hash"):
+    digest = prev["hash"]
+  else:
+    digest = hashlib.sha256(Path(fp).read_bytes()).hexdigest()
+  return {"hash": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def load_manifest(out_dir: Path) -> Dict[str, Dict[str,Any]]:
+  try:
+    data = json.loads((out_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+  except Exception:
+    return {}
+  files = data.get("files") if isinstance(data, dict) else None
+  return files if isinstance(files, dict) else {}
+
+def write_manifest(out_dir: Path, files: Dict[str, Dict[str,Any]]) -> None:
+  (out_dir / MANIFEST_NAME).write_text(json.dumps({"files": files}, indent=2, ensure_ascii=False), encoding="utf-8")
+
+def load_previous_product(out_dir: Path, entry: Dict[str,Any]) -> Optional[Tuple[Dict[str,Any], str, str]]:
+  """
+  Reload the record an unchanged input produced last run (via its ASIN alias), minus the
+  run-dependent fields (sku, cross-sells) that main() recomputes.
+  Returns (prod, product_file_text, alias_file_text).
+  """
+  asin = entry.get("asin"); handle = entry.get("handle")
+  if not asin or not handle:
+    return None
+  try:
+    txt = alias_txt = (out_dir / f"{asin}.json").read_text(encoding="utf-8")
+    prod = json.loads(txt)
+  except Exception:
+    return None
+  if not isinstance(prod, dict) or prod.get("asin") != asin or prod.get("id") != handle:
+    return None
+  if "redirect" in prod and len(prod) <= 3:
+    # --alias redirect: the alias is a pointer record, the product lives in <handle>.json
+    try:
+      txt = (out_dir / f"{handle}.json").read_text(encoding="utf-8")
+      prod = json.loads(txt)
+    except Exception:
+      return None
+    if not isinstance(prod, dict) or prod.get("asin") != asin or prod.get("id") != handle:
+      return None
+  if "deferred" in prod and "schema" in prod:
+    # --split: the rest of the record is in deferred/<ASIN>.json
+    pdp_split = root_module("pdp_split")
+    if not pdp_split.is_split(prod):
+      return None
+    try:
+      rest = json.loads((out_dir / prod["deferred"]).read_text(encoding="utf-8"))
+    except Exception:
+      return None
+    if not isinstance(rest, dict) or rest.get("asin") != asin:
+      return None
+    prod = pdp_split.merge(prod, rest)
+  if "derived" in prod:
+    # --lean: rebuild the dropped copies, read the shared size chart back from OUT_DIR/assets
+    pdp_lean = root_module("pdp_lean")
+    chart_id = (prod.get("variations") or {}).get("size_chart_id")
+    prod = pdp_lean.expand(prod, pdp_lean.asset_loader(out_dir))
+    if chart_id and (prod.get("variations") or {}).get("size_chart") is None:
+      return None
+  return strip_run_fields(prod), txt, alias_txt
+
+def strip_run_fields(prod: Dict[str,Any]) -> Dict[str,Any]:
+  prod.pop("related", None)
+  prod.pop("customer_also_viewed", None)
+  prod["sku"] = None
+  return prod
+
+def plan_incremental(html_files: List[str], out_dir: Path, version: str,
+                     members: Optional[Dict[str, Tuple[int, Dict[str,Any]]]] = None,
+                     load_prev=None) -> Tuple[List[Any], Dict[str, Dict[str,Any]]]:
+  """
+  For each input: None (parse it), "skip" (known to have no ASIN) or the
+  load_previous_product() tuple to reuse (`load_prev(entry)` instead, e.g. with --store).
+  Archive members are fingerprinted from `members` (expand_inputs(..., fingerprints=True)).
+  Also returns the new manifest entries (minus asin/handle for inputs that get parsed).
+  """
+  members = members or {}
+  load_prev = load_prev or functools.partial(load_previous_product, out_dir)
+  old = load_manifest(out_dir)
+  files: Dict[str, Dict[str,Any]] = {}
+  plan: List[Any] = []
+
+  # Two inputs sharing an ASIN share one alias file, so neither can be reloaded safely.
+  asin_counts: Dict[str,int] = {}
   for fp in html_files:
-    path=Path(fp)
-    ex=parse_one(path)
+    a = (old.get(manifest_key(fp)) or {}).get("asin")
+    if a:
+      asin_counts[a] = asin_counts.get(a, 0) + 1
 
-    if ex.asin == "UNKNOWNASIN":
-      print(f"⚠️ Skipping {path}: missing ASIN")
+  for fp in html_files:
+    key = manifest_key(fp)
+    prev = old.get(key)
+    entry = {**(members[fp][1] if fp in members else file_fingerprint(fp, prev)), "parser": version}
+    files[key] = entry
+    if not prev or prev.get("hash") != entry["hash"] or prev.get("parser") != version:
+      plan.append(None)
+      continue
+    if not prev.get("asin"):
+      entry.update(asin=None, handle=None)
+      plan.append("skip")
       continue
+    loaded = None if asin_counts.get(prev["asin"], 0) > 1 else load_prev(prev)
+    if loaded:
+      entry.update(asin=prev["asin"], handle=prev["handle"])
+    plan.append(loaded)
+  return plan, files
 
-    rewritten_title = rewrite_title_v4(ex.asin, ex.title, ex.brand, ex.category)
-    rewritten_title = sanitize_title_regex(rewritten_title)
+# -----------------------------
+# Output writing
+# -----------------------------
+# write_file / write_alias live in product_files.py, shared with catalog_store.py export.
+def write_file(path: Path, text: str) -> None:
+  """Write via temp file + rename: readers never see a torn file, and a hardlinked alias is never written through."""
+  root_module("product_files").write_file(path, text)
 
-    # stable handle: prefer rewritten title, but ensure not "product"
-    handle = slugify(rewritten_title)
-    if handle == "product":
-      handle = slugify(f"{rewritten_title} {ex.asin}")
+def write_alias(out_dir: Path, p: Dict[str,Any], text: str, mode: str, unchanged: bool = False,
+                shared: bool = False) -> None:
+  """
+  <ASIN>.json for a product whose canonical file is <handle>.json, in one of ALIAS_MODES
+  (copy, symlink, hardlink, redirect; see product_files.write_alias). symlink / redirect
+  fall back to a copy when the handle is `shared` with another product or the handle file
+  holds other text. `unchanged` says the existing alias file already holds `text`.
+  """
+  root_module("product_files").write_alias(out_dir, p["id"], p["asin"], text, mode,
+                                           unchanged=unchanged, shared=shared)
 
-    out_path = out_dir / f"{handle}.json"
+def render_json(p: Any, compact: bool = False, sort_keys: bool = False) -> str:
+  """indent=2 by default; compact (--compact): no whitespace and sorted keys, so equal data gives equal bytes."""
+  if compact:
+    return json.dumps(p, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+  return json.dumps(p, indent=2, ensure_ascii=False, sort_keys=sort_keys)
 
-    bought = social_proof_bought_past_month(ex.asin)
+def render_product(p: Dict[str,Any], compact: bool = False, split: bool = False, lean: bool = False) -> Any:
+  """
+  render_json(p), or with split (--split) / lean (--lean) a tuple (product text, deferred
+  part text or None, {shared asset path: text}): lean first drops the derivable copies and
+  moves the size chart to a shared asset (pdp_lean.py), split then cuts the record in two
+  (pdp_split.py).
+  """
+  if not split and not lean:
+    return render_json(p, compact)
+  assets: Dict[str,str] = {}
+  if lean:
+    p, shared = root_module("pdp_lean").lean(p)
+    assets = {rel: render_json(a, compact, sort_keys=True) for rel, a in shared.items()}
+  if not split:
+    return render_json(p, compact), None, assets
+  critical, deferred = root_module("pdp_split").split(p)
+  return render_json(critical, compact), render_json(deferred, compact, sort_keys=True), assets
+
+def write_deferred(out_dir: Path, p: Dict[str,Any], text: str) -> bool:
+  """deferred/<ASIN>.json of a --split product; left alone (mtime included) when unchanged."""
+  return write_if_changed(out_dir / root_module("pdp_split").deferred_path(p), text)
+
+def write_if_changed(path: Path, text: str) -> bool:
+  """Writes text to path (creating its directory) unless it already holds exactly that text."""
+  try:
+    if path.read_text(encoding="utf-8") == text:
+      return False
+  except OSError:
+    path.parent.mkdir(parents=True, exist_ok=True)
+  write_file(path, text)
+  return True
 
-    about = about_this_item_200(ex.asin, rewritten_title, ex.bullets, ex.specs)
+# -----------------------------
+# Catalog store (--store DB)
+# -----------------------------
+STORE_BATCH = 500   # products per write transaction
 
-    cat_parts = parse_category_path(ex.category)
-    cat_slug = category_slug_from_path(cat_parts)
-    cat_leaf = (cat_parts[-1] if cat_parts else "")
+def open_catalog_store(path: str):
+  """catalog_store.CatalogStore on `path`; products go there instead of OUT_DIR/*.json."""
+  return root_module("catalog_store").CatalogStore(path)
 
-    long_blocks = build_long_description_blocks(
-      seed=ex.asin,
-      title=rewritten_title,
-      bullets=ex.bullets,
-      specs=ex.specs,
-      sizes=ex.sizes,
-      colors=ex.colors,
-      aplus_images=ex.aplus_images,
-    )
-    long_description = "\n\n".join([b.get("text","") for b in long_blocks if b.get("type")=="p"]).strip()
-
-    sku = sku_from_index(sku_i)
-    sku_i += 1
-
-    prod={
-      "id": out_path.stem,
-      "handle": out_path.stem,
-      "sku": sku,
-      "asin": ex.asin,
-
-      "title": rewritten_title,
-      "title_original": ex.title,
-      "brand": ex.brand,
-
-      "price": ex.price,
-      "social_proof": {"bought_past_month": bought, "text": f"{bought}+ bought in the past month"},
-
-      # strict image buckets
-      "images": ex.images,                 # backward compat (gallery)
-      "gallery_images": ex.images,
-      "aplus_images": ex.aplus_images,
-      "description_images": ex.aplus_images,
-
-      "bullets": ex.bullets,
-      "specs": ex.specs,
-      "category": ex.category,
-      "category_path": cat_parts,
-      "category_slug": cat_slug,
-      "category_leaf": cat_leaf,
-
-      "variations": {
-        "sizes": ex.sizes,
-        "colors": ex.colors,
-        "size_chart": ex.size_chart,
-      },
-
-      "reviews": {
-        "average_rating": ex.review_avg,
-        "count": ex.review_count,
-        "customers_say": ex.customers_say,
-        "items": ex.reviews,
-      },
-
-      "short_description": about,
-      "about_this_item": about,
-
-      "long_description": long_description,
-      "long_description_blocks": long_blocks,
-
-      "videos": ex.videos,
-
-      "color_swatches": ex.color_swatches,
-      "color_image_key": ex.color_image_key,
-      "color_images": ex.color_images,
-    }
+def load_stored_product(store, entry: Dict[str,Any]) -> Optional[Tuple[Dict[str,Any], str, str]]:
+  """load_previous_product() for --store: the record comes from the product's row."""
+  asin = entry.get("asin"); handle = entry.get("handle")
+  if not asin or not handle:
+    return None
+  txt = store.get_text(asin)
+  try:
+    prod = json.loads(txt) if txt is not None else None
+  except ValueError:
+    return None
+  if not isinstance(prod, dict) or prod.get("asin") != asin or prod.get("id") != handle:
+    return None
+  return strip_run_fields(prod), txt, txt
 
-    out_path.write_text(json.dumps(prod, indent=2, ensure_ascii=False), encoding="utf-8")
-    print(f"✅ Generated {out_path}")
+def pool_map(pool, fn, items: List[Any], workers: int):
+  """Ordered map: lazily over a process pool when one is given, in-process otherwise."""
+  if pool is None:
+    return map(fn, items)
+  chunksize = max(1, min(32, len(items) // (workers * 4)))
+  return pool.imap(fn, items, chunksize)
 
-    alias=out_dir / f"{ex.asin}.json"
-    alias.write_text(json.dumps(prod, indent=2, ensure_ascii=False), encoding="utf-8")
-    print(f"✅ Alias {alias}")
+def pool_map_bounded(pool, fn, items: Iterator[Any], workers: int) -> Iterator[Any]:
+  """
+  pool_map over a lazy iterator (archive members carry their text) with at most
+  workers * 8 items in flight, so a big tarball is never pulled into memory at once.
+  """
+  if pool is None:
+    yield from map(fn, items)
+    return
+  slots = threading.Semaphore(workers * 8)
+  stop = threading.Event()
+
+  def feed():
+    # runs in the pool's task-feeder thread
+    for it in items:
+      while not slots.acquire(timeout=0.2):
+        if stop.is_set():
+          return
+      yield it
 
-    products.append(prod)
-    asin_map[ex.asin]=prod["id"]
-    index.append({"id": prod["id"], "asin": ex.asin, "sku": prod["sku"], "title": prod["title"]})
+  try:
+    for out in pool.imap(fn, feed()):
+      slots.release()
+      yield out
+  finally:
+    stop.set()
+
+def build_item(item: Tuple[str, Optional[str]], build=None, **kw):
+  """Pool adapter: (fp, text or None) from iter_html() -> build(fp, html=text, **kw)."""
+  fp, html = item
+  return build(fp, html=html, **kw)
+
+def compare_parsers(html_files: List[str], parsers: List[str]) -> int:
+  """
+  Parity check: build every product with each backend, with and without pre-parse
+  slimming, and compare the rendered JSON against the first backend on the full page.
+  Prints one line per mismatch, returns 1 if any.
+  """
+  for name in parsers:
+    if not parser_available(name):
+      print(f"❌ Parser backend {name!r} is not installed")
+      return 2
+
+  base = parsers[0]
+  others = [(name, False) for name in parsers[1:]] + [(name, True) for name in parsers]
+  label = lambda name, slim: name + ("+slim" if slim else "")
+  html_files, members = expand_inputs(html_files)
+  bad = 0
+  for fp, html in iter_html(html_files, members):
+    _, ref, _ = build_product(fp, base, slim=False, html=html)
+    for name, slim in others:
+      _, got, _ = build_product(fp, name, slim=slim, html=html)
+      if render_json(ref) == render_json(got):
+        continue
+      bad += 1
+      keys = sorted(k for k in set(ref or {}) | set(got or {}) if (ref or {}).get(k) != (got or {}).get(k))
+      print(f"❌ {fp}: {base} vs {label(name, slim)} differ in {', '.join(keys) or 'presence'}")
 
-  attach_cross_sells(products)
+  total = len(html_files) * len(others)
+  print(f"{'✅' if not bad else '❌'} Parser parity: {total - bad}/{total} identical "
+        f"({base} vs {', '.join(label(n, sl) for n, sl in others)})")
+  return 1 if bad else 0
 
-  for p in products:
-    pth=out_dir / f"{p['id']}.json"
-    pth.write_text(json.dumps(p, indent=2, ensure_ascii=False), encoding="utf-8")
-    asn=p.get("asin","")
-    if asn:
-      (out_dir / f"{asn}.json").write_text(json.dumps(p, indent=2, ensure_ascii=False), encoding="utf-8")
+def main(argv: List[str]) -> int:
+  html_files, out_dir = parse_out_dir(argv)
+  html_files, workers = parse_workers(html_files)
+  html_files, parser = parse_parser(html_files)
+  html_files, compare = pop_opt(html_files, "--compare-parsers")
+  html_files, incremental = pop_flag(html_files, "--incremental")
+  html_files, alias_mode = parse_alias_mode(html_files)
+  html_files, cross_mode = parse_cross_sell_mode(html_files)
+  html_files, profile = pop_flag(html_files, "--profile")
+  html_files, profile_top = pop_opt(html_files, "--profile-top")
+  html_files, no_slim = pop_flag(html_files, "--no-slim")
+  html_files, store_path = pop_opt(html_files, "--store")
+  html_files, compact = pop_flag(html_files, "--compact")
+  html_files, precompress = pop_flag(html_files, "--precompress")
+  html_files, split = pop_flag(html_files, "--split")
+  html_files, lean = pop_flag(html_files, "--lean")
+  try:
+    html_files, budget = parse_budget(html_files)
+  except ValueError as e:
+    print(f"❌ --budget: {e}")
+    return 2
+  if not html_files:
+    print("Usage: amazon_html_to_pdp_json_v15.py [--out OUT_DIR] [--workers N] [--parser html.parser|lxml] [--no-slim] [--incremental]")
+    print("         [--alias copy|symlink|hardlink|redirect] [--cross-sells random|ranked] [--store DB]")
+    print("         [--compact] [--precompress] [--split] [--lean]")
+    print("         [--budget on|stage_s=10,page_s=60,dom_mb=8,text_kb=64] [--profile [--profile-top N]] <html1> <html2> ...")
+    print("       amazon_html_to_pdp_json_v15.py --compare-parsers html.parser,lxml <html1> <html2> ...")
+    print("       inputs may also be x.html.gz / x.html.zst files and .tar/.tar.gz/.tgz/.tar.zst/.tzst bundles")
+    return 2
+
+  if _zstd is None and any(needs_zstd(fp) for fp in html_files):
+    print("❌ .zst inputs need the zstandard package (pip install zstandard)")
+    return 2
+
+  if compare:
+    return compare_parsers(html_files, [x.strip() for x in compare.split(",") if x.strip()])
+
+  if split and store_path:
+    print("❌ --split applies to the product files; with --store split on export (catalog_store.py export --split)")
+    return 2
+
+  if lean and store_path:
+    print("❌ --lean applies to the product files; the store keeps full records (catalog_store.py export --lean)")
+    return 2
+
+  if alias_mode not in ALIAS_MODES:
+    print(f"❌ Unknown --alias mode {alias_mode!r} (choose from {', '.join(ALIAS_MODES)})")
+    return 2
+
+  if cross_mode not in CROSS_SELL_MODES:
+    print(f"❌ Unknown --cross-sells mode {cross_mode!r} (choose from {', '.join(CROSS_SELL_MODES)})")
+    return 2
+
+  if not parser_available(parser):
+    print(f"❌ Parser backend {parser!r} is not available (choose from {', '.join(PARSER_BACKENDS)})")
+    return 2
+
+  out_dir.mkdir(parents=True, exist_ok=True)
+
+  # --profile: per-file stage timings -> OUT_DIR/_profile.json
+  prof = ProfileReport(files={}, run={}) if profile else None
+  t_run = time.perf_counter()
+  if prof is not None:
+    enable_profiling()
+
+  products=[]
+  sources: List[str] = []   # products index -> input file
+  asin_map={}
+  index=[]
+
+  sku_i = 0  # increments only when we write a product
+
+  n_inputs = len(html_files)
+  try:
+    html_files, members = expand_inputs(html_files, fingerprints=incremental)
+  except (tarfile.TarError, OSError, EOFError) as e:
+    print(f"❌ Can't read archive: {type(e).__name__}: {e}")
+    return 2
+  if members:
+    print(f"📦 {len(members)} pages in {n_inputs - (len(html_files) - len(members))} archive(s)")
+
+  # --store: products are upserted into the catalog store in batched transactions instead
+  # of being written as OUT_DIR/<handle>.json + aliases (catalog_store.py export writes those);
+  # the index files below still go to OUT_DIR.
+  store = open_catalog_store(store_path) if store_path else None
+  store_batch: List[Tuple[str,str,str]] = []
+  stored = 0
+  assets_seen: set = set()   # --lean shared assets already written this run
+
+  # --incremental: unchanged inputs (same bytes, same parser version) are not parsed;
+  # their previous records are reloaded so sku numbering, cross-sells and the index
+  # files come out exactly as a full run would produce them.
+  if incremental:
+    load_prev = functools.partial(load_stored_product, store) if store is not None else None
+    plan, manifest = plan_incremental(html_files, out_dir, parser_version(parser), members, load_prev)
+  else:
+    plan, manifest = [None] * len(html_files), {}
+  todo = [fp for fp, step in zip(html_files, plan) if step is None]
+  prev_text: Dict[int, str] = {}   # products index -> <handle>.json text from last run
+  prev_alias: Dict[int, str] = {}  # products index -> <ASIN>.json text from last run
+  degraded: Dict[str, Dict[str,str]] = {}   # input file -> stages the budget cut short
+
+  # Workers only parse + render; everything order-dependent (sku numbering,
+  # handle collisions = last write wins, index files) stays here in input order.
+  pool = multiprocessing.Pool(workers) if workers > 1 and len(todo) > 1 else None
+  parsed = None
+  try:
+    build = profiled_build_product if prof is not None else build_product
+    parsed = pool_map_bounded(pool, functools.partial(build_item, build=build, parser=parser, slim=not no_slim, budget=budget),
+                              iter_html(todo, members), workers)
+    for fp, step in zip(html_files, plan):
+      if step is None:
+        item = next(parsed)
+        fp, prod = item[0], item[1]
+        if item[2]:
+          degraded[fp] = item[2]
+          print(f"⏳ Budget: {Path(fp)}: " + ", ".join(f"{k} ({v})" for k, v in item[2].items()))
+        if prof is not None:
+          prof.add(fp, item[3], size=members[fp][1]["size"] if fp in members else None)
+        if incremental:
+          if item[2]:
+            # over budget: leave it out of the manifest so the next run parses it again
+            manifest.pop(manifest_key(fp), None)
+          else:
+            manifest[manifest_key(fp)].update(asin=prod and prod["asin"], handle=prod and prod["id"])
+      elif step == "skip":
+        prod = None
+      else:
+        prod, txt, alias_txt = step
+        prod["sku"] = sku_from_index(sku_i)
+        sku_i += 1
+        prev_text[len(products)] = txt
+        prev_alias[len(products)] = alias_txt
+        print(f"♻️ Unchanged {Path(fp)}")
+        products.append(prod)
+        sources.append(fp)
+        asin_map[prod["asin"]]=prod["id"]
+        index.append({"id": prod["id"], "asin": prod["asin"], "sku": prod["sku"], "title": prod["title"]})
+        continue
 
+      if prod is None:
+        print(f"⚠️ Skipping {Path(fp)}: missing ASIN")
+        continue
+
+      prod["sku"] = sku_from_index(sku_i)
+      sku_i += 1
+
+      products.append(prod)
+      sources.append(fp)
+      asin_map[prod["asin"]]=prod["id"]
+      index.append({"id": prod["id"], "asin": prod["asin"], "sku": prod["sku"], "title": prod["title"]})
+
+    t0 = time.perf_counter()
+    attach_cross_sells(products, cross_mode)
+    if prof is not None:
+      prof.run["attach_cross_sells"] = time.perf_counter() - t0
+
+    handle_counts: Dict[str,int] = {}
+    for p in products:
+      handle_counts[p["id"]] = handle_counts.get(p["id"], 0) + 1
+
+    # Each product is serialized exactly once, after cross-sells are final.
+    render = functools.partial(profiled_render_json if prof is not None else render_product, compact=compact, split=split, lean=lean)
+    for i, (p, txt) in enumerate(zip(products, pool_map(pool, render, products, workers))):
+      if prof is not None:
+        txt, dt = txt
+        prof.add(sources[i], {"render_json": dt})
+        t0 = time.perf_counter()
+      # --split: txt is the critical part (<handle>.json + alias), deferred/<ASIN>.json gets the rest
+      # --lean: shared assets (assets/size_chart/<id>.json) are content-addressed, written once per run
+      txt, deferred_txt, assets = txt if split or lean else (txt, None, {})
+      if store is not None:
+        store_batch.append((p["asin"], p["id"], txt))
+        if len(store_batch) >= STORE_BATCH:
+          stored += store.put_texts(store_batch)
+          store_batch = []
+        if prof is not None:
+          prof.add(sources[i], {"write": time.perf_counter() - t0})
+        continue
+      pth=out_dir / f"{p['id']}.json"
+      # reused record whose final JSON did not change: leave the file (and its mtime) alone
+      unchanged = prev_text.get(i) == txt and handle_counts[p["id"]] == 1
+      if not unchanged:
+        write_file(pth, txt)
+        print(f"✅ Generated {pth}")
+      if p.get("asin"):
+        write_alias(out_dir, p, txt, alias_mode, unchanged=prev_alias.get(i) == txt,
+                    shared=handle_counts[p["id"]] > 1)
+      if deferred_txt is not None:
+        write_deferred(out_dir, p, deferred_txt)
+      for rel, asset_txt in assets.items():
+        if rel not in assets_seen:
+          assets_seen.add(rel)
+          write_if_changed(out_dir / rel, asset_txt)
+      if prof is not None:
+        prof.add(sources[i], {"write": time.perf_counter() - t0})
+    if store is not None:
+      if store_batch:
+        stored += store.put_texts(store_batch)
+      print(f"🗄️ Stored {len(products)} products in {store_path} ({stored} changed)")
+  finally:
+    if parsed is not None:
+      parsed.close()   # stops the member feeder before the pool shuts down
+    if pool is not None:
+      pool.close()
+      pool.join()
+    if store is not None:
+      store.close()
+
+
+  t_index = time.perf_counter()
 
   # Category index (for grouping without moving JSON files)
+  # cards carry the CARD_WIDTH variant of the first image + a srcset (image_variants.py)
+  iv = root_module("image_variants")
   cat_index: Dict[str, Any] = {}
   for p in products:
     slug = (p.get("category_slug") or "uncategorized").strip() or "uncategorized"
+    image = (p.get("images") or [None])[0]
     if slug not in cat_index:
       cat_index[slug] = {
         "slug": slug,
@@ -1654,21 +2983,58 @@ def main(argv: List[str]) -> int:
       "asin": p.get("asin"),
       "sku": p.get("sku"),
       "title": p.get("title"),
-      "image": (p.get("images") or [None])[0],
+      "image": iv.variant(image, iv.CARD_WIDTH) if image else None,
+      "image_srcset": iv.srcset(image) if image else "",
     })
     cat_index[slug]["count"] += 1
 
-  (out_dir / "_category_index.json").write_text(
-    json.dumps(cat_index, indent=2, ensure_ascii=False), encoding="utf-8"
-  )
+  (out_dir / "_category_index.json").write_text(render_json(cat_index, compact), encoding="utf-8")
   print(f"✅ Wrote {out_dir / '_category_index.json'}")
 
-  (out_dir / "_index.json").write_text(json.dumps(index, indent=2, ensure_ascii=False), encoding="utf-8")
+  (out_dir / "_index.json").write_text(render_json(index, compact), encoding="utf-8")
   print(f"✅ Wrote {out_dir / '_index.json'}")
 
-  (out_dir / "_asin_map.json").write_text(json.dumps(asin_map, indent=2, ensure_ascii=False), encoding="utf-8")
+  (out_dir / "_asin_map.json").write_text(render_json(asin_map, compact), encoding="utf-8")
   print(f"✅ Wrote {out_dir / '_asin_map.json'}")
 
+  if budget is not None:
+    by_stage: Dict[str,int] = {}
+    for skipped in degraded.values():
+      for k in skipped:
+        by_stage[k] = by_stage.get(k, 0) + 1
+    metrics = {
+      "budget": asdict(budget),
+      "parsed": len(todo),
+      "degraded": len(degraded),
+      "skipped_by_stage": dict(sorted(by_stage.items(), key=lambda kv: -kv[1])),
+      "files": degraded,
+    }
+    write_file(out_dir / "_extract_metrics.json", json.dumps(metrics, indent=2, ensure_ascii=False))
+    print(f"{'⚠️' if degraded else '✅'} Wrote {out_dir / '_extract_metrics.json'} ({len(degraded)} of {len(todo)} parsed pages over budget)")
+
+  if incremental:
+    write_manifest(out_dir, manifest)
+    print(f"✅ Wrote {out_dir / MANIFEST_NAME} ({len(html_files) - len(todo)} unchanged, {len(todo)} parsed)")
+
+  if prof is not None:
+    prof.run["index_files"] = time.perf_counter() - t_index
+
+  # --precompress: .gz/.br siblings + _assets.json content hashes for everything in OUT_DIR
+  if precompress:
+    t0 = time.perf_counter()
+    assets = root_module("static_assets")
+    assets.report(assets.precompress(out_dir), out_dir)
+    if prof is not None:
+      prof.run["precompress"] = time.perf_counter() - t0
+
+  if prof is not None:
+    prof.run["wall"] = time.perf_counter() - t_run
+    report = prof.to_json(int(profile_top or 20))
+    write_file(out_dir / "_profile.json", json.dumps(report, indent=2))
+    print(f"⏱️ Wrote {out_dir / '_profile.json'} ({report['files']} files, wall {report['run_ms']['wall']:.0f} ms)")
+    for name, st in list(report["stages"].items())[:8]:
+      print(f"   {name:32s} p50 {st['p50_ms']:8.2f} ms  p95 {st['p95_ms']:8.2f} ms  max {st['max_ms']:8.2f} ms")
+
   return 0
 
 if __name__=="__main__":
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the PDP importers over synthetic corpora (gen_pdp_corpus.py).
+
+  python3 bench_pdp.py [--sizes 100,1000,10000] [--versions v13,v14,v15] [--sample 200]
+                       [--corpus-dir DIR] [--out results.json] [--baseline old.json]
+                       [--tolerance 10] [--workers N] [generator knobs, see gen_pdp_corpus.py]
+
+For every corpus size and importer version:
+  main      - the importer's main() end-to-end into a scratch dir: wall time, pages/s,
+              MB/s and peak RSS (pool workers included)
+  parse_one - per-page p50/p95/max over the first --sample pages
+  stages    - v15 only: per extract_* timings via its --profile wrappers
+Each measurement runs in a fresh interpreter so RSS and caches don't leak between runs.
+Corpora are generated once per (size, spec) under --corpus-dir and reused. With
+--baseline, throughput/RSS/p50 deltas against an earlier results file are printed and
+the exit status is 1 if anything regressed by more than --tolerance percent.
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import amazon_html_to_pdp_json_v15 as v15
+import gen_pdp_corpus as gen
+
+HERE = Path(__file__).resolve().parent
+VERSIONS = {
+  "v13": "amazon_html_to_pdp_json_v13",
+  "v14": "amazon_html_to_pdp_json_v14",
+  "v15": "amazon_html_to_pdp_json_v15",
+}
+
+def peak_rss_mb() -> float:
+  """Peak RSS of this process and its waited-for children (ru_maxrss is KB on Linux, bytes on macOS)."""
+  unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+  own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  kids = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+  return max(own, kids) / unit
+
+def summarize_ms(vals: List[float]) -> Dict[str,float]:
+  vals = sorted(vals)
+  return {
+    "p50_ms": round(v15.percentile(vals, 0.50) * 1000, 3),
+    "p95_ms": round(v15.percentile(vals, 0.95) * 1000, 3),
+    "max_ms": round(vals[-1] * 1000, 3) if vals else 0.0,
+  }
+
+# -----------------------------
+# Child side (one measurement per fresh interpreter)
+# -----------------------------
+def child_main(module: str, files: List[str], workers: int) -> Dict[str,Any]:
+  mod = __import__(module)
+  out = tempfile.mkdtemp(prefix="bench_pdp_")
+  argv = ["bench", "--out", out]
+  if module == VERSIONS["v15"] and workers:
+    argv += ["--workers", str(workers)]
+  try:
+    with open(os.devnull, "w") as devnull:
+      stdout, sys.stdout = sys.stdout, devnull
+      try:
+        t0 = time.perf_counter()
+        mod.main(argv + files)
+        wall = time.perf_counter() - t0
+      finally:
+        sys.stdout = stdout
+  finally:
+    shutil.rmtree(out, ignore_errors=True)
+  mb = sum(os.path.getsize(f) for f in files) / (1024 * 1024)
+  return {
+    "wall_s": round(wall, 3),
+    "pages_per_s": round(len(files) / wall, 2),
+    "mb_per_s": round(mb / wall, 2),
+    "peak_rss_mb": round(peak_rss_mb(), 1),
+  }
+
+def child_parse(module: str, files: List[str]) -> Dict[str,Any]:
+  mod = __import__(module)
+  profiled = hasattr(mod, "enable_profiling")
+  if profiled:
+    mod.enable_profiling()
+  totals: List[float] = []
+  stages: Dict[str, List[float]] = {}
+  for f in files:
+    if profiled:
+      mod.take_stage_times()
+    t0 = time.perf_counter()
+    mod.parse_one(Path(f))
+    totals.append(time.perf_counter() - t0)
+    if profiled:
+      for k, v in mod.take_stage_times().items():
+        stages.setdefault(k, []).append(v)
+  out: Dict[str,Any] = {"pages": len(files), **summarize_ms(totals)}
+  if stages:
+    out["stages"] = {k: summarize_ms(v) for k, v in sorted(stages.items())}
+  return out
+
+def run_child(kind: str, module: str, files: List[str], workers: int) -> Dict[str,Any]:
+  with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+    json.dump(files, f)
+    list_path = f.name
+  try:
+    proc = subprocess.run(
+      [sys.executable, str(Path(__file__).resolve()), "--child", kind, module, list_path, str(workers)],
+      cwd=HERE, capture_output=True, text=True,
+    )
+  finally:
+    os.unlink(list_path)
+  if proc.returncode != 0:
+    raise RuntimeError(f"{module} {kind} failed:\n{proc.stderr[-2000:]}")
+  return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# -----------------------------
+# Parent side
+# -----------------------------
+def ensure_corpus(root: Path, n: int, spec: gen.CorpusSpec) -> List[str]:
+  d = root / f"n{n}-{spec.key()}"
+  marker = d / ".complete"
+  if not marker.exists():
+    shutil.rmtree(d, ignore_errors=True)
+    gen.generate(d, n, spec)
+    marker.write_text(json.dumps(asdict(spec)), encoding="utf-8")
+  return sorted(str(p) for p in d.glob("*.html"))
+
+def environment() -> Dict[str,Any]:
+  env: Dict[str,Any] = {
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "cpu_count": os.cpu_count(),
+  }
+  for pkg in ("bs4", "lxml"):
+    try:
+      env[pkg] = __import__(pkg).__version__
+    except Exception:
+      env[pkg] = None
+  return env
+
+# (metric path, higher is better)
+COMPARED = [(("main", "pages_per_s"), True), (("main", "peak_rss_mb"), False), (("parse_one", "p50_ms"), False)]
+
+def compare(results: List[Dict[str,Any]], baseline: Dict[str,Any], tolerance: float) -> int:
+  old = {(r["size"], r["version"]): r for r in baseline.get("results", [])}
+  regressions = 0
+  print("\nvs baseline:")
+  for r in results:
+    prev = old.get((r["size"], r["version"]))
+    if not prev:
+      continue
+    parts = []
+    for (section, key), higher_better in COMPARED:
+      a, b = prev.get(section, {}).get(key), r.get(section, {}).get(key)
+      if not a or b is None:
+        continue
+      delta = (b - a) / a * 100
+      worse = -delta if higher_better else delta
+      flag = ""
+      if worse > tolerance:
+        flag = " ❌"
+        regressions += 1
+      parts.append(f"{key} {delta:+.1f}%{flag}")
+    print(f"  {r['version']:4s} n={r['size']:<6d} " + "  ".join(parts))
+  return regressions
+
+def main(argv: List[str]) -> int:
+  args = argv[1:]
+  if args[:1] == ["--child"]:
+    kind, module, list_path, workers = args[1:5]
+    files = json.loads(Path(list_path).read_text(encoding="utf-8"))
+    res = child_main(module, files, int(workers)) if kind == "main" else child_parse(module, files)
+    print(json.dumps(res))
+    return 0
+
+  args, spec = gen.parse_spec(args)
+  args, sizes = v15.pop_opt(args, "--sizes")
+  args, versions = v15.pop_opt(args, "--versions")
+  args, sample = v15.pop_opt(args, "--sample")
+  args, corpus_dir = v15.pop_opt(args, "--corpus-dir")
+  args, out = v15.pop_opt(args, "--out")
+  args, baseline = v15.pop_opt(args, "--baseline")
+  args, tolerance = v15.pop_opt(args, "--tolerance")
+  args, workers = v15.pop_opt(args, "--workers")
+  if args:
+    print(f"Unknown arguments: {' '.join(args)}")
+    return 2
+
+  size_list = [int(x) for x in (sizes or "100,1000,10000").split(",")]
+  version_list = [x.strip() for x in (versions or "v15").split(",")]
+  unknown = [v for v in version_list if v not in VERSIONS]
+  if unknown:
+    print(f"❌ Unknown version(s): {', '.join(unknown)} (choose from {', '.join(VERSIONS)})")
+    return 2
+  root = Path(corpus_dir or Path(tempfile.gettempdir()) / "pdp_bench_corpus")
+  n_sample = int(sample or 200)
+
+  results: List[Dict[str,Any]] = []
+  for n in size_list:
+    files = ensure_corpus(root, n, spec)
+    mb = sum(os.path.getsize(f) for f in files) / (1024 * 1024)
+    print(f"\n== {n} pages ({mb:.1f} MB, spec {spec.key()})")
+    for ver in version_list:
+      module = VERSIONS[ver]
+      res: Dict[str,Any] = {"size": n, "version": ver}
+      res["main"] = run_child("main", module, files, int(workers or 0))
+      res["parse_one"] = run_child("parse", module, files[:n_sample], 0)
+      results.append(res)
+      m, p = res["main"], res["parse_one"]
+      print(f"  {ver}: main {m['wall_s']:.2f}s  {m['pages_per_s']:.1f} pages/s  {m['mb_per_s']:.1f} MB/s  "
+            f"peak RSS {m['peak_rss_mb']:.0f} MB | parse_one p50 {p['p50_ms']:.1f} ms  p95 {p['p95_ms']:.1f} ms")
+      for name, st in sorted(p.get("stages", {}).items(), key=lambda kv: -kv[1]["p50_ms"])[:6]:
+        print(f"       {name:32s} p50 {st['p50_ms']:8.2f} ms  p95 {st['p95_ms']:8.2f} ms")
+
+  # through JSON so tuples compare equal to a reloaded baseline's lists
+  report = {"env": environment(), "spec": json.loads(json.dumps(asdict(spec))), "sample": n_sample,
+            "workers": int(workers or 0), "results": results}
+  out_path = Path(out or f"bench_pdp_{time.strftime('%Y%m%d-%H%M%S')}.json")
+  out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+  print(f"\n✅ Wrote {out_path}")
+
+  if baseline:
+    prev = json.loads(Path(baseline).read_text(encoding="utf-8"))
+    if prev.get("spec") != report["spec"]:
+      print("⚠️  baseline was measured on a different corpus spec; deltas are not comparable")
+    if compare(results, prev, float(tolerance or 10)):
+      return 1
+  return 0
+
+if __name__ == "__main__":
+  raise SystemExit(main(sys.argv))
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scan_page_scripts() (one pass) vs the per-extractor raw-text searches it replaces.
+
+  python3 bench_script_scan.py [--repeat N] page1.html page2.html ...
+
+Also checks that both paths return identical results for every page.
+"""
+from __future__ import annotations
+
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import amazon_html_to_pdp_json_v15 as v15
+
+
+def separate_passes(html: str) -> Dict[str, Any]:
+  m = re.search(r'"asin"\s*:\s*"([A-Z0-9]{10})"', html)
+  return {
+    "atf_items": v15.extract_imageblock_atf_items(html),
+    "btf": v15.extract_imageblock_btf_data(html),
+    "dimension_values": v15.extract_json_object_after_marker(html, v15.DVDD_MARKER),
+    "image_urls": v15.extract_script_image_urls(html),
+    "videos": v15.extract_videos(html),
+    "asin": m.group(1) if m else "",
+  }
+
+def single_pass(html: str) -> Dict[str, Any]:
+  return vars(v15.scan_page_scripts(html))
+
+def best_of(fn, html: str, repeat: int) -> float:
+  best = float("inf")
+  for _ in range(repeat):
+    t0 = time.perf_counter()
+    fn(html)
+    best = min(best, time.perf_counter() - t0)
+  return best
+
+def main(argv: List[str]) -> int:
+  args, repeat = v15.pop_opt(argv[1:], "--repeat")
+  repeat_n = int(repeat or 5)
+  if not args:
+    print("Usage: bench_script_scan.py [--repeat N] <html1> <html2> ...")
+    return 2
+
+  total_old = total_new = 0.0
+  total_bytes = 0
+  mismatches = 0
+  for fp in args:
+    html = Path(fp).read_text(encoding="utf-8", errors="ignore")
+    old, new = separate_passes(html), single_pass(html)
+    if old != new:
+      mismatches += 1
+      diff = [k for k in old if old[k] != new.get(k)]
+      print(f"❌ {fp}: results differ in {', '.join(diff)}")
+
+    t_old = best_of(separate_passes, html, repeat_n)
+    t_new = best_of(single_pass, html, repeat_n)
+    total_old += t_old; total_new += t_new; total_bytes += len(html)
+    print(f"{Path(fp).name:40s} {len(html)/1024:8.1f} KB  separate {t_old*1000:8.2f} ms  single {t_new*1000:8.2f} ms  x{t_old/max(t_new,1e-9):.1f}")
+
+  mb = total_bytes / (1024 * 1024)
+  print(f"\nPages: {len(args)}  ({mb:.1f} MB)  mismatches: {mismatches}")
+  print(f"separate passes: {total_old:.3f} s  ({mb/max(total_old,1e-9):.1f} MB/s)")
+  print(f"single pass:     {total_new:.3f} s  ({mb/max(total_new,1e-9):.1f} MB/s)")
+  return 1 if mismatches else 0
+
+if __name__ == "__main__":
+  raise SystemExit(main(sys.argv))
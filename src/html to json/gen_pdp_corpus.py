@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Synthetic saved-PDP corpus for benchmarks (see bench_pdp.py).
+
+  python3 gen_pdp_corpus.py OUT_DIR N [--colors 1-12] [--btf-kb 0] [--reviews 0-14]
+                            [--aplus 0-4] [--videos 0-2] [--page-kb 120] [--seed 0]
+
+Pages carry the markup the v13-v15 extractors look for: title/byline/price/rating,
+feature bullets, spec tables, variation lists, reviews, A+ modules, VSE videos, the
+ImageBlockATF colorImages blob, a BTF jQuery.parseJSON payload and dimensionValuesDisplayData.
+Ranges are "min-max" (or a single number); every page is a pure function of (seed, index),
+so the same arguments always produce byte-identical corpora.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+import amazon_html_to_pdp_json_v15 as v15
+
+TITLES = [
+  "Sexy Bodycon Maxi Dress Off Shoulder Evening Gown",
+  "Womens Cocktail Dress V Neck Short Sleeve",
+  "Stiletto Platform Heeled Sandals Open Toe",
+  "Wide Leg Jumpsuit Sleeveless",
+  "Ribbed Knit Sweater Dress",
+  "Lace Bra and Panty Set",
+]
+
+@dataclass
+class CorpusSpec:
+  colors: Tuple[int,int] = (1, 12)     # colours in colorImages / the swatch list
+  btf_kb: int = 0                      # extra bytes in the BTF parseJSON payload
+  reviews: Tuple[int,int] = (0, 14)
+  aplus: Tuple[int,int] = (0, 4)       # A+ modules
+  videos: Tuple[int,int] = (0, 2)      # VSE videos
+  page_kb: int = 120                   # target page size (inline script/style filler)
+  seed: int = 0
+
+  def key(self) -> str:
+    """Short stable id, e.g. for a corpus cache directory name."""
+    return hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()[:10]
+
+def parse_range(val: str) -> Tuple[int,int]:
+  lo, _, hi = val.partition("-")
+  return int(lo), int(hi or lo)
+
+def img(key: str, mod: str = "_AC_SX679_") -> str:
+  return f"https://m.media-amazon.com/images/I/{key}.{mod}.jpg"
+
+def make_page(i: int, spec: CorpusSpec) -> Tuple[str, str]:
+  """(file name, html) for page i."""
+  r = random.Random(f"{spec.seed}:{i}")
+  pick = lambda rng: r.randint(rng[0], rng[1])
+  asin = "B0" + "".join(r.choice("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789") for _ in range(8))
+  title = TITLES[i % len(TITLES)] + (" Formal" if i % 4 == 0 else "")
+  colors = [f"Color {c}" for c in range(pick(spec.colors))]
+  tag = f"{spec.seed}x{i}"
+  keys = [f"{tag}K{j:03d}abc" for j in range(6)]
+
+  atf = [{"hiRes": img(k, "_AC_SL1500_"), "thumb": img(k, "_AC_US40_"), "large": img(k),
+          "main": {img(k, "_AC_SY879_"): [879, 600]}} for k in keys]
+  btf = {"colorImages": {c: [{"hiRes": img(f"{tag}C{ci}X{j}"), "thumb": img(f"{tag}C{ci}X{j}", "_SS40_"),
+                             "large": img(f"{tag}C{ci}X{j}")} for j in range(3)]
+                         for ci, c in enumerate(colors)}}
+  if spec.btf_kb:
+    btf["landingAsinColor"] = "x" * (spec.btf_kb * 1024)
+  btf_js = json.dumps(btf).replace("'", "\\'")
+  dvdd = {"size_name": ["S", "M", "L"] if i % 3 else ["6", "7", "8", "9", "10", "11"], "color_name": colors}
+
+  reviews = "".join(
+    f'<div data-hook="review" id="customer_review-R{tag}{k}"><a data-hook="review-title"><span>Great {k}</span></a>'
+    f'<i data-hook="review-star-rating"><span class="a-icon-alt">{4 + k % 2}.0 out of 5 stars</span></i>'
+    f'<span data-hook="review-date">Reviewed in the United States on March {k % 28 + 1}, 2024</span>'
+    f'<span data-hook="avp-badge">Verified Purchase</span><span class="a-profile-name">Amazon Customer</span>'
+    f'<span data-hook="review-body"><span>Body text {k} lovely fit and nice fabric.</span></span>'
+    f'<div class="review-image-tile"><img src="{img(f"{tag}REV{k}", "_SY88")}"></div></div>'
+    for k in range(pick(spec.reviews)))
+  aplus = "".join(
+    f'<div class="aplus-module"><img data-src="https://m.media-amazon.com/images/S/aplus-media-library-service-media/{tag}-{k}.__AC_SR166,182___.jpg"></div>'
+    for k in range(pick(spec.aplus)))
+  swatches = "".join(f'<li title="Click to select {c}"><img alt="{c}" src="{img(f"{tag}SW{ci}", "_SS36_")}"></li>'
+                     for ci, c in enumerate(colors))
+  videos = "".join(
+    f'<script>var v={{"videoURL":"https://m.media-amazon.com/images/S/vse-vms-transcoding-artifact-us-east-1-prod/{tag}v{k}/default.jobtemplate.hls.m3u8",'
+    f'"videoPreviewImageSrc":"{img(f"{tag}VP{k}")}"}};</script>'
+    for k in range(pick(spec.videos)))
+  customers_say = "" if i % 2 else (
+    '<div><h3>Customers say</h3><div data-testid="overall-summary"><p>Customers like the fit and quality of the dress, '
+    'saying it looks elegant. Customers mention the fabric is soft and comfortable to wear.</p></div></div>')
+  size_chart = "" if i % 4 else '<div id="a-popover-sizeGuide"><table><tr><td>S</td><td>4</td></tr></table></div>'
+
+  body = f'''<body>
+<div id="nav-main">nav stuff</div>
+<div id="wayfinding-breadcrumbs_feature_div"><ul><li>Clothing, Shoes &amp; Jewelry</li><li>›</li><li>Women</li><li>›</li><li>Clothing</li><li>›</li><li>Dresses</li></ul></div>
+<span id="productTitle">  {title}  </span>
+<a id="bylineInfo">Visit the Brand{i % 7} Store</a>
+<div id="corePrice_feature_div"><span class="a-price"><span class="a-offscreen">${20 + i % 80}.99</span></span></div>
+<div id="acrPopover"><span class="a-icon-alt">4.{i % 10} out of 5 stars</span></div><span id="acrCustomerReviewText">{1000 + i * 7:,} ratings</span>
+<div id="feature-bullets"><ul><li><span>Soft stretchy fabric for comfort {i}</span></li><li><span>Machine wash cold</span></li></ul></div>
+<table id="productDetails_techSpec_section_1"><tr><th>Fabric type</th><td>95% Polyester, 5% Spandex</td></tr></table>
+<div id="detailBullets_feature_div"><ul><li>Care instructions : Hand Wash Only</li><li>Department : Womens</li></ul></div>
+<div id="imgTagWrapperId"><img data-a-dynamic-image='{json.dumps({img(keys[0]): [679, 679]})}' src="{img(keys[0])}"></div>
+<div id="variation_color_name"><ul>{swatches}</ul></div>
+<div id="variation_size_name"><ul><li>S</li><li>M</li></ul></div>
+<select id="native_dropdown_selected_size_name"><option>Select</option><option>L</option></select>
+{size_chart}{aplus}{reviews}{customers_say}{videos}
+<script>P.when('A').register("ImageBlockATF", function(A){{ var data = {{ 'colorImages': {{ 'initial': {json.dumps(atf) if i % 6 else '[]'} }}, 'x':1 }}; }});</script>
+<script>var obj = jQuery.parseJSON('{btf_js}');</script>
+<script>var d = {{"dimensionValuesDisplayData" : {json.dumps({"B0X": ["M", "Red"]})}, "variationValues": {json.dumps(dvdd)}}};</script>
+<script>"asin":"{asin}"</script>
+<div id="navFooter">footer</div>
+</body></html>'''
+  head = f'<!doctype html><html><head><meta property="og:title" content="{title}"><meta property="og:image" content="{img(keys[0])}"><title>t</title>'
+  filler = max(0, spec.page_kb * 1024 - len(head) - len(body) - 64)
+  words = "lorem ipsum dolor sit amet "
+  pad = "<script>/* " + (words * (filler // len(words) + 1))[:filler] + " */</script><style>.x{color:red}</style></head>"
+
+  # most pages are named by ASIN; every 7th relies on the in-page "asin" fallback
+  name = f"{asin}.html" if i % 7 else f"page-{i}.html"
+  return name, head + pad + body
+
+def generate(out_dir: Path, n: int, spec: CorpusSpec) -> List[Path]:
+  out_dir.mkdir(parents=True, exist_ok=True)
+  paths = []
+  for i in range(n):
+    name, html = make_page(i, spec)
+    p = out_dir / name
+    p.write_text(html, encoding="utf-8")
+    paths.append(p)
+  return paths
+
+def parse_spec(args: List[str]) -> Tuple[List[str], CorpusSpec]:
+  """Pops the generator knobs (shared with bench_pdp.py)."""
+  spec = CorpusSpec()
+  for flag, field, conv in [("--colors", "colors", parse_range), ("--btf-kb", "btf_kb", int),
+                            ("--reviews", "reviews", parse_range), ("--aplus", "aplus", parse_range),
+                            ("--videos", "videos", parse_range), ("--page-kb", "page_kb", int),
+                            ("--seed", "seed", int)]:
+    args, val = v15.pop_opt(args, flag)
+    if val is not None:
+      setattr(spec, field, conv(val))
+  return args, spec
+
+def main(argv: List[str]) -> int:
+  args, spec = parse_spec(argv[1:])
+  if len(args) != 2:
+    print("Usage: gen_pdp_corpus.py OUT_DIR N [--colors A-B] [--btf-kb N] [--reviews A-B] [--aplus A-B]")
+    print("                         [--videos A-B] [--page-kb N] [--seed S]")
+    return 2
+  paths = generate(Path(args[0]), int(args[1]), spec)
+  total = sum(p.stat().st_size for p in paths)
+  print(f"✅ Wrote {len(paths)} pages to {args[0]} ({total / (1024 * 1024):.1f} MB, spec {spec.key()})")
+  return 0
+
+if __name__ == "__main__":
+  raise SystemExit(main(sys.argv))
@@ -0,0 +1,39 @@
+// Responsive Amazon image variants, the same rules as image_variants.py: every size of an
+// /images/I/<key>.<ext> image is that path with a ._SL<n>_ modifier (longest side n px)
+// before the extension. Product JSON carries them as image_records, cards as image_srcset.
+export const IMAGE_WIDTHS = [160, 320, 640, 1500];
+export const THUMB_WIDTH = 160;
+
+export type ImageRecord = { url: string; key: string; variants: Record<string, string> };
+
+const EXT = /\.(jpg|jpeg|png|webp)$/i;
+const MODIFIER = /\._[^.]+_\.(jpg|jpeg|png|webp)$/i;
+const KEY = /\/images\/I\/([^._/?]+)/i;
+
+function hasVariants(url: string): boolean {
+  return url.includes("/images/I/") && !url.includes("?") && EXT.test(url);
+}
+
+export function amazonImageKey(url: string): string {
+  const u = String(url || "");
+  const m = u.match(KEY);
+  return m ? m[1] : u;
+}
+
+export function imageVariant(url: string, width: number): string {
+  if (!hasVariants(url)) return url;
+  return url.replace(MODIFIER, ".$1").replace(EXT, `._SL${width}_.$1`);
+}
+
+export function imageRecord(url: string): ImageRecord {
+  const variants: Record<string, string> = {};
+  if (hasVariants(url)) {
+    for (const w of IMAGE_WIDTHS) variants[String(w)] = imageVariant(url, w);
+  }
+  return { url, key: amazonImageKey(url), variants };
+}
+
+export function imageSrcSet(url: string): string {
+  if (!hasVariants(url)) return "";
+  return IMAGE_WIDTHS.map((w) => `${imageVariant(url, w)} ${w}w`).join(", ");
+}
@@ -1,5 +1,6 @@
 import React, { useEffect, useMemo, useRef, useState } from "react";
 import { Link, useParams, useSearchParams } from "react-router-dom";
+import { imageSrcSet } from "../lib/images";
 
 type CategoryIndexEntry =
   | string[]
@@ -31,6 +32,26 @@ type ProductSummary = {
   galleryImages?: unknown;
 };
 
+// Precomputed listing pages (scripts/rebuild_category_index_normalized.py):
+// /products/c/<slug>/<sort>/<page>.json, cards already carry image/price/rating.
+type ListingPage = {
+  slug: string;
+  title: string;
+  sort: string;
+  page: number;
+  pages: number;
+  count: number;
+  page_size: number;
+  items: ProductSummary[];
+};
+
+const LISTING_SORT_DIRS: Record<string, string> = {
+  featured: "featured",
+  price_low: "price-asc",
+  price_high: "price-desc",
+  rating: "rating",
+};
+
 function titleizeSlug(slug: string) {
   return slug
     .split("-")
@@ -187,7 +208,7 @@ function extractImageFromFullProductJson(full: any): string | null {
  * - Falls back between /products and /static/products automatically via `fetchFirstJson`.
  */
 async function fetchJsonSafe(url: string): Promise<any> {
-  const r = await fetch(url, { cache: "no-store" });
+  const r = await fetch(url, { cache: "no-cache" });
   if (!r.ok) throw new Error(`HTTP ${r.status} for ${url}`);
 
   const ct = r.headers.get("content-type") || "";
@@ -297,6 +318,14 @@ export default function CategoryPage() {
   const [maxPrice, setMaxPrice] = useState<number | null>(null);
   const [page, setPage] = useState<number>(Number(searchParams.get("page") || 1));
 
+  // One small request per page when a listing exists; the full indexes are only loaded
+  // when it doesn't (or when a client-side filter needs the whole category).
+  const [listing, setListing] = useState<ListingPage | null>(null);
+  const [listingState, setListingState] = useState<"loading" | "ok" | "missing">("loading");
+  const filtersActive =
+    !!searchTerm.trim() || minRating !== null || minPrice !== null || maxPrice !== null;
+  const needLegacy = listingState === "missing";
+
   // Image hydration cache (static-only: fetch /products/<key>.json when the summary index lacks images)
   const imageCacheRef = useRef<Map<string, string | null>>(new Map());
   const [imageTick, setImageTick] = useState(0);
@@ -310,8 +339,47 @@ export default function CategoryPage() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [sort, page]);
 
+  // Try the precomputed listing page first
+  useEffect(() => {
+    const dir = LISTING_SORT_DIRS[sort];
+    const slug = normalizeSlug(categorySlug);
+    if (filtersActive || !dir || !slug) {
+      setListingState("missing");
+      return;
+    }
+
+    let cancelled = false;
+    setListingState("loading");
+
+    (async () => {
+      try {
+        const json = (await fetchFirstJson([
+          `/products/c/${encodeURIComponent(slug)}/${dir}/${page}.json`,
+          `/static/products/c/${encodeURIComponent(slug)}/${dir}/${page}.json`,
+        ])) as ListingPage;
+
+        if (cancelled) return;
+        if (json && Array.isArray(json.items)) {
+          setListing(json);
+          setListingState("ok");
+        } else {
+          setListingState("missing");
+        }
+      } catch {
+        if (!cancelled) setListingState("missing");
+      }
+    })();
+
+    return () => {
+      cancelled = true;
+    };
+  }, [categorySlug, sort, page, filtersActive]);
+
+  const showListing = listingState === "ok" && listing !== null;
+
   // Load category index (normalized) with fallback and path fallback (/products -> /static/products)
   useEffect(() => {
+    if (!needLegacy || catIndex) return;
     let cancelled = false;
     setLoadingCat(true);
     setError(null);
@@ -341,10 +409,12 @@ export default function CategoryPage() {
     return () => {
       cancelled = true;
     };
-  }, []);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [needLegacy]);
 
   // Load product summary index (used to resolve handles -> title/image/price)
   useEffect(() => {
+    if (!needLegacy || productIndex) return;
     let cancelled = false;
     setLoadingIndex(true);
 
@@ -368,7 +438,8 @@ export default function CategoryPage() {
     return () => {
       cancelled = true;
     };
-  }, []);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [needLegacy]);
 
   // If category slug doesn’t match the generated index key, auto-resolve.
   const matchedCategorySlug = useMemo(() => {
@@ -483,18 +554,24 @@ export default function CategoryPage() {
 
   // Pagination (48 per page)
   const pageSize = 48;
-  const totalPages = Math.max(1, Math.ceil(products.length / pageSize));
+  const totalPages = showListing
+    ? Math.max(1, listing!.pages)
+    : Math.max(1, Math.ceil(products.length / pageSize));
+  const resultCount = showListing ? listing!.count : products.length;
   const safePage = Math.min(Math.max(1, page), totalPages);
 
   useEffect(() => {
+    // page count is unknown until the listing page arrives
+    if (listingState === "loading") return;
     if (safePage !== page) setPage(safePage);
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [safePage]);
+  }, [safePage, listingState]);
 
   const pageItems = useMemo(() => {
+    if (showListing) return listing!.items;
     const start = (safePage - 1) * pageSize;
     return products.slice(start, start + pageSize);
-  }, [products, safePage]);
+  }, [products, safePage, showListing, listing]);
 
   // Hydrate images for visible items if summary index doesn’t contain images
   async function hydrateImageForKey(productKey: string): Promise<void> {
@@ -515,7 +592,7 @@ export default function CategoryPage() {
     }
   }
 
-  const isLoading = loadingCat || loadingIndex;
+  const isLoading = showListing ? false : listingState === "loading" || loadingCat || loadingIndex;
 
   useEffect(() => {
     if (isLoading) return;
@@ -575,7 +652,7 @@ export default function CategoryPage() {
           <div>
             <div className="text-[22px] font-semibold">{categoryTitle}</div>
             <div className="text-sm text-gray-600">
-              {isLoading ? "Loading…" : `${products.length.toLocaleString()} results`}
+              {isLoading ? "Loading…" : `${resultCount.toLocaleString()} results`}
             </div>
           </div>
 
@@ -749,7 +826,7 @@ export default function CategoryPage() {
               </div>
             )}
 
-            {!isLoading && !error && categoryKeys.length === 0 && (
+            {!isLoading && !showListing && !error && categoryKeys.length === 0 && (
               <div className="border border-yellow-200 bg-yellow-50 text-yellow-900 rounded p-3 mb-3 text-sm">
                 No products found for this category. (If you recently regenerated categories, the
                 menu link slug may not match the new category key.)
@@ -776,6 +853,8 @@ export default function CategoryPage() {
                     const summaryImg = getImageSrc(p);
                     const cachedImg = imageCacheRef.current.get(productKey);
                     const imageSrc = summaryImg || cachedImg || null;
+                    // cards carry image_srcset (catalog_build.py); hydrated images get one built here
+                    const srcSet = (p as any).image_srcset || (imageSrc ? imageSrcSet(imageSrc) : "");
 
                     return (
                       <div
@@ -788,6 +867,8 @@ export default function CategoryPage() {
                             {imageSrc ? (
                               <img
                                 src={imageSrc}
+                                srcSet={srcSet || undefined}
+                                sizes="(min-width: 1280px) 16vw, (min-width: 1024px) 20vw, (min-width: 640px) 33vw, 50vw"
                                 alt={p.title || "Product image"}
                                 className="w-full h-full object-contain"
                                 loading="lazy"
@@ -110,6 +110,7 @@ const Home = (): JSX.Element => {
       p.images?.[0] ||
       p.gallery?.[0] ||
       null,
+    image_srcset: p.image_srcset,
     price: p.price,
     wasPrice: p.was_price,
     rating: p.rating,
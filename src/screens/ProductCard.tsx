@@ -93,6 +93,8 @@ const ProductCard = ({ p }: { p: ProductCardData }) => {
           {img && !imgError ? (
             <img
               src={img}
+              srcSet={typeof p.image_srcset === "string" && p.image_srcset ? p.image_srcset : undefined}
+              sizes="(min-width: 1280px) 12vw, (min-width: 1024px) 16vw, (min-width: 768px) 25vw, (min-width: 640px) 33vw, 50vw"
               alt={p.title}
               loading="lazy"
               className="w-full h-full object-contain"
@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useState } from "react";
 import { useParams } from "react-router-dom";
 
 import { ProductPdpProvider } from "../../pdp/ProductPdpContext";
+import { imageRecord } from "../../lib/images";
 import {
   RelatedProductsSection,
   CustomersAlsoViewedSection,
@@ -73,8 +74,78 @@ function buildAsinMapUrl(): string {
   return new URL(`_asin_map.json`, buildProductsBaseUrl()).toString();
 }
 
+// old handle -> new handle, written by scripts/fix_product_handles.py
+function buildHandleRedirectsUrl(): string {
+  return new URL(`_handle_redirects.json`, buildProductsBaseUrl()).toString();
+}
+
+// Split PDPs (amazon_html_to_pdp_json_v15.py --split, see pdp_split.py): <handle>.json holds the
+// critical fields plus `deferred: "deferred/<ASIN>.json"`, the rest of the record.
+function buildDeferredUrl(ref: string): string {
+  return new URL(ref, buildProductsBaseUrl()).toString();
+}
+
+// deferred values win; objects present in both (variations, reviews) merge one level deep
+function mergeDeferred(critical: any, deferred: any): any {
+  const merged: any = { ...critical };
+  delete merged.deferred;
+  delete merged.schema;
+  for (const [key, value] of Object.entries(deferred || {})) {
+    if (key === "schema") continue;
+    const cur = merged[key];
+    const isObj = (v: unknown) => !!v && typeof v === "object" && !Array.isArray(v);
+    merged[key] = isObj(value) && isObj(cur) ? { ...cur, ...(value as object) } : value;
+  }
+  return merged;
+}
+
+// Lean PDPs (amazon_html_to_pdp_json_v15.py --lean, see pdp_lean.py): `derived` names the
+// fields dropped because they copy another one (field -> source, rebuilt in this order), and
+// variations.size_chart_id points at the shared assets/size_chart/<id>.json.
+const LEAN_DERIVABLE: Array<[string, string]> = [
+  ["gallery_images", "images"],
+  ["image_records", "images"],
+  ["aplus_images", "images"],
+  ["description_images", "aplus_images"],
+  ["short_description", "about_this_item"],
+  ["long_description", "long_description_blocks"],
+];
+
+function buildSharedAssetUrl(kind: string, id: string): string {
+  return new URL(`assets/${kind}/${id}.json`, buildProductsBaseUrl()).toString();
+}
+
+function longDescriptionFromBlocks(blocks: any): string {
+  if (!Array.isArray(blocks)) return "";
+  return blocks
+    .filter((b) => b && b.type === "p")
+    .map((b) => b.text || "")
+    .join("\n\n")
+    .trim();
+}
+
+// the record in its old shape; sizeChart is the fetched asset (null when unavailable)
+function expandLean(lean: any, sizeChart: any): any {
+  const full: any = { ...lean };
+  const derived = full.derived || {};
+  delete full.derived;
+  for (const [field, source] of LEAN_DERIVABLE) {
+    if (derived[field] !== source || field in full) continue;
+    const value = full[source];
+    if (field === "image_records") full[field] = Array.isArray(value) ? value.map(imageRecord) : null;
+    else if (source === "long_description_blocks") full[field] = longDescriptionFromBlocks(value);
+    else full[field] = Array.isArray(value) ? [...value] : value;
+  }
+  const variations = full.variations;
+  if (variations && typeof variations === "object" && "size_chart_id" in variations) {
+    const { size_chart_id: _id, ...rest } = variations;
+    full.variations = { ...rest, size_chart: sizeChart ?? null };
+  }
+  return full;
+}
+
 async function fetchJson(url: string) {
-  const res = await fetch(url, { cache: "no-store" });
+  const res = await fetch(url, { cache: "no-cache" });
   if (!res.ok) return { ok: false as const, status: res.status, data: null as any, text: "" };
 
   const ct = res.headers.get("content-type") || "";
@@ -145,6 +216,16 @@ export const SingleProduct = (): JSX.Element => {
         for (const id of candidates) {
           const r = await fetchJson(buildProductJsonUrl(id));
           if (r.ok) {
+            // ASIN aliases may be written as {"redirect": "<handle>"} pointer records
+            const redirect = r.data?.redirect;
+            if (typeof redirect === "string" && redirect && !isBlockedId(redirect)) {
+              const r2 = await fetchJson(buildProductJsonUrl(redirect));
+              if (r2.ok) {
+                if (!cancelled) setProduct(r2.data);
+                return;
+              }
+              continue;
+            }
             if (!cancelled) setProduct(r.data);
             return;
           }
@@ -167,6 +248,18 @@ export const SingleProduct = (): JSX.Element => {
           }
         }
 
+        const redirectsRes = await fetchJson(buildHandleRedirectsUrl());
+        if (redirectsRes.ok && redirectsRes.data && typeof redirectsRes.data === "object") {
+          const moved = (redirectsRes.data as Record<string, string>)[productId];
+          if (moved && !isBlockedId(moved)) {
+            const r2 = await fetchJson(buildProductJsonUrl(moved));
+            if (r2.ok && !cancelled) {
+              setProduct(r2.data);
+              return;
+            }
+          }
+        }
+
         if (!cancelled) setError("Failed to load product (404).");
       } catch (e: any) {
         if (!cancelled) setError(e?.message || "Unknown error");
@@ -179,6 +272,51 @@ export const SingleProduct = (): JSX.Element => {
     };
   }, [productId]);
 
+  // Paint from the critical part first, then fill in reviews / long description / A+ media
+  useEffect(() => {
+    const ref = product?.deferred;
+    if (typeof ref !== "string" || !ref) return;
+    let cancelled = false;
+
+    fetchJson(buildDeferredUrl(ref))
+      .then((r) => {
+        if (cancelled) return;
+        // on failure keep the critical record, minus the pointer so this does not refire
+        setProduct((cur: any) =>
+          cur === product ? (r.ok ? mergeDeferred(cur, r.data) : mergeDeferred(cur, {})) : cur
+        );
+      })
+      .catch(() => {
+        if (!cancelled) setProduct((cur: any) => (cur === product ? mergeDeferred(cur, {}) : cur));
+      });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [product]);
+
+  // Lean records (after the deferred merge): rebuild the dropped copies, fetch the shared size chart
+  useEffect(() => {
+    if (!product || product.deferred || !product.derived) return;
+    const chartId = product.variations?.size_chart_id;
+    let cancelled = false;
+    const expand = (chart: any) => {
+      if (!cancelled) setProduct((cur: any) => (cur === product ? expandLean(cur, chart) : cur));
+    };
+
+    if (typeof chartId === "string" && chartId) {
+      fetchJson(buildSharedAssetUrl("size_chart", chartId))
+        .then((r) => expand(r.ok ? r.data : null))
+        .catch(() => expand(null));
+    } else {
+      expand(null);
+    }
+
+    return () => {
+      cancelled = true;
+    };
+  }, [product]);
+
   return (
     <AssistantProvider mode="mock">
       <div className="bg-white text-black">
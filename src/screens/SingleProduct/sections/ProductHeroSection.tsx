@@ -2,6 +2,7 @@ import { useEffect, useMemo, useState } from "react";
 import { Star, Heart } from "lucide-react";
 import { useNavigate } from "react-router-dom";
 import { useProductPdp } from "../../../pdp/ProductPdpContext";
+import { THUMB_WIDTH, amazonImageKey, imageVariant } from "../../../lib/images";
 
 function stripAmazonSizeModifiers(url: string) {
   if (!url) return url;
@@ -230,6 +231,20 @@ export const ProductHeroSection = (): JSX.Element => {
 
   const images = rawImages;
 
+  // 72px gallery thumbnails and 40px colour chips load the small variant (image_records)
+  const thumbByKey = useMemo(() => {
+    const m: Record<string, string> = {};
+    const recs = (product as any)?.image_records;
+    if (Array.isArray(recs)) {
+      for (const r of recs) {
+        const small = r?.variants?.[String(THUMB_WIDTH)];
+        if (r?.key && small) m[r.key] = small;
+      }
+    }
+    return m;
+  }, [product]);
+  const thumbSrc = (u: string) => thumbByKey[amazonImageKey(u)] || imageVariant(u, THUMB_WIDTH);
+
   const [activeImage, setActiveImage] = useState<string>(images[0] ?? "");
   useEffect(() => {
     setActiveImage(images[0] ?? "");
@@ -370,7 +385,7 @@ export const ProductHeroSection = (): JSX.Element => {
                 aria-label="Select image"
               >
                 <img
-                  src={u}
+                  src={thumbSrc(u)}
                   alt=""
                   className="w-full h-full object-cover block"
                   loading="lazy"
@@ -458,7 +473,7 @@ export const ProductHeroSection = (): JSX.Element => {
                           >
                             {thumb ? (
                               <img
-                                src={thumb}
+                                src={thumbSrc(thumb)}
                                 alt={c}
                                 className="w-10 h-10 object-cover rounded border"
                                 loading="lazy"
@@ -152,7 +152,7 @@ function useIndexProducts() {
     (async () => {
       try {
         const res = await fetch("/static/products/_index.json", {
-          cache: "no-store",
+          cache: "no-cache",
         });
         const json = await res.json();
         if (!cancelled) {
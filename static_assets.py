@@ -0,0 +1,158 @@
+"""
+Precompressed static output + content-hash manifest for the products dir.
+
+The frontend fetches the *.json files under static/products (products, _index.json,
+_category_index*.json, search_index.json, search/, c/). precompress() walks the tree once a
+writer is done and, for every JSON file:
+
+  - writes <file>.gz (gzip -9) and, when the brotli package is installed, <file>.br
+    (quality 11) next to it, for `gzip_static on;` / `brotli_static on;`
+  - records its sha256 in _assets.json, the source for strong ETags:
+      {"version": 1, "files": {"<relative path>": {"sha256": ..., "etag": "\"<sha256[:32]>\"",
+                                                   "bytes": N, "gz": N, "br": N, "mtime_ns": ...}}}
+    gz / br are the sibling sizes, 0 when the file is too small to be worth compressing.
+
+Files whose size and mtime match their manifest entry are not read again (the writers leave
+unchanged files alone), so a rerun costs a stat per file. Siblings whose JSON file is gone
+are removed.
+
+    python3 static_assets.py [products_dir]
+
+compact_json() is the --compact serialization of the writers: no indent, sorted keys, so
+the same data always produces the same bytes and the same ETag.
+"""
+import gzip
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli as _brotli   # optional: without it only .gz siblings are written
+except ImportError:
+    _brotli = None
+
+PRODUCTS_DIR = Path("/Applications/product/static/products")
+MANIFEST_NAME = "_assets.json"
+MIN_BYTES = 512    # below this the headers outweigh the savings
+# build bookkeeping the frontend never fetches
+PRIVATE_NAMES = {MANIFEST_NAME, "_manifest.json", "_extract_metrics.json", "_profile.json"}
+
+ENCODERS = {".gz": lambda raw: gzip.compress(raw, 9, mtime=0)}
+if _brotli is not None:
+    ENCODERS[".br"] = lambda raw: _brotli.compress(raw, quality=11)
+SIBLING_EXTS = (".gz", ".br")
+
+def compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+def write_bytes(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def _fresh(path: Path, st, prev):
+    if not prev or prev.get("bytes") != st.st_size or prev.get("mtime_ns") != st.st_mtime_ns:
+        return False
+    for ext in ENCODERS:
+        size = prev.get(ext[1:])
+        if size is None or (size and not os.path.exists(f"{path}{ext}")):
+            return False
+    return True
+
+def _refresh(path: Path, st, prev):
+    """(manifest entry, rewritten?) for one file; siblings are rewritten when the file changed."""
+    if _fresh(path, st, prev):
+        return prev, False
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    entry = {"sha256": digest, "etag": f'"{digest[:32]}"', "bytes": len(raw), "mtime_ns": st.st_mtime_ns}
+    for ext, encode in ENCODERS.items():
+        sibling = Path(f"{path}{ext}")
+        blob = encode(raw) if len(raw) >= MIN_BYTES else None
+        if blob is None or len(blob) >= len(raw):
+            entry[ext[1:]] = 0
+            if sibling.exists():
+                sibling.unlink()
+            continue
+        write_bytes(sibling, blob)
+        entry[ext[1:]] = len(blob)
+    return entry, True
+
+def scan(root: Path):
+    """(JSON files, orphaned siblings) under root, as paths relative to it."""
+    files, orphans = [], []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        names = set(filenames)
+        for fn in sorted(filenames):
+            if fn.startswith("."):
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, fn), root)
+            if fn.endswith(".json") and fn not in PRIVATE_NAMES:
+                files.append(rel)
+            elif fn.endswith(SIBLING_EXTS) and fn[:-3].endswith(".json") and (
+                    fn[:-3] not in names or fn[:-3] in PRIVATE_NAMES or fn[-3:] not in ENCODERS):
+                orphans.append(rel)
+    return files, orphans
+
+def load_manifest(root: Path):
+    try:
+        data = json.loads((root / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    files = data.get("files") if isinstance(data, dict) else None
+    return files if isinstance(files, dict) else {}
+
+def precompress(root=PRODUCTS_DIR, workers=None):
+    """Brings the siblings and _assets.json under root up to date; returns a summary dict."""
+    root = Path(root)
+    old = load_manifest(root)
+    files, orphans = scan(root)
+    for rel in orphans:
+        os.unlink(root / rel)
+
+    def one(rel):
+        path = root / rel
+        try:
+            return rel, _refresh(path, path.stat(), old.get(rel))
+        except FileNotFoundError:
+            # removed between scan and read (a concurrent writer); it drops out of the manifest
+            return rel, (None, False)
+
+    workers = workers or min(32, (os.cpu_count() or 1) * 2)
+    manifest, refreshed = {}, 0
+    # zlib (and brotli) release the GIL while compressing, so threads are enough
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for rel, (entry, rewritten) in ex.map(one, files):
+            if entry is not None:
+                manifest[rel] = entry
+                refreshed += rewritten
+
+    write_bytes(root / MANIFEST_NAME,
+                json.dumps({"version": 1, "files": manifest}, separators=(",", ":"), sort_keys=True).encode())
+    return {
+        "files": len(manifest),
+        "refreshed": refreshed,
+        "removed": len(orphans),
+        "bytes": sum(e["bytes"] for e in manifest.values()),
+        "gz": sum(e.get("gz") or e["bytes"] for e in manifest.values()),
+        "br": sum(e.get("br") or e["bytes"] for e in manifest.values()) if _brotli is not None else None,
+    }
+
+def report(summary, root):
+    mb = lambda n: n / (1024 * 1024)
+    line = (f"🗜️ Precompressed {root}: {summary['files']} files ({summary['refreshed']} refreshed, "
+            f"{summary['removed']} stale siblings removed), {mb(summary['bytes']):.1f} MB -> "
+            f"gz {mb(summary['gz']):.1f} MB")
+    if summary["br"] is not None:
+        line += f", br {mb(summary['br']):.1f} MB"
+    print(line)
+    if _brotli is None:
+        print("⚠️  brotli is not installed (pip install brotli); only .gz siblings written")
+
+if __name__ == "__main__":
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else PRODUCTS_DIR
+    report(precompress(root), root)
@@ -0,0 +1,112 @@
+"""
+Compiled keyword taxonomy shared by the categorizers (rules live in taxonomy_rules.json).
+
+All keywords of a rule set are compiled into one trie-shaped regex, so a text is scanned
+once no matter how many rules there are; only rules whose keywords were hit are then
+evaluated, in file order, honouring groups (first match wins) and children.
+
+    tax = load_taxonomy("normalized")
+    tax.match_all(handle + "\\n" + title)   # every emit, in rule order
+    tax.match_first(text)                   # first emit or the set's default
+"""
+import json
+import os
+import re
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "taxonomy_rules.json")
+
+def trie_regex(words):
+    """
+    Regex matching any of `words`, longest alternative first at every branch point, e.g.
+    {"bra", "bras", "brief"} -> br(?:a(?:s|)|ief). Matching cost depends on keyword length,
+    not on how many keywords there are.
+    """
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            alts.append("")
+        if len(alts) == 1:
+            return alts[0]
+        return "(?:" + "|".join(alts) + ")"
+
+    return build(trie)
+
+class RuleList:
+    """Sibling rules plus a keyword -> rule positions index."""
+
+    def __init__(self, rules):
+        self.rules = []
+        self.by_keyword = {}
+        for pos, r in enumerate(rules):
+            kws = [k.lower() for k in r.get("any", [])]
+            children = RuleList(r["children"]) if r.get("children") else None
+            self.rules.append((r.get("emit"), r.get("group"), children))
+            for k in kws:
+                self.by_keyword.setdefault(k, []).append(pos)
+
+    def keywords(self):
+        out = set(self.by_keyword)
+        for _, _, children in self.rules:
+            if children:
+                out |= children.keywords()
+        return out
+
+    def evaluate(self, hits, out):
+        triggered = sorted({pos for k in hits for pos in self.by_keyword.get(k, ())})
+        used_groups = set()
+        for pos in triggered:
+            emit, group, children = self.rules[pos]
+            if group is not None:
+                if group in used_groups:
+                    continue
+                used_groups.add(group)
+            if emit is not None:
+                out.append(emit)
+            if children:
+                children.evaluate(hits, out)
+
+class Taxonomy:
+    def __init__(self, spec):
+        self.rules = RuleList(spec["rules"])
+        self.default = spec.get("default")
+        kws = sorted(self.rules.keywords())
+        self.pattern = re.compile("(?=(" + trie_regex(kws) + "))") if kws else None
+        # a hit on "sports bra" also means "bra" and "sports" occur: the scan only reports
+        # the longest keyword starting at each position, so expand to contained keywords
+        self.implied = {k: [o for o in kws if o in k] for k in kws}
+
+    def hits(self, text):
+        if self.pattern is None:
+            return set()
+        found = set()
+        for m in self.pattern.finditer(text.lower()):
+            k = m.group(1)
+            if k not in found:
+                found.update(self.implied[k])
+        return found
+
+    def match_all(self, text):
+        out = []
+        self.rules.evaluate(self.hits(text), out)
+        return out
+
+    def match_first(self, text):
+        out = self.match_all(text)
+        return out[0] if out else self.default
+
+_cache = {}
+
+def load_taxonomy(name, path=RULES_PATH):
+    key = (path, name)
+    if key not in _cache:
+        with open(path, "r", encoding="utf-8") as f:
+            spec = json.load(f)["sets"][name]
+        _cache[key] = Taxonomy(spec)
+    return _cache[key]
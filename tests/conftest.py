@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+IMPORTER_DIR = ROOT / "src" / "html to json"
+SCRIPTS_DIR = ROOT / "scripts"
+
+# root modules (product_corpus, build_search_index, ...), the importer and the scripts/ tools
+for path in (ROOT, IMPORTER_DIR, SCRIPTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import gen_pdp_corpus  # noqa: E402  (needs IMPORTER_DIR on sys.path)
+
+@pytest.fixture(scope="session")
+def pdp_pages(tmp_path_factory):
+    """Saved-PDP fixture corpus (gen_pdp_corpus): every extractor's markup, with and without
+    colour images, reviews, A+ modules, videos, size charts and a customers-say block."""
+    spec = gen_pdp_corpus.CorpusSpec(colors=(0, 6), btf_kb=2, aplus=(0, 3), videos=(0, 2), page_kb=40)
+    return gen_pdp_corpus.generate(tmp_path_factory.mktemp("pdp_pages"), 14, spec)
+
+def _tree(out):
+    """relative path -> bytes (symlinks as their target) for everything under out."""
+    files = {}
+    for path in sorted(out.rglob("*")):
+        if path.is_symlink():
+            files[path.relative_to(out).as_posix()] = ("->", path.readlink().as_posix())
+        elif path.is_file():
+            files[path.relative_to(out).as_posix()] = path.read_bytes()
+    return files
+
+@pytest.fixture
+def read_tree():
+    """An output directory as {relative path: bytes}, for byte-identity checks."""
+    return _tree
@@ -0,0 +1,24 @@
+import json
+import os
+
+import amazon_html_to_pdp_json_v15 as v15
+import gen_pdp_corpus
+from catalog_build import emit_normalized
+from product_corpus import load_corpus
+
+def test_normalized_lists_handles_not_file_names(tmp_path):
+    pages = [str(p) for p in gen_pdp_corpus.generate(tmp_path / "pages", 8, gen_pdp_corpus.CorpusSpec())]
+    out = tmp_path / "out"
+    assert v15.main(["v15", "--out", str(out), *pages]) == 0
+    # every record as if it had been read from its <ASIN>.json alias
+    products = [(os.path.join(str(out), f"{p['asin']}.json"), p) for _, p in load_corpus(str(out)).products]
+
+    stage = tmp_path / "stage"
+    stage.mkdir()
+    emit_normalized(products, stage)
+    index = json.loads((stage / "_category_index_normalized.json").read_text(encoding="utf-8"))
+    listed = {h for entry in index.values() for h in entry["items"]}
+    assert listed and listed <= {p["handle"] for _, p in products}
+    for page in (stage / "c").rglob("*.json"):
+        for item in json.loads(page.read_text(encoding="utf-8"))["items"]:
+            assert item["handle"] in listed
@@ -0,0 +1,34 @@
+import pytest
+
+import amazon_html_to_pdp_json_v15 as v15
+from catalog_store import CatalogStore, main, pop_store
+
+def test_pop_store():
+    assert pop_store(["a", "--store", "c.db", "b"]) == (["a", "b"], "c.db")
+    assert pop_store(["a"], "default.db") == (["a"], "default.db")
+
+@pytest.mark.parametrize("args", [["export", "--store"], ["export", "--store", "--prune"]])
+def test_store_without_path_is_a_usage_error(args, capsys):
+    with pytest.raises(SystemExit) as exc:
+        pop_store(args)
+    assert exc.value.code == 2
+    assert "--store DB" in capsys.readouterr().out
+
+def test_alias_without_mode_is_a_usage_error(tmp_path, capsys):
+    assert main(["catalog_store.py", "export", "--store", str(tmp_path / "c.db"), "--alias"]) == 2
+    assert "Usage:" in capsys.readouterr().out
+
+@pytest.mark.parametrize("compact", [False, True], ids=["indent", "compact"])
+@pytest.mark.parametrize("flags", [["--split"], ["--lean"], ["--split", "--lean"]])
+def test_shaped_export_matches_v15_files(pdp_pages, tmp_path, read_tree, compact, flags):
+    pages = list(map(str, pdp_pages))
+    style = ["--compact"] if compact else []
+    db = str(tmp_path / "c.db")
+    assert v15.main(["v15", "--out", str(tmp_path / "unused"), "--store", db, *style, *pages]) == 0
+    assert v15.main(["v15", "--out", str(tmp_path / "ref"), *style, *flags, *pages]) == 0
+    with CatalogStore(db) as store:
+        store.export(tmp_path / "out", split="--split" in flags, lean="--lean" in flags)
+
+    ref = read_tree(tmp_path / "ref")
+    exported = read_tree(tmp_path / "out")
+    assert exported and {k: ref.get(k) for k in exported} == exported
@@ -0,0 +1,50 @@
+import json
+import os
+
+import pytest
+
+import amazon_html_to_pdp_json_v15 as v15
+import categorize_products as cp
+import gen_pdp_corpus
+
+@pytest.fixture(scope="module")
+def pages(tmp_path_factory):
+    # titles cycle every 6 pages, so some handles are shared
+    return [str(p) for p in gen_pdp_corpus.generate(tmp_path_factory.mktemp("pages"), 14, gen_pdp_corpus.CorpusSpec())]
+
+def uncategorized(out, monkeypatch):
+    """Drop the category fields (in place, so hardlinks stay linked) and point the script at out."""
+    for path in out.glob("*.json"):
+        if path.name.startswith("_") or path.is_symlink():
+            continue
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if "redirect" in data:
+            continue
+        for k in ("category", "category_slug", "category_path"):
+            data.pop(k, None)
+        with open(path, "r+", encoding="utf-8") as f:
+            f.truncate()
+            f.write(json.dumps(data, indent=2))
+    monkeypatch.setattr(cp, "PRODUCTS_DIR", out)
+
+@pytest.mark.parametrize("mode", ["copy", "hardlink", "symlink", "redirect"])
+def test_every_product_once_and_aliases_follow(pages, tmp_path, monkeypatch, capsys, mode):
+    assert v15.main(["v15", "--out", str(tmp_path), "--alias", mode, *pages]) == 0
+    index = json.loads((tmp_path / "_index.json").read_text(encoding="utf-8"))
+    linked = {e["asin"] for e in index
+              if mode == "hardlink" and os.path.samefile(tmp_path / f"{e['asin']}.json", tmp_path / f"{e['id']}.json")}
+    uncategorized(tmp_path, monkeypatch)
+
+    cp.main(dry_run=True)
+    assert f"Would update {len(index)} products" in capsys.readouterr().out
+
+    cp.main()
+    assert f"Categorized {len(index)} products" in capsys.readouterr().out
+    for e in index:
+        alias = tmp_path / f"{e['asin']}.json"
+        rec = json.loads(alias.read_text(encoding="utf-8"))
+        if "redirect" in rec:
+            rec = json.loads((tmp_path / f"{rec['redirect']}.json").read_text(encoding="utf-8"))
+        assert rec["asin"] == e["asin"] and rec["category"]
+        if e["asin"] in linked:
+            assert os.path.samefile(alias, tmp_path / f"{e['id']}.json")
@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+import fix_product_handles as fph
+
+def product(handle, asin, title):
+    return {"id": handle, "handle": handle, "slug": handle, "asin": asin, "title": title}
+
+def write(path, data):
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+def read(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+@pytest.fixture
+def products(tmp_path, monkeypatch):
+    monkeypatch.setattr(fph, "PRODUCTS_DIR", tmp_path)
+    monkeypatch.setattr(fph, "PLAN_FILE", tmp_path / "_handle_plan.jsonl")
+    monkeypatch.setattr(fph, "JOURNAL_FILE", tmp_path / "_handle_journal.jsonl")
+    monkeypatch.setattr(fph, "REDIRECTS_FILE", tmp_path / "_handle_redirects.json")
+
+    # one product per v15 --alias mode, each stored under a handle that no longer matches its title
+    write(tmp_path / "old-copy.json", product("old-copy", "B00000COPY", "Copy Dress"))
+    write(tmp_path / "B00000COPY.json", product("old-copy", "B00000COPY", "Copy Dress"))
+    write(tmp_path / "old-hard.json", product("old-hard", "B00000HARD", "Hard Dress"))
+    os.link(tmp_path / "old-hard.json", tmp_path / "B00000HARD.json")
+    write(tmp_path / "old-sym.json", product("old-sym", "B000000SYM", "Sym Dress"))
+    os.symlink("old-sym.json", tmp_path / "B000000SYM.json")
+    write(tmp_path / "old-redir.json", product("old-redir", "B0000REDIR", "Redir Dress"))
+    write(tmp_path / "B0000REDIR.json", {"redirect": "old-redir", "id": "old-redir", "asin": "B0000REDIR"})
+    return tmp_path
+
+def test_aliases_are_not_products(products):
+    fph.plan()
+    plan = [json.loads(line) for line in fph.PLAN_FILE.read_text(encoding="utf-8").splitlines()]
+    assert sorted(e["src"] for e in plan) == ["old-copy.json", "old-hard.json", "old-redir.json", "old-sym.json"]
+
+def test_apply_keeps_aliases_and_rewrites_id(products):
+    assert fph.main(["fix_product_handles.py"]) == 0
+    for asin, handle in [("B00000COPY", "copy-dress"), ("B00000HARD", "hard-dress"),
+                         ("B000000SYM", "sym-dress"), ("B0000REDIR", "redir-dress")]:
+        rec = read(products / f"{handle}.json")
+        assert (rec["id"], rec["handle"], rec["slug"]) == (handle, handle, handle)
+        alias = read(products / f"{asin}.json")
+        if "redirect" in alias:
+            alias = read(products / f"{alias['redirect']}.json")
+        assert alias == rec
+    assert os.path.samefile(products / "B00000HARD.json", products / "hard-dress.json")
+    assert os.readlink(products / "B000000SYM.json") == "sym-dress.json"
+    assert not list(products.glob("old-*.json"))
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+import amazon_html_to_pdp_json_v15 as v15
+import gen_pdp_corpus
+from catalog_store import CatalogStore
+from product_corpus import load_corpus
+
+@pytest.fixture(scope="module")
+def pages(tmp_path_factory):
+    return [str(p) for p in gen_pdp_corpus.generate(tmp_path_factory.mktemp("pages"), 8, gen_pdp_corpus.CorpusSpec())]
+
+def by_asin(corpus):
+    return {p["asin"]: p for _, p in corpus.products}
+
+@pytest.fixture(scope="module")
+def full(pages, tmp_path_factory):
+    out = tmp_path_factory.mktemp("full")
+    assert v15.main(["v15", "--out", str(out), *pages]) == 0
+    return by_asin(load_corpus(str(out)))
+
+@pytest.mark.parametrize("flags", [["--split"], ["--lean"], ["--split", "--lean"]])
+def test_load_corpus_gives_back_full_records(pages, full, tmp_path, flags):
+    assert v15.main(["v15", "--out", str(tmp_path), *flags, *pages]) == 0
+    corpus = load_corpus(str(tmp_path))
+    assert not corpus.partial
+    assert by_asin(corpus) == full
+
+def test_import_split_dir_stores_full_records(pages, full, tmp_path):
+    out = tmp_path / "out"
+    assert v15.main(["v15", "--out", str(out), "--split", *pages]) == 0
+    with CatalogStore(str(tmp_path / "c.db")) as store:
+        store.import_dir(out)
+        assert {a: p for a, _, p in store.products()} == full
+
+def test_missing_deferred_part_is_not_imported(pages, tmp_path):
+    out = tmp_path / "out"
+    assert v15.main(["v15", "--out", str(out), "--split", *pages]) == 0
+    victim = sorted((out / "deferred").iterdir())[0]
+    victim.unlink()
+    with CatalogStore(str(tmp_path / "c.db")) as store:
+        corpus, _ = store.import_dir(out)
+        assert [r for _, r in corpus.partial] and store.get(victim.stem) is None
+
+@pytest.mark.parametrize("mode", ["symlink", "hardlink"])
+def test_linked_alias_keeps_handle_path(pages, full, tmp_path, mode):
+    assert v15.main(["v15", "--out", str(tmp_path), "--alias", mode, *pages]) == 0
+    corpus = load_corpus(str(tmp_path))
+    assert by_asin(corpus) == full
+    for path, p in corpus.products:
+        # products whose handle is shared keep a copy at <ASIN>.json, other aliases are links
+        if (tmp_path / f"{p['handle']}.json").samefile(path):
+            assert os.path.basename(path) == f"{p['handle']}.json"
@@ -0,0 +1,26 @@
+import build_search_index as search_index
+
+def product(slug, title, **extra):
+    return (f"/p/{slug}.json", {"handle": slug, "title": title, "brand": "Acme", "category": "Dresses", **extra})
+
+def build(tmp_path, products):
+    index, field_texts = search_index.records(products)
+    search_index.write_all(index, field_texts, str(tmp_path))
+    return search_index.SearchIndex(str(tmp_path / "search"))
+
+def test_term_only_in_bullets_is_found(tmp_path):
+    ix = build(tmp_path, [
+        product("a", "Maxi Dress", bullets=["Hidden zipper closure", "Machine washable"]),
+        product("b", "Midi Dress", bullets=["Pull on closure"]),
+        product("c", "Mini Dress", bullet_points=["Washable viscose"]),
+    ])
+    assert [r["slug"] for r in ix.search("zipper")] == ["a"]
+    assert [r["slug"] for r in ix.search("viscose")] == ["c"]
+    assert {r["slug"] for r in ix.search("washable")} == {"a", "c"}
+
+def test_title_hit_outranks_bullet_hit(tmp_path):
+    ix = build(tmp_path, [
+        product("a", "Maxi Dress", bullets=["Floral print"]),
+        product("b", "Floral Midi Dress", bullets=["Pull on"]),
+    ])
+    assert [r["slug"] for r in ix.search("floral")] == ["b", "a"]
@@ -0,0 +1,52 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import amazon_html_to_pdp_json_v15 as v15
+import gen_pdp_corpus
+from catalog_store import CatalogStore
+
+@pytest.fixture(scope="module")
+def pages(tmp_path_factory):
+    # titles cycle every 6 pages, so pages i and i + 6 (i not a multiple of 4) share a handle
+    return gen_pdp_corpus.generate(tmp_path_factory.mktemp("pages"), 14, gen_pdp_corpus.CorpusSpec())
+
+def run(pages, out: Path, *args):
+    assert v15.main(["v15", "--out", str(out), *args, *map(str, pages)]) == 0
+
+def alias_record(out: Path, asin: str):
+    rec = json.loads((out / f"{asin}.json").read_text(encoding="utf-8"))
+    if "redirect" in rec and len(rec) <= 3:
+        rec = json.loads((out / f"{rec['redirect']}.json").read_text(encoding="utf-8"))
+    return rec
+
+@pytest.mark.parametrize("mode", ["copy", "symlink", "hardlink", "redirect"])
+def test_asin_alias_resolves_to_its_own_product(pages, tmp_path, mode):
+    run(pages, tmp_path, "--alias", mode)
+    index = json.loads((tmp_path / "_index.json").read_text(encoding="utf-8"))
+    handles = [e["id"] for e in index]
+    assert len(set(handles)) < len(handles), "fixture needs a handle collision"
+    for e in index:
+        assert alias_record(tmp_path, e["asin"])["asin"] == e["asin"]
+
+def test_unshared_handle_keeps_link(pages, tmp_path):
+    run(pages, tmp_path, "--alias", "symlink")
+    index = json.loads((tmp_path / "_index.json").read_text(encoding="utf-8"))
+    counts = {}
+    for e in index:
+        counts[e["id"]] = counts.get(e["id"], 0) + 1
+    for e in index:
+        alias = tmp_path / f"{e['asin']}.json"
+        assert alias.is_symlink() == (counts[e["id"]] == 1)
+
+@pytest.mark.parametrize("mode", ["symlink", "redirect"])
+def test_store_export_alias_resolves_to_its_own_product(pages, tmp_path, mode):
+    db = str(tmp_path / "c.db")
+    run(pages, tmp_path / "unused", "--store", db)
+    out = tmp_path / "out"
+    with CatalogStore(db) as store:
+        store.export(out, alias=mode)
+        asins = [asin for asin, _, _ in store.products()]
+    for asin in asins:
+        assert alias_record(out, asin)["asin"] == asin
@@ -0,0 +1,73 @@
+import gzip
+import io
+import tarfile
+
+import pytest
+
+import amazon_html_to_pdp_json_v15 as v15
+
+def run(out, inputs):
+    assert v15.main(["v15", "--out", str(out), *map(str, inputs)]) == 0
+    return out
+
+def make_tar(path, pages, mode):
+    with tarfile.open(path, mode) as tf:
+        for p in pages:
+            tf.add(p, arcname=f"saved/{p.name}")
+    return path
+
+def zstd_compress(data):
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+def gz_files(tmp_path, pages):
+    out = []
+    for p in pages:
+        q = tmp_path / f"{p.name}.gz"
+        q.write_bytes(gzip.compress(p.read_bytes()))
+        out.append(q)
+    return out
+
+def zst_files(tmp_path, pages):
+    out = []
+    for p in pages:
+        q = tmp_path / f"{p.name}.zst"
+        q.write_bytes(zstd_compress(p.read_bytes()))
+        out.append(q)
+    return out
+
+def tar_zst(tmp_path, pages):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tf:
+        for p in pages:
+            tf.add(p, arcname=f"saved/{p.name}")
+    path = tmp_path / "pages.tar.zst"
+    path.write_bytes(zstd_compress(buf.getvalue()))
+    return [path]
+
+INPUTS = {
+    "html.gz": gz_files,
+    "html.zst": zst_files,
+    "tar": lambda tmp_path, pages: [make_tar(tmp_path / "pages.tar", pages, "w")],
+    "tar.gz": lambda tmp_path, pages: [make_tar(tmp_path / "pages.tar.gz", pages, "w:gz")],
+    "tgz": lambda tmp_path, pages: [make_tar(tmp_path / "pages.tgz", pages, "w:gz")],
+    "tar.zst": tar_zst,
+}
+
+@pytest.fixture(scope="module")
+def loose(pdp_pages, tmp_path_factory):
+    return run(tmp_path_factory.mktemp("loose"), pdp_pages)
+
+@pytest.mark.parametrize("kind", sorted(INPUTS))
+def test_compressed_inputs_match_loose_files(pdp_pages, loose, tmp_path, kind, read_tree):
+    src = tmp_path / "src"
+    src.mkdir()
+    out = run(tmp_path / "out", INPUTS[kind](src, pdp_pages))
+    assert read_tree(out) == read_tree(loose)
+
+def test_mixed_inputs_keep_input_order(pdp_pages, loose, tmp_path, read_tree):
+    """Loose files, a tarball and .gz files in one run: same output as all loose files."""
+    src = tmp_path / "src"
+    src.mkdir()
+    inputs = [*pdp_pages[:4], make_tar(src / "mid.tar.gz", pdp_pages[4:10], "w:gz"), *gz_files(src, pdp_pages[10:])]
+    assert read_tree(run(tmp_path / "out", inputs)) == read_tree(loose)
@@ -0,0 +1,20 @@
+import pytest
+
+import amazon_html_to_pdp_json_v15 as v15
+import gen_pdp_corpus
+
+@pytest.mark.parametrize("args, budget", [
+    ([], None),
+    (["--budget", "off"], None),
+    (["--budget", "on"], v15.Budget()),
+    (["--budget", "page_s=5"], v15.Budget(page_s=5.0)),
+])
+def test_budget_is_opt_in(args, budget):
+    assert v15.parse_budget(["a.html", *args]) == (["a.html"], budget)
+
+def test_metrics_only_on_budget_runs(tmp_path):
+    pages = [str(p) for p in gen_pdp_corpus.generate(tmp_path / "pages", 2, gen_pdp_corpus.CorpusSpec())]
+    assert v15.main(["v15", "--out", str(tmp_path / "plain"), *pages]) == 0
+    assert not (tmp_path / "plain" / "_extract_metrics.json").exists()
+    assert v15.main(["v15", "--out", str(tmp_path / "budget"), "--budget", "on", *pages]) == 0
+    assert (tmp_path / "budget" / "_extract_metrics.json").exists()
@@ -0,0 +1,14 @@
+import shutil
+
+import amazon_html_to_pdp_json_v15 as v15
+
+def test_parser_version_covers_root_helpers(tmp_path, monkeypatch):
+    for name in v15.ROOT_MODULES:
+        shutil.copy(v15.REPO_ROOT / f"{name}.py", tmp_path / f"{name}.py")
+    monkeypatch.setattr(v15, "REPO_ROOT", tmp_path)
+    before = v15.parser_version("html.parser")
+    assert v15.parser_version("html.parser") == before
+
+    with open(tmp_path / "image_variants.py", "a", encoding="utf-8") as f:
+        f.write("\nWIDTHS = (160, 320, 640, 1000)\n")
+    assert v15.parser_version("html.parser") != before
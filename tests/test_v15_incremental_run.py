@@ -0,0 +1,35 @@
+import shutil
+
+import amazon_html_to_pdp_json_v15 as v15
+
+def run(pages, out, *args):
+    assert v15.main(["v15", "--out", str(out), *args, *map(str, pages)]) == 0
+
+def test_rerun_skips_unchanged_and_reparses_changed(pdp_pages, tmp_path, capsys, read_tree):
+    def products(out):
+        """Output files except the manifest, which only --incremental writes."""
+        return {k: v for k, v in read_tree(out).items() if k != v15.MANIFEST_NAME}
+
+    pages = [shutil.copy(p, tmp_path / p.name) for p in pdp_pages]
+    out = tmp_path / "out"
+    run(pages, out, "--incremental")
+    first = products(out)
+    capsys.readouterr()
+
+    run(pages, out, "--incremental")
+    log = capsys.readouterr().out
+    assert log.count("♻️ Unchanged") == len(pages)
+    assert f"({len(pages)} unchanged, 0 parsed)" in log
+    assert products(out) == first
+
+    # edit one page: only it is parsed again, and the result equals a fresh full run
+    changed = pages[3]
+    html = open(changed, encoding="utf-8").read()
+    open(changed, "w", encoding="utf-8").write(html.replace("Machine wash cold", "Hand wash only"))
+    run(pages, out, "--incremental")
+    log = capsys.readouterr().out
+    assert log.count("♻️ Unchanged") == len(pages) - 1
+    assert f"({len(pages) - 1} unchanged, 1 parsed)" in log
+
+    run(pages, tmp_path / "fresh")
+    assert products(out) == products(tmp_path / "fresh") != first
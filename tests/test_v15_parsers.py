@@ -0,0 +1,28 @@
+import json
+from dataclasses import asdict
+
+import pytest
+
+import amazon_html_to_pdp_json_v15 as v15
+
+def extracted(path, parser, slim):
+    return json.dumps(asdict(v15.parse_one(path, parser, slim)), ensure_ascii=False, sort_keys=True)
+
+@pytest.mark.parametrize("slim", [False, True], ids=["full", "slim"])
+@pytest.mark.parametrize("parser", v15.PARSER_BACKENDS)
+def test_backends_extract_identical_json(pdp_pages, parser, slim):
+    """Every allow-listed backend, on the full and the slimmed page, matches html.parser on the full page."""
+    if not v15.parser_available(parser):
+        pytest.skip(f"{parser} is not installed")
+    for path in pdp_pages:
+        assert extracted(path, parser, slim) == extracted(path, v15.DEFAULT_PARSER, False), path.name
+
+def test_compare_parsers_reports_parity(pdp_pages, capsys):
+    backends = [p for p in v15.PARSER_BACKENDS if v15.parser_available(p)]
+    assert v15.compare_parsers([str(p) for p in pdp_pages], backends) == 0
+    assert "Parser parity" in capsys.readouterr().out
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        v15.make_soup("<p></p>", "html5lib")
+    assert not v15.parser_available("html5lib")
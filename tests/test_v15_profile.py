@@ -0,0 +1,21 @@
+import json
+import os
+import tarfile
+
+import amazon_html_to_pdp_json_v15 as v15
+import gen_pdp_corpus
+
+def test_profile_reports_archive_member_bytes(tmp_path):
+    pages = gen_pdp_corpus.generate(tmp_path / "pages", 3, gen_pdp_corpus.CorpusSpec())
+    archive = tmp_path / "pages.tar.gz"
+    with tarfile.open(archive, "w:gz") as tf:
+        for p in pages:
+            tf.add(p, arcname=p.name)
+    out = tmp_path / "out"
+    assert v15.main(["v15", "--out", str(out), "--profile", str(archive)]) == 0
+
+    sizes = {p.name: os.path.getsize(p) for p in pages}
+    slowest = json.loads((out / "_profile.json").read_text(encoding="utf-8"))["slowest"]
+    assert len(slowest) == len(pages)
+    for entry in slowest:
+        assert entry["bytes"] == sizes[entry["file"].split(v15.ARCHIVE_SEP, 1)[1]]
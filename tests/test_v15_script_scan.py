@@ -0,0 +1,32 @@
+import pytest
+
+import amazon_html_to_pdp_json_v15 as v15
+from bench_script_scan import separate_passes, single_pass
+
+def test_single_pass_matches_separate_passes(pdp_pages):
+    found = set()
+    for path in pdp_pages:
+        html = path.read_text(encoding="utf-8")
+        scan = single_pass(html)
+        assert scan == separate_passes(html), path.name
+        found.update(k for k, v in scan.items() if v)
+    # the corpus exercises every blob the scan looks for
+    assert found == {"atf_items", "btf", "dimension_values", "image_urls", "videos", "asin"}
+
+@pytest.mark.parametrize("html", [
+    "",
+    "<html><body>no scripts</body></html>",
+    # markers without their blobs, and blobs cut off mid-way
+    "<script>'colorImages': { 'initial': </script>",
+    "<script>var obj = jQuery.parseJSON('{\"colorImages\": {</script>",
+    '<script>"dimensionValuesDisplayData" : {"B0X": [</script>',
+    # overlapping / adjacent URL tokens and several asin keys
+    '<script>"asin" : "bad", "asin":"B0ABCDEFGH", "asin":"B0ZZZZZZZZ"'
+    ' https://m.media-amazon.com/images/I/abc._SL1500_.jpghttps://m.media-amazon.com/images/I/def.jpg'
+    ' https://x.cloudfront.net/v.mp4 "videoURL":"https://m.media-amazon.com/images/S/v.m3u8"</script>',
+])
+def test_edge_pages(html):
+    assert single_pass(html) == separate_passes(html)
+
+def test_page_without_blobs_is_empty_scan():
+    assert v15.scan_page_scripts("<html></html>") == v15.empty_scan()
@@ -0,0 +1,38 @@
+import json
+from dataclasses import asdict
+
+import pytest
+
+import amazon_html_to_pdp_json_v15 as v15
+
+def extracted(path, slim):
+    return json.dumps(asdict(v15.parse_one(path, slim=slim)), ensure_ascii=False, sort_keys=True)
+
+def test_run_output_matches_no_slim(pdp_pages, tmp_path, read_tree):
+    for name, flags in (("slim", []), ("full", ["--no-slim"])):
+        assert v15.main(["v15", "--out", str(tmp_path / name), *flags, *map(str, pdp_pages)]) == 0
+    assert read_tree(tmp_path / "slim") == read_tree(tmp_path / "full")
+
+def test_slim_page_drops_bodies_and_chrome(pdp_pages):
+    html = pdp_pages[1].read_text(encoding="utf-8")
+    page = v15.slim_html(html)
+    assert len(page.html) < len(html) // 2
+    assert 'id="nav-main"' not in page.html and 'id="navFooter"' not in page.html
+    assert page.html.lower().count("<script") + page.html.lower().count("<style") == len(page.bodies)
+
+# markup the slimmer has to leave alone or put back exactly
+EDGES = {
+    "script_in_comment": '<!-- <script>var x = "</div>";</script> -->',
+    "script_in_size_chart": '<div id="a-popover-sizeGuide"><table><tr><td>S</td></tr></table>'
+                            '<script>var chart = "<b>M</b>";</script><style>td{color:red}</style></div>',
+    "nested_chrome": '<div id="navbar"><div id="nav-main"><a>x</a></div><script>y()</script></div>',
+    "unbalanced_chrome": '<div id="navFooter"><div>never closed',
+    "unterminated_script": '<script>var s = "<span id=productTitle>Other</span>";',
+}
+
+@pytest.mark.parametrize("edge", sorted(EDGES))
+def test_edge_markup_extracts_the_same(pdp_pages, tmp_path, edge):
+    html = pdp_pages[0].read_text(encoding="utf-8")
+    path = tmp_path / pdp_pages[0].name
+    path.write_text(html.replace("</body>", EDGES[edge] + "</body>"), encoding="utf-8")
+    assert extracted(path, True) == extracted(path, False)
@@ -0,0 +1,16 @@
+import amazon_html_to_pdp_json_v15 as v15
+
+def run(pages, out, *args):
+    assert v15.main(["v15", "--out", str(out), *args, *map(str, pages)]) == 0
+    return out
+
+def test_workers_output_is_byte_identical(pdp_pages, tmp_path, read_tree):
+    serial = read_tree(run(pdp_pages, tmp_path / "serial"))
+    assert any(name.endswith(".json") and not name.startswith("_") for name in serial)
+    for n in ("2", "4"):
+        assert read_tree(run(pdp_pages, tmp_path / f"w{n}", "--workers", n)) == serial
+
+def test_workers_with_links_and_cross_sells(pdp_pages, tmp_path, read_tree):
+    args = ["--alias", "symlink", "--cross-sells", "ranked"]
+    assert read_tree(run(pdp_pages, tmp_path / "w3", "--workers", "3", *args)) == \
+        read_tree(run(pdp_pages, tmp_path / "serial", *args))